@@ -0,0 +1,603 @@
+var currentApy = 0;
+var currentCoin = '';
+
+function openCalcModal(coin, platform, apy) {
+    currentCoin = coin;
+    document.getElementById('modalCoin').innerText = coin;
+    document.getElementById('modalPlatform').innerText = platform;
+    document.getElementById('modalApy').innerText = apy;
+    document.getElementById('calcAmount').placeholder = '输入投入金额 (' + coin + ')';
+    currentApy = parseFloat(apy.replace('%', '')) / 100;
+    document.getElementById('calcAmount').value = '';
+    document.getElementById('dailyProfit').innerText = '0.0000 ' + coin;
+    document.getElementById('monthlyProfit').innerText = '0.00 ' + coin;
+    document.getElementById('yearlyProfit').innerText = '0.00 ' + coin;
+    document.getElementById('calcModal').style.display = 'flex';
+}
+
+function closeCalcModal() {
+    document.getElementById('calcModal').style.display = 'none';
+}
+
+function calculateProfit() {
+    var amount = parseFloat(document.getElementById('calcAmount').value) || 0;
+    var yearly = amount * currentApy;
+    var monthly = yearly / 12;
+    var daily = yearly / 365;
+    document.getElementById('dailyProfit').innerText = daily.toFixed(4) + ' ' + currentCoin;
+    document.getElementById('monthlyProfit').innerText = monthly.toFixed(2) + ' ' + currentCoin;
+    document.getElementById('yearlyProfit').innerText = yearly.toFixed(2) + ' ' + currentCoin;
+}
+
+// 点击弹窗外部关闭
+document.getElementById('calcModal').onclick = function(e) {
+    if (e.target === this) closeCalcModal();
+};
+
+// 倒计时与进度条：前端自动更新（无需手动刷新 Streamlit 页面）
+// 每次表格重绘后 scan() 一次，缓存每行的元素引用和时间戳；之后的更新只遍历缓存：
+// - 已结束的行写一次「已结束」后不再更新；
+// - 只更新可见的行（IntersectionObserver），滚出视野的行暂停；
+// - 距结束超过 1 小时的行按分钟更新，1 小时以内才按秒更新；
+// - 页面在后台（标签页不可见）时停止计时。
+var countdown = (function() {
+    var SECOND = 1000;
+    var MINUTE = 60 * SECOND;
+    var HOUR = 60 * MINUTE;
+    var DEFAULT_SPAN = 30 * 24 * HOUR;   // 没有开始时间则用 30 天兜底
+
+    var rowsEl = document.getElementById('alphaRows');
+    var wrapEl = document.getElementById('alphaWrap');
+    var entries = [];
+    var timer = null;
+    var observer = null;
+
+    function formatRemaining(ms) {
+        if (ms <= 0) return '已结束';
+        var totalSeconds = Math.floor(ms / 1000);
+        var days = Math.floor(totalSeconds / 86400);
+        var hours = Math.floor((totalSeconds % 86400) / 3600);
+        var minutes = Math.floor((totalSeconds % 3600) / 60);
+        var seconds = totalSeconds % 60;
+
+        if (days > 0) return '剩余 ' + days + '天' + hours + '小时';
+        if (hours > 0) return '剩余 ' + hours + '小时' + minutes + '分';
+        if (minutes > 0) return '剩余 ' + minutes + '分' + seconds + '秒';
+        return '剩余 ' + seconds + '秒';
+    }
+
+    // 更新一行，并记下它下一次需要更新的时间
+    function update(e, now) {
+        var remaining = e.end - now;
+        var text = formatRemaining(remaining);
+        if (text !== e.text) {
+            e.text = text;
+            if (e.timeEl) e.timeEl.innerText = text;
+        }
+
+        if (e.barEl) {
+            // 显示“进度条”：越接近结束越满
+            var total = e.end - e.start;
+            var ratio = total <= 0 ? 0 : (now - e.start) / total;
+            if (ratio < 0) ratio = 0;
+            if (ratio > 1) ratio = 1;
+            var width = (ratio * 100).toFixed(2) + '%';
+            if (width !== e.width) {
+                e.width = width;
+                e.barEl.style.width = width;
+            }
+        }
+
+        if (remaining <= 0) {
+            e.done = true;
+        } else if (remaining > HOUR) {
+            // 文案在剩余时间跨过整分钟时才会变化
+            e.due = now + (remaining % MINUTE || MINUTE) + 1;
+        } else {
+            e.due = now + (remaining % SECOND || SECOND) + 1;
+        }
+    }
+
+    function schedule() {
+        if (timer !== null) {
+            clearTimeout(timer);
+            timer = null;
+        }
+        if (document.hidden) return;
+        var next = Infinity;
+        for (var i = 0; i < entries.length; i++) {
+            var e = entries[i];
+            if (!e.done && e.visible && e.due < next) next = e.due;
+        }
+        if (next === Infinity) return;
+        timer = setTimeout(run, Math.max(0, next - Date.now()));
+    }
+
+    function run() {
+        timer = null;
+        var now = Date.now();
+        var ended = 0;
+        for (var i = 0; i < entries.length; i++) {
+            var e = entries[i];
+            if (e.done) {
+                ended++;
+            } else if (e.visible && e.due <= now) {
+                update(e, now);
+            }
+        }
+        if (ended > 0) {
+            entries = entries.filter(function(e) { return !e.done; });
+        }
+        schedule();
+    }
+
+    function onIntersect(records) {
+        var now = Date.now();
+        for (var i = 0; i < records.length; i++) {
+            var e = records[i].target._countdown;
+            if (!e) continue;
+            e.visible = records[i].isIntersecting;
+            if (e.visible && !e.done && e.due <= now) update(e, now);
+        }
+        schedule();
+    }
+
+    if (typeof IntersectionObserver !== 'undefined') {
+        observer = new IntersectionObserver(onIntersect, { root: wrapEl });
+    }
+
+    if (document.addEventListener) {
+        document.addEventListener('visibilitychange', function() {
+            if (document.hidden) schedule();
+            else run();
+        });
+    }
+
+    // 表格内容变化后调用：重新收集所有倒计时行，并立即填充一次
+    function scan() {
+        if (observer) observer.disconnect();
+        entries = [];
+        var now = Date.now();
+        var rows = rowsEl.querySelectorAll('tr');
+        for (var i = 0; i < rows.length; i++) {
+            var row = rows[i];
+            var timeEl = row.querySelector('.remaining-time[data-end]');
+            var barEl = row.querySelector('.progress-fill[data-end]');
+            var src = timeEl || barEl;
+            if (!src) continue;
+            var end = parseInt(src.getAttribute('data-end'), 10);
+            if (isNaN(end)) continue;
+            var start = barEl ? parseInt(barEl.getAttribute('data-start'), 10) : NaN;
+            if (isNaN(start)) start = end - DEFAULT_SPAN;
+
+            var e = {
+                timeEl: timeEl, barEl: barEl, start: start, end: end,
+                text: null, width: null, due: 0, done: false, visible: !observer
+            };
+            update(e, now);
+            if (e.done) continue;
+            row._countdown = e;
+            entries.push(e);
+            if (observer) observer.observe(row);
+        }
+        schedule();
+    }
+
+    return { scan: scan };
+})();
+
+// offer 索引（JSON 模式）：每个数据版本只建一次，排序 / 筛选 / 搜索都在索引上完成，
+// 不需要重跑 Streamlit 脚本，也不重新生成整张表：
+// - apy / end：按 APY 从高到低、按结束时间从早到晚的行号顺序；
+// - coin / platform / lock：取值 -> 行号列表（倒排索引）；
+// - terms：币种和平台名（小写）排好序的词表，按前缀二分查找后合并对应的行号列表；
+// - 取前 K 名只沿着排序顺序走到第 K 个符合条件的行为止。
+var offerIndex = (function() {
+    function order(n, key, desc) {
+        var ids = [];
+        for (var i = 0; i < n; i++) ids.push(i);
+        ids.sort(function(a, b) {
+            var x = key(a), y = key(b);
+            if (x === null) return y === null ? a - b : 1;     // 没有值的排在最后
+            if (y === null) return -1;
+            return (desc ? y - x : x - y) || a - b;
+        });
+        return Int32Array.from(ids);
+    }
+
+    function invert(offers, field) {
+        var map = new Map();
+        for (var i = 0; i < offers.length; i++) {
+            var v = offers[i][field];
+            if (v === null || v === undefined) continue;
+            if (!map.has(v)) map.set(v, []);
+            map.get(v).push(i);
+        }
+        return map;
+    }
+
+    function build(offers) {
+        var n = offers.length;
+        var postings = new Map();
+        ['coin', 'platform'].forEach(function(field) {
+            for (var i = 0; i < n; i++) {
+                var v = offers[i][field];
+                if (!v) continue;
+                var term = String(v).toLowerCase();
+                if (!postings.has(term)) postings.set(term, []);
+                var ids = postings.get(term);
+                if (ids[ids.length - 1] !== i) ids.push(i);
+            }
+        });
+        return {
+            size: n,
+            apy: order(n, function(i) { var v = offers[i].apy_value; return v === undefined ? null : v; }, true),
+            end: order(n, function(i) { var v = offers[i].end; return v === undefined ? null : v; }, false),
+            coin: invert(offers, 'coin'),
+            platform: invert(offers, 'platform'),
+            lock: invert(offers, 'lock'),
+            terms: Array.from(postings.keys()).sort(),
+            postings: postings
+        };
+    }
+
+    // 前缀匹配的所有行号（词表有序，二分找到第一个 >= 前缀的词后顺序扫描）
+    function search(idx, prefix) {
+        var terms = idx.terms;
+        var lo = 0, hi = terms.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+            if (terms[mid] < prefix) lo = mid + 1; else hi = mid;
+        }
+        var seen = new Uint8Array(idx.size);
+        var ids = [];
+        for (var t = lo; t < terms.length && terms[t].lastIndexOf(prefix, 0) === 0; t++) {
+            var list = idx.postings.get(terms[t]);
+            for (var k = 0; k < list.length; k++) {
+                if (!seen[list[k]]) {
+                    seen[list[k]] = 1;
+                    ids.push(list[k]);
+                }
+            }
+        }
+        return ids;
+    }
+
+    // q: { sort: 'sheet'|'apy'|'end', coin, platform, lock, text, top }，返回要展示的行号（按顺序）
+    function query(idx, q) {
+        var lists = [];
+        if (q.coin) lists.push(idx.coin.get(q.coin) || []);
+        if (q.platform) lists.push(idx.platform.get(q.platform) || []);
+        if (q.lock) lists.push(idx.lock.get(q.lock) || []);
+        var text = (q.text || '').trim().toLowerCase();
+        if (text) lists.push(search(idx, text));
+
+        var allowed = null;
+        if (lists.length) {
+            // 从最短的列表开始求交集
+            lists.sort(function(a, b) { return a.length - b.length; });
+            allowed = new Uint8Array(idx.size);
+            for (var k = 0; k < lists[0].length; k++) allowed[lists[0][k]] = 1;
+            for (var l = 1; l < lists.length; l++) {
+                var next = new Uint8Array(idx.size);
+                for (k = 0; k < lists[l].length; k++) {
+                    if (allowed[lists[l][k]]) next[lists[l][k]] = 1;
+                }
+                allowed = next;
+            }
+        }
+
+        var sorted = q.sort === 'apy' ? idx.apy : q.sort === 'end' ? idx.end : null;
+        var limit = q.top > 0 ? q.top : idx.size;
+        var out = [];
+        for (var i = 0; i < idx.size && out.length < limit; i++) {
+            var id = sorted ? sorted[i] : i;
+            if (!allowed || allowed[id]) out.push(id);
+        }
+        return out;
+    }
+
+    return { build: build, query: query };
+})();
+
+// 虚拟滚动表格（JSON 模式）：数据是紧凑的 offer 数组，只渲染可视区域附近的行；
+// 滚到已加载部分的末尾时再追加一页（增量分页），上万行也不会一次性生成 DOM
+var virtualTable = (function() {
+    var PAGE_SIZE = 200;      // 每次追加的行数
+    var OVERSCAN = 8;         // 可视区域上下额外渲染的行数
+    var ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
+
+    var wrapEl = document.getElementById('alphaWrap');
+    var rowsEl = document.getElementById('alphaRows');
+    var offers = [];
+    var view = [];            // 当前排序 / 筛选下要展示的行号
+    var loaded = 0;           // 已进入滚动区域的行数
+    var rowHeight = 80;       // 估计行高，渲染后按实际高度校正
+    var first = -1;
+    var last = -1;
+    var active = false;
+    var scheduled = false;
+
+    function esc(v) {
+        if (v === null || v === undefined) return '';
+        return String(v).replace(/[&<>"']/g, function(c) { return ESCAPES[c]; });
+    }
+
+    function tag(cls, v) {
+        return v === null || v === undefined ? '' : '<span class="tag ' + cls + '">' + esc(v) + '</span>';
+    }
+
+    // 迷你走势图：trend 为逗号分隔的 APY（空位表示那段时间没有这个 offer），画成一条折线
+    function sparkline(trend) {
+        if (!trend) return '';
+        var values = trend.split(',').map(function(v) { return v === '' ? null : parseFloat(v); });
+        var nums = values.filter(function(v) { return v !== null; });
+        if (nums.length < 2) return '';
+        var min = Math.min.apply(null, nums), max = Math.max.apply(null, nums);
+        var W = 72, H = 18, step = W / (values.length - 1);
+        var d = '', pen = false;
+        for (var k = 0; k < values.length; k++) {
+            if (values[k] === null) { pen = false; continue; }
+            var y = max === min ? H / 2 : H - 1 - (values[k] - min) / (max - min) * (H - 2);
+            d += (pen ? 'L' : 'M') + (k * step).toFixed(1) + ' ' + y.toFixed(1);
+            pen = true;
+        }
+        return '<svg class="sparkline" width="' + W + '" height="' + H + '" viewBox="0 0 ' + W + ' ' + H
+            + '"><title>近 30 天 APY ' + min + '% ~ ' + max + '%</title><path d="' + d + '"/></svg>';
+    }
+
+    function renderRow(o, i) {
+        var tags = tag('tag-limit', o.limit) + tag('tag-lock', o.lock) + tag('tag-pay', o.pay);
+        var coin = esc(o.coin) + (o.badge ? '<span class="badge">' + esc(o.badge) + '</span>' : '')
+            + '<div class="sub-text">' + esc(o.platform) + '</div>';
+        if (tags) coin += '<div class="mobile-tags">' + tags + '</div>';
+        var apy = '<span class="highlight">' + esc(o.apy) + '</span>' + sparkline(o.trend);
+        if (o.end !== null && o.end !== undefined) {
+            apy += '<div class="remaining-time" data-end="' + o.end + '"></div>'
+                + '<div class="progress-bar"><div class="progress-fill" data-start="' + o.start
+                + '" data-end="' + o.end + '" style="width: 0%"></div></div>';
+        }
+        return '<tr class="offer"><td class="coin-cell">' + coin + '</td>'
+            + '<td>' + apy + '</td>'
+            + '<td class="pc-only">' + (o.end_text === null ? '-' : esc(o.end_text)) + '</td>'
+            + '<td class="pc-only">' + (tags || '-') + '</td>'
+            + '<td class="action-cell"><span class="calc-btn" data-i="' + i + '" title="计算收益">🧮</span> '
+            + '<a href="' + esc(o.link) + '" target="_blank" class="go-btn">前往理财</a></td></tr>';
+    }
+
+    function spacer(height) {
+        return '<tr class="spacer"><td colspan="5" style="height:' + Math.round(height) + 'px"></td></tr>';
+    }
+
+    // 用实际渲染出的行校正估计行高；返回是否有明显变化
+    function measure() {
+        var trs = rowsEl.querySelectorAll('tr.offer');
+        if (!trs.length) return false;
+        var lastTr = trs[trs.length - 1];
+        var h = (lastTr.offsetTop + lastTr.offsetHeight - trs[0].offsetTop) / trs.length;
+        if (h > 0 && Math.abs(h - rowHeight) > 1) {
+            rowHeight = h;
+            return true;
+        }
+        return false;
+    }
+
+    function draw(force) {
+        var top = wrapEl.scrollTop;
+        var viewHeight = wrapEl.clientHeight;
+        var start = Math.max(0, Math.floor(top / rowHeight) - OVERSCAN);
+        var end = Math.ceil((top + viewHeight) / rowHeight) + OVERSCAN;
+        if (end >= loaded && loaded < view.length) {
+            loaded = Math.min(view.length, loaded + PAGE_SIZE);
+        }
+        end = Math.min(loaded, end);
+        start = Math.min(start, end);
+        if (!force && start === first && end === last) return;
+        first = start;
+        last = end;
+
+        var html = [spacer(start * rowHeight)];
+        for (var i = start; i < end; i++) html.push(renderRow(offers[view[i]], view[i]));
+        html.push(spacer((loaded - end) * rowHeight));
+        rowsEl.innerHTML = html.join('');
+        countdown.scan();
+    }
+
+    function schedule() {
+        if (scheduled || !active) return;
+        scheduled = true;
+        window.requestAnimationFrame(function() {
+            scheduled = false;
+            draw(false);
+        });
+    }
+
+    wrapEl.addEventListener('scroll', schedule, { passive: true });
+    window.addEventListener('resize', schedule);
+
+    // 计算器按钮：事件委托，按行号取 offer（不在 HTML 里拼接 onclick 参数）
+    rowsEl.addEventListener('click', function(e) {
+        var btn = e.target.closest ? e.target.closest('.calc-btn[data-i]') : null;
+        if (!active || !btn) return;
+        var o = offers[parseInt(btn.getAttribute('data-i'), 10)];
+        if (o) openCalcModal(o.coin || '', o.platform || '', o.apy || '');
+    });
+
+    function show(ids, resetScroll) {
+        view = ids;
+        active = true;
+        if (resetScroll) {
+            wrapEl.scrollTop = 0;
+            loaded = 0;
+        }
+        loaded = Math.min(view.length, Math.max(loaded, PAGE_SIZE));
+        draw(true);
+        if (measure()) draw(true);
+    }
+
+    return {
+        // 新数据：offers 为全部 offer，ids 为要展示的行号
+        set: function(all, ids) {
+            offers = all;
+            show(ids, false);
+        },
+        // 同一份数据换一种排序 / 筛选：回到顶部重新渲染可视区域
+        setView: function(ids) {
+            show(ids, true);
+        },
+        clear: function() {
+            active = false;
+            offers = [];
+            view = [];
+            loaded = 0;
+            first = last = -1;
+        }
+    };
+})();
+
+// 排序 / 筛选 / 搜索工具栏（JSON 模式）：操作只在 iframe 内查询索引、更新可视区域
+var toolbar = (function() {
+    var barEl = document.getElementById('alphaToolbar');
+    var controls = {
+        text: document.getElementById('alphaSearch'),
+        sort: document.getElementById('alphaSort'),
+        coin: document.getElementById('alphaCoin'),
+        platform: document.getElementById('alphaPlatform'),
+        lock: document.getElementById('alphaLock'),
+        top: document.getElementById('alphaTop')
+    };
+    var offers = [];
+    var idx = null;
+
+    function state() {
+        return {
+            text: controls.text.value,
+            sort: controls.sort.value,
+            coin: controls.coin.value,
+            platform: controls.platform.value,
+            lock: controls.lock.value,
+            top: parseInt(controls.top.value, 10) || 0
+        };
+    }
+
+    // 用索引里的取值重建下拉选项，尽量保留当前选择
+    function fillOptions(select, map, label) {
+        var current = select.value;
+        var values = Array.from(map.keys()).sort();
+        var html = ['<option value="">' + label + '</option>'];
+        for (var i = 0; i < values.length; i++) {
+            var v = String(values[i]).replace(/[&<>"']/g, function(c) {
+                return { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' }[c];
+            });
+            html.push('<option value="' + v + '">' + v + '</option>');
+        }
+        select.innerHTML = html.join('');
+        select.value = map.has(current) ? current : '';
+    }
+
+    function apply() {
+        if (idx) virtualTable.setView(offerIndex.query(idx, state()));
+    }
+
+    var pending = null;
+    controls.text.addEventListener('input', function() {
+        clearTimeout(pending);
+        pending = setTimeout(apply, 120);
+    });
+    ['sort', 'coin', 'platform', 'lock', 'top'].forEach(function(name) {
+        controls[name].addEventListener('change', apply);
+    });
+
+    return {
+        // 新数据版本：重建索引，按当前的控件状态展示
+        set: function(payload) {
+            var fields = payload.fields;
+            offers = payload.rows.map(function(row) {
+                var o = {};
+                for (var k = 0; k < fields.length; k++) o[fields[k]] = row[k];
+                return o;
+            });
+            idx = offerIndex.build(offers);
+            fillOptions(controls.coin, idx.coin, '全部币种');
+            fillOptions(controls.platform, idx.platform, '全部平台');
+            fillOptions(controls.lock, idx.lock, '锁仓不限');
+            barEl.style.display = '';
+            virtualTable.set(offers, offerIndex.query(idx, state()));
+        },
+        hide: function() {
+            idx = null;
+            offers = [];
+            barEl.style.display = 'none';
+        },
+        height: function() {
+            return barEl.style.display === 'none' ? 0 : (barEl.offsetHeight || 0);
+        }
+    };
+})();
+
+// 与 Streamlit 的通信（自定义组件协议）：
+// iframe 只在首次加载时拉取本目录的静态资源，之后每次重跑只通过 postMessage 收到数据：
+// args.offers（JSON 模式，已序列化的 offer 列表）或 args.rows_html（HTML 模式的表体）
+(function() {
+    var rowsEl = document.getElementById('alphaRows');
+    var wrapEl = document.getElementById('alphaWrap');
+    var lastRows = null;
+    var lastOffers = null;
+    var lastHeight = 0;
+
+    function send(type, data) {
+        var msg = { isStreamlitMessage: true, type: type };
+        for (var k in data) msg[k] = data[k];
+        window.parent.postMessage(msg, '*');
+    }
+
+    // 静态导出的页面（pipeline/export.py）不在 Streamlit 里：按 <body data-offers> 的地址读取一次数据
+    var staticData = document.body.getAttribute('data-offers');
+    if (staticData) {
+        var fit = function() {
+            var top = wrapEl.getBoundingClientRect().top;
+            wrapEl.style.height = Math.max(360, window.innerHeight - top - 16) + 'px';
+        };
+        fetch(staticData)
+            .then(function(resp) { return resp.json(); })
+            .then(function(payload) {
+                toolbar.set(payload);
+                fit();
+            });
+        window.addEventListener('resize', fit);
+        return;
+    }
+
+    window.addEventListener('message', function(event) {
+        var data = event.data;
+        if (!data || data.type !== 'streamlit:render') return;
+        var args = data.args || {};
+
+        // 数据未变化（例如其它控件触发的重跑）时不重建表格 DOM 和索引
+        if (args.offers !== undefined && args.offers !== null) {
+            if (args.offers !== lastOffers) {
+                lastOffers = args.offers;
+                lastRows = null;
+                toolbar.set(JSON.parse(args.offers));
+            }
+        } else if (args.rows_html !== lastRows) {
+            lastRows = args.rows_html;
+            lastOffers = null;
+            toolbar.hide();
+            virtualTable.clear();
+            rowsEl.innerHTML = lastRows || '';
+            countdown.scan();
+        }
+
+        // 表格区域高度固定为 args.height，iframe 高度再加上工具栏
+        var height = args.height || 600;
+        var frameHeight = height + toolbar.height();
+        if (frameHeight !== lastHeight) {
+            lastHeight = frameHeight;
+            wrapEl.style.height = height + 'px';
+            send('streamlit:setFrameHeight', { height: frameHeight });
+        }
+    });
+
+    send('streamlit:componentReady', { apiVersion: 1 });
+})();
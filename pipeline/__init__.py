@@ -0,0 +1,150 @@
+"""看板的数据处理层（不依赖 Streamlit，可单独导入、测量和复用）。
+
+按阶段组织，每个阶段的输入输出都是带类型的不可变对象：
+
+    snapshot = fetch_snapshot(SHEET_URL)          # fetch     -> Snapshot
+    board = normalize(snapshot.df)                # normalize -> Board
+    enriched = enrich(board)                      # enrich    -> EnrichedBoard
+    payload = render_table(enriched, mode="json") # render    -> str
+
+app.py 只负责 Streamlit 页面，按需调用这些阶段。
+"""
+
+from .apy import ApyParseError, ApyValue, parse_apy_text, parse_apy_values
+from .assets import Bundle, build_bundle
+from .breaker import CircuitBreaker, CircuitOpenError
+from .diff import ChangeEvent, DiffEngine, JsonlSink, LogSink, WebhookSink
+from .enrich import EnrichedBoard, enrich
+from .fetch import FetchError, FetchPolicy, SheetParseError, SheetRefresher, Snapshot, fetch_snapshot
+from .history import HistoryStore, open_history
+from .ingest import read_sheet
+from .metrics import Metrics, metrics
+from .normalize import (
+    COL_APY,
+    COL_APY_MAX,
+    COL_APY_MIN,
+    COL_APY_VALUE,
+    COL_COIN,
+    COL_END,
+    COL_LINK,
+    COL_LIMIT,
+    COL_LOCK,
+    COL_PAY,
+    COL_PLATFORM,
+    COL_QUARANTINE_REASON,
+    EXCLUDED_COINS,
+    START_TIME_COL_CANDIDATES,
+    Board,
+    ColumnMap,
+    detect_columns,
+    normalize,
+)
+from .render import (
+    OFFER_FIELDS,
+    TABLE_MODES,
+    RenderCache,
+    build_offers,
+    build_render_frame,
+    render_cache,
+    render_row,
+    render_rows,
+    render_table,
+)
+from .schedule import ExpiryScheduler, parse_quiet_hours
+from .shared import SharedSnapshotCache, open_shared_cache
+from .sources import MultiSheetRefresher, SheetSource, merge_frames, parse_sources
+from .store import SnapshotStore, StoredSnapshot, open_store
+from .timeparse import APP_TZ, Countdown, compute_countdown, now_in_app_tz, parse_time_column
+from .view import BoardView, ViewCache
+from .yields import (
+    Allocation,
+    YieldTerms,
+    allocate,
+    best_returns,
+    offer_returns,
+    parse_limit_text,
+    parse_lock_text,
+    yield_terms,
+)
+
+__all__ = [
+    "APP_TZ",
+    "COL_APY",
+    "COL_APY_MAX",
+    "COL_APY_MIN",
+    "COL_APY_VALUE",
+    "COL_COIN",
+    "COL_END",
+    "COL_LIMIT",
+    "COL_LINK",
+    "COL_LOCK",
+    "COL_PAY",
+    "COL_PLATFORM",
+    "COL_QUARANTINE_REASON",
+    "EXCLUDED_COINS",
+    "OFFER_FIELDS",
+    "START_TIME_COL_CANDIDATES",
+    "TABLE_MODES",
+    "Allocation",
+    "ApyParseError",
+    "ApyValue",
+    "Board",
+    "BoardView",
+    "Bundle",
+    "ChangeEvent",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "ColumnMap",
+    "Countdown",
+    "DiffEngine",
+    "EnrichedBoard",
+    "ExpiryScheduler",
+    "FetchError",
+    "FetchPolicy",
+    "HistoryStore",
+    "JsonlSink",
+    "LogSink",
+    "Metrics",
+    "MultiSheetRefresher",
+    "RenderCache",
+    "SharedSnapshotCache",
+    "SheetParseError",
+    "SheetRefresher",
+    "SheetSource",
+    "Snapshot",
+    "SnapshotStore",
+    "StoredSnapshot",
+    "ViewCache",
+    "WebhookSink",
+    "YieldTerms",
+    "allocate",
+    "best_returns",
+    "build_bundle",
+    "build_offers",
+    "build_render_frame",
+    "compute_countdown",
+    "detect_columns",
+    "enrich",
+    "fetch_snapshot",
+    "merge_frames",
+    "metrics",
+    "normalize",
+    "now_in_app_tz",
+    "offer_returns",
+    "open_history",
+    "open_shared_cache",
+    "open_store",
+    "parse_apy_text",
+    "parse_apy_values",
+    "parse_limit_text",
+    "parse_lock_text",
+    "parse_quiet_hours",
+    "parse_sources",
+    "parse_time_column",
+    "read_sheet",
+    "render_cache",
+    "render_row",
+    "render_rows",
+    "render_table",
+    "yield_terms",
+]
@@ -0,0 +1,359 @@
+"""只读 JSON 接口：不依赖 Streamlit，用 asyncio 直接提供规范化后的 offer 列表。
+
+    python -m pipeline.api --port 8780 --snapshot-db .snapshots/sheets.sqlite3
+    curl 'http://127.0.0.1:8780/offers?coin=USDT&min_apy=10&sort=apy&limit=20&fields=platform,coin,apy'
+
+数据来自与看板相同的后台刷新器（MultiSheetRefresher，可带本地快照存储）：每份内容变化的
+新数据在刷新线程里 normalize 一次，预先算好过滤用的数组和完整响应。请求只在内存里完成：
+- /offers：查询参数 fields / coin / platform / lock（逗号分隔，多值为「或」）、min_apy、max_apy、
+  active=1（只要未结束的）、sort=apy|end、limit；
+- 强 ETag 由数据版本和规范化后的查询参数算出，If-None-Match 命中（或为 *）时返回 304；
+- 客户端接受 gzip 时返回压缩后的响应（压缩结果和响应一起按 LRU 缓存），ETag 带 -gz 后缀；
+  304 带的 ETag 和 Vary 与同一个请求会收到的 200 相同；
+- /healthz 返回数据版本和内容最近一次变化的抓取时间，/metrics 返回 Prometheus 文本格式的运行指标。
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from .enrich import enrich
+from .metrics import metrics
+from .normalize import COL_APY_MAX, COL_APY_MIN, Board, normalize
+from .render import LRUCache, build_offers, build_render_frame
+from .shared import open_shared_cache
+from .sources import MultiSheetRefresher, sources_from_env
+from .store import open_store
+
+# 接口输出的字段（offer 对象的键）；fields 参数只能从这里选
+API_FIELDS = ['platform', 'coin', 'apy', 'apy_value', 'apy_min', 'apy_max',
+              'start', 'end', 'end_text', 'limit', 'lock', 'pay', 'link']
+FILTER_PARAMS = ['coin', 'platform', 'lock']
+SORTS = ('', 'apy', 'end')
+
+# 小于这个字节数的响应不压缩
+GZIP_MIN_BYTES = 512
+# 请求头最长字节数、空闲连接超时（秒）
+MAX_HEADER_BYTES = 16384
+IDLE_TIMEOUT = 30.0
+
+_REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+logger = logging.getLogger(__name__)
+
+
+class BadRequest(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """一份数据的内存表示：offer 对象和过滤用的数组（按行对齐）。"""
+
+    version: str
+    fetched_at: float
+    offers: List[dict]
+    apy: np.ndarray
+    end: np.ndarray               # 结束时间毫秒，没有结束时间为 NaN
+    text: Dict[str, np.ndarray]   # coin / platform / lock 的小写文字
+
+
+@dataclass(frozen=True)
+class Response:
+    status: int
+    body: bytes
+    content_type: str = 'application/json; charset=utf-8'
+    etag: Optional[str] = None
+    gzipped: Optional[bytes] = None       # 缓存里的压缩版本（选定发送的版本后为 None）
+    encoding: Optional[str] = None        # 发送的 Content-Encoding
+    vary: bool = False                    # 是否按 Accept-Encoding 区分版本
+
+
+def build_dataset(board: Board, fetched_at: float) -> Dataset:
+    enriched = enrich(board)
+    columns = board.columns.as_dict()
+    frame = build_render_frame(board.df, columns, enriched.countdown)
+    payload = build_offers(frame)
+    fields = payload['fields']
+    extra = {'apy_min': board.df[COL_APY_MIN].tolist(), 'apy_max': board.df[COL_APY_MAX].tolist()}
+    offers = []
+    for i, row in enumerate(payload['rows']):
+        record = dict(zip(fields, row))
+        record['apy_min'], record['apy_max'] = extra['apy_min'][i], extra['apy_max'][i]
+        offers.append({f: record[f] for f in API_FIELDS})
+
+    digest = hashlib.blake2b(json.dumps(offers, ensure_ascii=False).encode('utf-8'), digest_size=12)
+    return Dataset(
+        version=digest.hexdigest(),
+        fetched_at=fetched_at,
+        offers=offers,
+        apy=frame['apy_value'].to_numpy(dtype=float),
+        end=np.asarray(enriched.countdown.end_ms, dtype=float),
+        text={name: np.array([str(o[name] or '').strip().lower() for o in offers], dtype=object)
+              for name in FILTER_PARAMS},
+    )
+
+
+def _json(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def parse_query(query: str) -> Tuple[Tuple[str, str], ...]:
+    """校验并规范化查询参数（排序后的元组，可作缓存键）；不合法时抛出 BadRequest。"""
+    params = {}
+    for key, value in parse_qsl(query, keep_blank_values=False):
+        params[key] = value.strip()
+    unknown = set(params) - {'fields', 'min_apy', 'max_apy', 'active', 'sort', 'limit', *FILTER_PARAMS}
+    if unknown:
+        raise BadRequest(f'unknown parameter: {", ".join(sorted(unknown))}')
+    if 'fields' in params:
+        fields = [f for f in params['fields'].split(',') if f]
+        bad = [f for f in fields if f not in API_FIELDS]
+        if bad:
+            raise BadRequest(f'unknown field: {", ".join(bad)}')
+        params['fields'] = ','.join(fields)
+    for name in ('min_apy', 'max_apy'):
+        if name in params:
+            try:
+                params[name] = repr(float(params[name]))
+            except ValueError:
+                raise BadRequest(f'{name} must be a number') from None
+    if 'limit' in params and not params['limit'].isdigit():
+        raise BadRequest('limit must be a non-negative integer')
+    if params.get('sort', '') not in SORTS:
+        raise BadRequest(f'sort must be one of: {", ".join(s for s in SORTS if s)}')
+    for name in FILTER_PARAMS:
+        if name in params:
+            params[name] = ','.join(sorted({v.strip().lower() for v in params[name].split(',') if v.strip()}))
+    return tuple(sorted(params.items()))
+
+
+def select(data: Dataset, params: Dict[str, str], now_ms: float) -> dict:
+    """按（已规范化的）查询参数过滤、排序并裁剪字段。"""
+    mask = np.ones(len(data.offers), dtype=bool)
+    for name in FILTER_PARAMS:
+        if params.get(name):
+            mask &= np.isin(data.text[name], params[name].split(','))
+    if 'min_apy' in params:
+        mask &= data.apy >= float(params['min_apy'])
+    if 'max_apy' in params:
+        mask &= data.apy <= float(params['max_apy'])
+    if params.get('active') in ('1', 'true'):
+        mask &= np.isnan(data.end) | (data.end > now_ms)
+
+    ids = np.flatnonzero(mask)
+    if params.get('sort') == 'apy':
+        ids = ids[np.argsort(-data.apy[ids], kind='stable')]
+    elif params.get('sort') == 'end':
+        ids = ids[np.argsort(np.where(np.isnan(data.end[ids]), np.inf, data.end[ids]), kind='stable')]
+    if 'limit' in params:
+        ids = ids[:int(params['limit'])]
+
+    fields = params['fields'].split(',') if params.get('fields') else None
+    offers = [data.offers[i] for i in ids.tolist()]
+    if fields:
+        offers = [{f: o[f] for f in fields} for o in offers]
+    return {'v': data.version, 'fetched_at': data.fetched_at, 'count': len(offers), 'offers': offers}
+
+
+class OfferApi:
+    """请求处理（与网络无关，可以直接调用 handle() 测试）。"""
+
+    def __init__(self, *, cache_size: int = 256):
+        self.cache = LRUCache(cache_size)
+        self._data: Optional[Dataset] = None
+        self._lock = threading.Lock()
+
+    def update(self, board: Board, fetched_at: float) -> None:
+        """换上新数据（在刷新线程里调用）。"""
+        data = build_dataset(board, fetched_at)
+        with self._lock:
+            self._data = data
+
+    @property
+    def data(self) -> Optional[Dataset]:
+        return self._data
+
+    def handle(self, method: str, target: str, headers: Dict[str, str]) -> Response:
+        """处理一个请求；意外的异常记日志并返回 500，不影响连接上的其他请求和其他连接。"""
+        try:
+            return self._handle(method, target, headers)
+        except Exception:
+            logger.exception('%s %s failed', method, target)
+            return Response(500, _json({'error': 'internal error'}))
+
+    def _handle(self, method: str, target: str, headers: Dict[str, str]) -> Response:
+        if method not in ('GET', 'HEAD'):
+            return Response(405, _json({'error': 'method not allowed'}))
+        url = urlsplit(target)
+        if url.path == '/metrics':
+            return Response(200, metrics.to_prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+        data = self._data
+        if url.path == '/healthz':
+            if data is None:
+                return Response(503, _json({'status': 'loading'}))
+            return Response(200, _json({'status': 'ok', 'v': data.version, 'fetched_at': data.fetched_at}))
+        if url.path not in ('/offers', '/offers.json'):
+            return Response(404, _json({'error': 'not found'}))
+        if data is None:
+            return Response(503, _json({'error': 'data not loaded yet'}))
+
+        try:
+            query = parse_query(url.query)
+        except BadRequest as e:
+            return Response(400, _json({'error': str(e)}))
+        # active=1 的结果随时间变化：按分钟分桶进缓存键
+        bucket = int(time.time() // 60) if dict(query).get('active') in ('1', 'true') else 0
+        key = (data.version, query, bucket)
+        response = self.cache.get(key)
+        if response is None:
+            body = _json(select(data, dict(query), time.time() * 1000))
+            tag = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=12).hexdigest()
+            response = Response(200, body, etag=f'"{tag}"',
+                                gzipped=gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None)
+            self.cache.put(key, response)
+        return negotiate(response, headers)
+
+
+def negotiate(response: Response, headers: Dict[str, str]) -> Response:
+    """选出实际发送的版本（正文、ETag、Content-Encoding、Vary），If-None-Match 命中时换成 304。
+
+    304 和同一个请求会收到的 200 带相同的 ETag 和 Vary，缓存用它更新的正是自己存的那个版本。
+    """
+    if response.status != 200 or response.etag is None:
+        return response
+    if response.gzipped is None:
+        variant = response
+    elif _accepts_gzip(headers):
+        variant = replace(response, body=response.gzipped, gzipped=None, etag=response.etag[:-1] + '-gz"',
+                          encoding='gzip', vary=True)
+    else:
+        variant = replace(response, gzipped=None, vary=True)
+    if _none_match(headers.get('if-none-match', ''), variant.etag):
+        return replace(variant, status=304, body=b'', encoding=None)
+    return variant
+
+
+def _none_match(value: str, etag: str) -> bool:
+    """If-None-Match 是否命中 etag（弱比较；* 匹配任何已有的版本）。"""
+    tags = [v.strip() for v in value.split(',') if v.strip()]
+    return '*' in tags or etag in (t.removeprefix('W/') for t in tags)
+
+
+def _accepts_gzip(headers: Dict[str, str]) -> bool:
+    return 'gzip' in headers.get('accept-encoding', '')
+
+
+def _encode(response: Response, head_only: bool, keep_alive: bool) -> bytes:
+    lines = [f'HTTP/1.1 {response.status} {_REASONS.get(response.status, "")}']
+    if response.vary:
+        lines.append('Vary: Accept-Encoding')
+    if response.encoding:
+        lines.append(f'Content-Encoding: {response.encoding}')
+    if response.etag:
+        lines.append(f'ETag: {response.etag}')
+        lines.append('Cache-Control: no-cache')
+    if response.status != 304:
+        lines.append(f'Content-Type: {response.content_type}')
+    lines.append(f'Content-Length: {0 if response.status == 304 else len(response.body)}')
+    lines.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+    head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+    return head if head_only or response.status == 304 else head + response.body
+
+
+async def _serve_connection(api: OfferApi, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            try:
+                raw = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IDLE_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                return
+            lines = raw.decode('latin-1').split('\r\n')
+            try:
+                method, target, version = lines[0].split(' ', 2)
+            except ValueError:
+                writer.write(_encode(Response(400, _json({'error': 'bad request line'})), False, False))
+                return
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(':')
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+
+            started = time.perf_counter()
+            response = api.handle(method, target, headers)
+            writer.write(_encode(response, method == 'HEAD', keep_alive))
+            metrics.observe('api_request', time.perf_counter() - started)
+            metrics.inc('api_requests_total', status=response.status)
+            await writer.drain()
+            if not keep_alive:
+                return
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(api: OfferApi, host: str = '127.0.0.1', port: int = 8780) -> asyncio.AbstractServer:
+    """启动监听（返回 asyncio 的 server，调用方负责 serve_forever / close）。"""
+    return await asyncio.start_server(
+        lambda r, w: _serve_connection(api, r, w), host, port, limit=MAX_HEADER_BYTES
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='offer 列表的只读 JSON 接口')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8780)
+    parser.add_argument('--source', action='append', default=[],
+                        help='数据源（表格id:gid 或 CSV 地址，可重复）；默认读环境变量 SHEET_SOURCES / SHEET_URL')
+    parser.add_argument('--snapshot-db', help='本地快照存储：启动时先用其中最近一次的数据')
+    parser.add_argument('--interval', type=float, default=60.0, help='后台刷新周期（秒）')
+    parser.add_argument('--shared-cache-dir', default=os.environ.get('SHARED_CACHE_DIR', ''),
+                        help='多副本共享快照缓存目录（同看板的 SHARED_CACHE_DIR）；默认读同名环境变量')
+    args = parser.parse_args(argv)
+
+    sources = sources_from_env(args.source)
+    if not sources:
+        parser.error('没有数据源：请用 --source 或环境变量 SHEET_SOURCES / SHEET_URL 指定')
+
+    api = OfferApi()
+    store = open_store(args.snapshot_db) if args.snapshot_db else None
+    refresher = MultiSheetRefresher(sources, interval=args.interval, store=store,
+                                    on_change=lambda df, at, upstream: api.update(normalize(df), at),
+                                    shared=open_shared_cache(args.shared_cache_dir, ttl=args.interval))
+    refresher.start()
+
+    async def run():
+        server = await serve(api, args.host, args.port)
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f'listening at http://{host}:{port}/offers', flush=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        refresher.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""APY 文本解析：区间、阶梯、「最高」写法，以及无法识别的单元格。
+
+每个单元格解析出三个数：最低、最高和展示用的主值（用于排序、最高收益卡片和历史）：
+- 「12%」「12」         -> 12 / 12 / 12
+- 「5%-10%」「5~10%」   -> 5 / 10 / 10（区间取上限作为主值）
+- 「最高20%」           -> 20 / 20 / 20
+- 「阶梯 8%/5%」        -> 5 / 8 / 8（阶梯取第一档作为主值）
+空白、没有百分数的文字（如「待定」）解析失败，由 normalize 放进隔离列表，不影响其余行。
+
+同一段文字在各行、各次刷新之间大量重复，所以按不同的原始文字逐个解析并缓存，
+整列只做一次 factorize 和数组取值。
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .metrics import metrics
+
+# 视为「空白」的写法
+APY_EMPTY_VALUES = ['', '-', '无', '暂无', '待定']
+# 表示「最高 / 至多」的写法：主值取最大的百分数
+UP_TO_MARKERS = ['最高', '至高', '高达', 'up to', 'max']
+
+_NUMBER = r'(\d+(?:\.\d+)?)'
+_RANGE = re.compile(_NUMBER + r'\s*%?\s*(?:-|~|–|—|至|到)\s*' + _NUMBER + r'\s*%')
+_PERCENT = re.compile(_NUMBER + r'\s*%')
+_BARE = re.compile(r'^' + _NUMBER + r'$')
+
+
+class ApyParseError(ValueError):
+    """单元格无法识别为 APY（消息即隔离原因）。"""
+
+
+@dataclass(frozen=True)
+class ApyValue:
+    min: float
+    max: float
+    headline: float
+
+
+@lru_cache(maxsize=8192)
+def parse_apy_text(text: str) -> ApyValue:
+    """解析一个单元格的文字；无法识别时抛出 ApyParseError。"""
+    s = unicodedata.normalize('NFKC', text).strip()     # 全角 ％ ～ 和全角数字
+    if s in APY_EMPTY_VALUES:
+        raise ApyParseError('空白')
+
+    bare = _BARE.match(s)
+    if bare:
+        value = float(bare.group(1))
+        return ApyValue(value, value, value)
+
+    numbers = [float(v) for v in _PERCENT.findall(s)]
+    span = _RANGE.search(s)
+    if span:
+        low, high = sorted(float(v) for v in span.groups())
+        numbers += [low, high]
+        headline = high
+    elif numbers:
+        lowered = s.lower()
+        headline = max(numbers) if any(m in lowered for m in UP_TO_MARKERS) else numbers[0]
+    else:
+        raise ApyParseError('无法识别')
+    return ApyValue(min(numbers), max(numbers), headline)
+
+
+def parse_apy_values(values: pd.Series) -> pd.DataFrame:
+    """整列解析：返回与 values 同索引的 min / max / headline（失败为 NaN）和 error（失败原因，成功为 None）。"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    n = len(uniques)
+    # 最后一格留给缺失值（codes 为 -1）
+    parsed = np.full((n + 1, 3), np.nan)
+    errors = np.full(n + 1, '空白', dtype=object)
+    for i, raw in enumerate(uniques):
+        try:
+            v = parse_apy_text(str(raw))
+            parsed[i] = (v.min, v.max, v.headline)
+            errors[i] = None
+        except ApyParseError as e:
+            errors[i] = str(e)
+    rows = parsed[codes]
+    return pd.DataFrame(
+        {'min': rows[:, 0], 'max': rows[:, 1], 'headline': rows[:, 2], 'error': errors[codes]},
+        index=values.index,
+    )
+
+
+metrics.register('cache_hits_total', lambda: parse_apy_text.cache_info().hits, kind='counter', cache='apy')
+metrics.register('cache_misses_total', lambda: parse_apy_text.cache_info().misses, kind='counter', cache='apy')
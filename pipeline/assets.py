@@ -0,0 +1,73 @@
+"""表格前端静态资源（CSS / JS / 弹窗页面）的打包。
+
+源文件在 frontend/alpha_table/ 下。打包时按内容哈希重命名 CSS/JS
+（如 alpha-table.3f9c2a1b.css），并写出引用这些文件名的 index.html，
+浏览器可以长期缓存资源文件，内容一改文件名就变，不会用到旧版本。
+"""
+
+import hashlib
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+FRONTEND_DIR = Path(__file__).resolve().parent.parent / 'frontend' / 'alpha_table'
+
+# index.html 中 {{文件名}} 形式的占位符会替换成带哈希的文件名
+ASSET_FILES = ['alpha-table.css', 'alpha-table.js']
+_PLACEHOLDER = re.compile(r'\{\{([\w.\-]+)\}\}')
+
+
+@dataclass(frozen=True)
+class Bundle:
+    """一次打包的结果。"""
+
+    path: Path                               # 可直接交给 declare_component 的目录
+    version: str                             # 所有资源内容的联合哈希
+    files: Dict[str, str] = field(default_factory=dict)   # 源文件名 -> 带哈希的文件名
+
+    def size(self) -> int:
+        """打包后所有文件的字节数（首次加载需要下载的量）。"""
+        return sum(p.stat().st_size for p in self.path.iterdir() if p.is_file())
+
+
+def content_digest(data: bytes) -> str:
+    """文件名里用的 8 位内容哈希。"""
+    return hashlib.blake2b(data, digest_size=4).hexdigest()
+
+
+def hashed_name(name: str, digest: str) -> str:
+    """alpha-table.css -> alpha-table.<digest>.css"""
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{digest}{ext}'
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """写出带哈希的文件：已存在就不重写（内容由文件名决定）。"""
+    # 多个进程可能同时打包：先写临时文件再改名，避免读到写了一半的文件
+    if path.exists():
+        return
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def render_index(template: str, files: Dict[str, str]) -> str:
+    return _PLACEHOLDER.sub(lambda m: files.get(m.group(1), m.group(0)), template)
+
+
+def build_bundle(src: Path = FRONTEND_DIR, out: Optional[Path] = None) -> Bundle:
+    """把 src 下的前端资源打包到 out（默认 src/build/<version>/），已存在的文件不会重写。"""
+    sources = {name: (src / name).read_bytes() for name in ASSET_FILES}
+    template = (src / 'index.html').read_text(encoding='utf-8')
+
+    files = {name: hashed_name(name, content_digest(data)) for name, data in sources.items()}
+    version = content_digest(template.encode() + ''.join(sorted(files.values())).encode())
+    out = out or (src / 'build' / version)
+    out.mkdir(parents=True, exist_ok=True)
+
+    for name, data in sources.items():
+        write_atomic(out / files[name], data)
+    write_atomic(out / 'index.html', render_index(template, files).encode('utf-8'))
+    return Bundle(path=out, version=version, files=files)
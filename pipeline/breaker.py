@@ -0,0 +1,108 @@
+"""熔断器：上游连续失败时暂停访问，一段时间后放行一次试探请求。
+
+状态：
+- closed：正常放行，连续失败 failure_threshold 次后转为 open；
+- open：直接拒绝（抛 CircuitOpenError，不发网络请求），reset_timeout 秒后转为 half_open；
+- half_open：只放行一个试探请求，成功回到 closed，失败回到 open，且等待时间翻倍（不超过 max_reset_timeout）。
+
+拒绝期间刷新器继续提供最近一次成功的快照（页面标注数据时间），不会每个刷新周期都卡在超时上。
+exclude 里的异常说明上游正常应答了（例如下载成功但内容无法解析），照常抛出，但按成功计，不会触发熔断。
+"""
+
+import threading
+import time
+from typing import Callable, Optional, Tuple, Type, TypeVar
+
+from .metrics import metrics
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断中，请求未发出。"""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"上游连续失败，熔断中（{retry_in:.0f} 秒后重试）")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """线程安全的熔断器；call(fn) 按当前状态放行或拒绝，并根据 fn 是否抛错更新状态。"""
+
+    def __init__(self, *, failure_threshold: int = 3, reset_timeout: float = 60.0,
+                 max_reset_timeout: float = 900.0,
+                 exclude: Tuple[Type[BaseException], ...] = (),
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.exclude = exclude          # 不计为失败的异常类型
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._cooldown = reset_timeout
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self._cooldown:
+                return HALF_OPEN
+            return self._state
+
+    def retry_in(self) -> Optional[float]:
+        """open 状态下距下一次试探还有多少秒；其他状态为 None。"""
+        with self._lock:
+            if self._state != OPEN:
+                return None
+            return max(0.0, self._opened_at + self._cooldown - self._clock())
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        metrics.inc("circuit_transitions_total", state=state)
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._state == OPEN:
+                wait = self._opened_at + self._cooldown - self._clock()
+                if wait > 0:
+                    metrics.inc("circuit_rejected_total")
+                    raise CircuitOpenError(wait)
+                self._transition(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._probing:               # 已有试探请求在进行
+                    metrics.inc("circuit_rejected_total")
+                    raise CircuitOpenError(0.0)
+                self._probing = True
+
+    def _record(self, ok: bool) -> None:
+        with self._lock:
+            probe, self._probing = self._probing, False
+            if ok:
+                self._failures = 0
+                self._cooldown = self.reset_timeout
+                if self._state != CLOSED:
+                    self._transition(CLOSED)
+                return
+            self._failures += 1
+            if probe:
+                self._cooldown = min(self.max_reset_timeout, self._cooldown * 2)
+            if probe or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                self._transition(OPEN)
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        self._acquire()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._record(isinstance(e, self.exclude))
+            raise
+        self._record(True)
+        return result
@@ -0,0 +1,205 @@
+"""快照对比：找出新增 / 下架的 offer 以及 APY、限额等字段的变化，发给各个事件出口。
+
+每行以 (平台, 币种, 理财链接) 为键（同一个键出现多次时按出现顺序区分），
+并对键和要跟踪的字段各算一个 64 位行哈希：
+- 整表行哈希与上一份完全相同时直接返回，不做逐格比较；
+- 否则只对行哈希不同的键逐个字段比较，生成事件。
+第一份数据只作为基准，不产生事件。
+
+事件出口（sink）是带 emit(events) 方法的对象：LogSink 写日志，JsonlSink 追加到
+JSON Lines 文件，WebhookSink 以 JSON POST 到一个地址。出口出错只记录在 sink_errors。
+最近的「新」「APY↑」事件还用来在表格里显示徽标。
+"""
+
+import json
+import logging
+import threading
+import time
+import urllib.request
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .normalize import COL_APY_VALUE, Board
+
+logger = logging.getLogger(__name__)
+
+# 参与比较的逻辑字段（ColumnMap 的字段名）；apy / limit 有专门的事件类型
+TRACKED_FIELDS = ['apy', 'limit', 'end', 'start', 'lock', 'pay']
+FIELD_EVENTS = {'apy': 'apy_changed', 'limit': 'limit_changed'}
+
+# 表格徽标
+BADGE_NEW = '新'
+BADGE_APY_UP = 'APY↑'
+BADGE_TTL = 24 * 3600       # 事件发生后徽标保留的秒数
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """一条变化：kind 为 added / removed / apy_changed / limit_changed / changed。"""
+
+    kind: str
+    platform: str
+    coin: str
+    link: str
+    at: float
+    field: Optional[str] = None
+    old: Optional[str] = None
+    new: Optional[str] = None
+    delta: Optional[float] = None     # apy_changed：新 APY 数值 - 旧 APY 数值
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _text(values: pd.Series) -> pd.Series:
+    return values.astype('string').str.strip().fillna('')
+
+
+def _frame(board: Board) -> pd.DataFrame:
+    """取出键、跟踪字段和 APY 数值（统一成去掉首尾空白的字符串，缺失列为空）。"""
+    df, columns = board.df, board.columns.as_dict()
+    data = {}
+    for field in ['platform', 'coin', 'link'] + TRACKED_FIELDS:
+        col = columns.get(field)
+        data[field] = _text(df[col]) if col and col in df.columns else pd.Series('', index=df.index, dtype='string')
+    frame = pd.DataFrame(data)
+    frame['apy_value'] = df[COL_APY_VALUE].to_numpy(dtype=float) if COL_APY_VALUE in df.columns else np.nan
+    return frame.reset_index(drop=True)
+
+
+def _keys(frame: pd.DataFrame) -> np.ndarray:
+    """(平台, 币种, 理财链接, 第几次出现) 的 64 位哈希。"""
+    keys = frame[['platform', 'coin', 'link']].copy()
+    keys['n'] = keys.groupby(['platform', 'coin', 'link'], sort=False).cumcount()
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def _row_hashes(frame: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(frame[['platform', 'coin', 'link'] + TRACKED_FIELDS], index=False).to_numpy()
+
+
+class LogSink:
+    """把事件写到日志（logging，logger 名为 pipeline.diff）。"""
+
+    def emit(self, events: Sequence[ChangeEvent]) -> None:
+        for e in events:
+            logger.info("%s %s/%s %s %s -> %s", e.kind, e.platform, e.coin, e.field or '', e.old, e.new)
+
+
+class JsonlSink:
+    """把事件逐行追加到 JSON Lines 文件。"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def emit(self, events: Sequence[ChangeEvent]) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for e in events:
+                f.write(json.dumps(e.as_dict(), ensure_ascii=False) + '\n')
+
+
+class WebhookSink:
+    """把一批事件以 {"events": [...]} 的 JSON POST 到 url。"""
+
+    def __init__(self, url: str, *, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def emit(self, events: Sequence[ChangeEvent]) -> None:
+        body = json.dumps({'events': [e.as_dict() for e in events]}, ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(
+            self.url, data=body, method='POST', headers={'Content-Type': 'application/json; charset=utf-8'}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+            resp.read()
+
+
+class DiffEngine:
+    """逐份对比快照，产生变化事件并发给 sinks（线程安全）。"""
+
+    def __init__(self, sinks: Sequence = (), *, badge_ttl: float = BADGE_TTL):
+        self.sinks = list(sinks)
+        self.badge_ttl = badge_ttl
+        self.sink_errors: Dict[str, BaseException] = {}
+        self.version = 0                # 每观察到一份新内容 +1，用于缓存看板视图
+        self._lock = threading.Lock()
+        self._frame: Optional[pd.DataFrame] = None
+        self._keys: Optional[np.ndarray] = None
+        self._hashes: Optional[np.ndarray] = None
+        self._badges: Dict[int, tuple] = {}     # 键 -> (徽标, 时间)
+
+    def observe(self, board: Board, at: Optional[float] = None, *, emit: bool = True) -> List[ChangeEvent]:
+        """与上一份对比，返回（并发出）变化事件。
+
+        emit=False 时只更新基准和徽标、不发给 sinks（同一批事件已由其他进程发出）。
+        """
+        at = time.time() if at is None else at
+        frame = _frame(board)
+        hashes = _row_hashes(frame)
+        with self._lock:
+            if self._hashes is not None and np.array_equal(hashes, self._hashes):
+                return []
+            keys = _keys(frame)
+            events = [] if self._frame is None else self._compare(frame, keys, hashes, at)
+            self._frame, self._keys, self._hashes = frame, keys, hashes
+            self.version += 1
+        if events and emit:
+            self._emit(events)
+        return events
+
+    def _compare(self, frame, keys, hashes, at) -> List[ChangeEvent]:
+        old_frame, old_keys, old_hashes = self._frame, self._keys, self._hashes
+        old_pos = {k: i for i, k in enumerate(old_keys.tolist())}
+        new_pos = {k: i for i, k in enumerate(keys.tolist())}
+        events = []
+
+        def event(kind, row, **kw):
+            return ChangeEvent(kind, row['platform'], row['coin'], row['link'], at, **kw)
+
+        for k, i in new_pos.items():
+            j = old_pos.get(k)
+            if j is None:
+                events.append(event('added', frame.iloc[i], new=frame.at[i, 'apy']))
+                self._badges[k] = (BADGE_NEW, at)
+            elif hashes[i] != old_hashes[j]:
+                new, old = frame.iloc[i], old_frame.iloc[j]
+                for field in TRACKED_FIELDS:
+                    if new[field] == old[field]:
+                        continue
+                    delta = None
+                    if field == 'apy':
+                        delta = float(new['apy_value'] - old['apy_value'])
+                        delta = None if np.isnan(delta) else round(delta, 6)
+                        if delta is not None and delta > 0:
+                            self._badges[k] = (BADGE_APY_UP, at)
+                        elif self._badges.get(k, ('',))[0] == BADGE_APY_UP:
+                            del self._badges[k]
+                    events.append(event(FIELD_EVENTS.get(field, 'changed'), new, field=field,
+                                        old=old[field], new=new[field], delta=delta))
+        for k, j in old_pos.items():
+            if k not in new_pos:
+                events.append(event('removed', old_frame.iloc[j], old=old_frame.at[j, 'apy']))
+        return events
+
+    def _emit(self, events: List[ChangeEvent]) -> None:
+        for sink in self.sinks:
+            try:
+                sink.emit(events)
+                self.sink_errors.pop(type(sink).__name__, None)
+            except Exception as e:
+                self.sink_errors[type(sink).__name__] = e
+
+    def badge_column(self, board: Board, now: float) -> pd.Series:
+        """按 board 的行对齐的徽标（「新」/「APY↑」，badge_ttl 内的事件才显示；没有为空字符串）。"""
+        with self._lock:
+            badges = {k: b for k, (b, at) in self._badges.items() if now - at < self.badge_ttl}
+            self._badges = {k: v for k, v in self._badges.items() if k in badges}
+        if not badges:
+            return pd.Series('', index=board.df.index, dtype=object)
+        keys = _keys(_frame(board)).tolist()
+        return pd.Series([badges.get(k, '') for k in keys], index=board.df.index, dtype=object)
@@ -0,0 +1,53 @@
+"""enrich 阶段：在 normalize 的结果上整列计算时间相关的字段。"""
+
+from dataclasses import dataclass, replace
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .diff import DiffEngine
+from .history import HistoryStore
+from .metrics import metrics
+from .normalize import Board
+from .timeparse import Countdown, compute_countdown, now_in_app_tz
+
+
+@dataclass(frozen=True)
+class EnrichedBoard:
+    board: Board
+    countdown: Countdown
+    now: pd.Timestamp
+    trend: Optional[pd.Series] = None     # 每行最近的 APY 走势（逗号分隔），没有历史存储时为 None
+    badge: Optional[pd.Series] = None     # 每行的「新」/「APY↑」徽标，没有对比引擎时为 None
+
+    def take(self, rows: np.ndarray) -> 'EnrichedBoard':
+        """只保留 rows（行号数组）这些行，已经算好的字段直接切片，不重新计算（例如去掉已结束的 offer）。"""
+        def cut(s: Optional[pd.Series]) -> Optional[pd.Series]:
+            return None if s is None else s.take(rows).reset_index(drop=True)
+
+        board = replace(self.board, df=self.board.df.take(rows).reset_index(drop=True))
+        return replace(self, board=board, countdown=self.countdown.take(rows),
+                       trend=cut(self.trend), badge=cut(self.badge))
+
+
+def enrich(board: Board, now: Optional[pd.Timestamp] = None, *,
+           history: Optional[HistoryStore] = None, changes: Optional[DiffEngine] = None) -> EnrichedBoard:
+    """按同一个 now 计算每个 offer 的开始/结束时间、剩余时间和进度（以及 APY 走势和变化徽标）。"""
+    now = now if now is not None else now_in_app_tz()
+    df, columns = board.df, board.columns
+    with metrics.timed('countdown') as t:
+        countdown = compute_countdown(
+            df[columns.end] if columns.end in df.columns else pd.Series(pd.NA, index=df.index),
+            df[columns.start] if columns.start else None,
+            now=now,
+        )
+        t.rows = len(df)
+    trend = badge = None
+    if history is not None:
+        with metrics.timed('trend'):
+            trend = history.trend_column(board, now.timestamp())
+    if changes is not None:
+        with metrics.timed('badge'):
+            badge = changes.badge_column(board, now.timestamp())
+    return EnrichedBoard(board=board, countdown=countdown, now=now, trend=trend, badge=badge)
@@ -0,0 +1,209 @@
+"""静态导出：离线跑一遍数据管道，写出可以放在任意静态托管 / CDN 上的看板页面。
+
+    python -m pipeline.export --out public
+    python -m pipeline.export --out public --source 表格id:gid --snapshot-db .snapshots/sheets.sqlite3
+
+输出目录里：
+- index.html：完整页面（标题、最高收益、表格、计算器弹窗），引用下面带哈希的文件；
+- alpha-table.<哈希>.css / .js：与 Streamlit 表格组件相同的前端资源；
+- data.<哈希>.json：offer 数据（与组件在 JSON 模式下收到的相同）。
+每个文件旁边还有预压缩的 .gz 和 .br（brotli 在 requirements.txt 里；没装时需加 --no-brotli，只输出 .gz）。带哈希的文件可以永久缓存，
+index.html 应设为不缓存或短缓存。定时（例如 cron 每分钟）重新导出即可更新；
+倒计时和排序 / 筛选都由页面脚本在浏览器里完成，访问者不占用服务器资源。
+"""
+
+import argparse
+import gzip
+import html
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from .assets import ASSET_FILES, FRONTEND_DIR, content_digest, hashed_name, render_index, write_atomic
+from .enrich import EnrichedBoard, enrich
+from .history import open_history
+from .normalize import normalize
+from .render import render_table
+from .sources import MultiSheetRefresher, sources_from_env
+from .store import open_store
+from .timeparse import APP_TZ
+
+try:
+    import brotli
+except ImportError:     # 没有安装时只能加 --no-brotli 导出（只有 .gz）
+    brotli = None
+NO_BROTLI = '没有安装 brotli，无法输出 .br：pip install brotli，或加 --no-brotli 只输出 .gz'
+
+# 只清理导出时生成的带哈希文件
+_HASHED_FILE = re.compile(r'^(alpha-table|data)\.[0-9a-f]{8}\.(css|js|json)(\.gz|\.br)?$')
+# 旧版本文件保留的秒数（正在加载旧 index.html 的访问者仍能取到它引用的文件）
+RETAIN_SECONDS = 3600
+
+PAGE_TITLE = '稳定币理财收益看板'
+PAGE_HEADER = """
+<div class="page-header">
+    <h1>💰 {title}</h1>
+    <div class="page-actions">
+        <a class="daoge-bubble" href="https://x.com/Web3Daoge1" target="_blank" rel="noopener noreferrer">关注刀哥推特</a>
+        <a class="daoge-bubble" href="https://t.me/+3sdC7fJzDCxlZjY1" target="_blank" rel="noopener noreferrer">加入刀哥理财社群</a>
+    </div>
+</div>
+<div class="data-asof">🕒 数据更新于 {as_of}</div>
+{best}
+<style>
+    body {{ max-width: 1200px; margin: 0 auto; padding: 16px; }}
+    .page-header {{ display: flex; flex-wrap: wrap; align-items: center; justify-content: space-between; gap: 10px; }}
+    .page-header h1 {{ font-size: 28px; margin: 8px 0; }}
+    .page-actions {{ display: flex; gap: 10px; }}
+    .daoge-bubble {{
+        text-decoration: none; font-size: 14px; font-weight: 600; padding: 8px 12px; border-radius: 999px;
+        white-space: nowrap; background: #fff7e6; color: #d4a017; border: 1px solid #ffd666;
+    }}
+    .daoge-bubble:hover {{ background: #ffd666; border-color: #d4a017; }}
+    .data-asof {{ font-size: 13px; opacity: 0.75; margin: 4px 0 8px; }}
+    .max-apy-metric {{ padding: 10px 12px; }}
+    .max-apy-label {{ font-size: 14px; opacity: 0.75; margin-bottom: 6px; }}
+    .max-apy-value {{ font-size: 28px; font-weight: 700; line-height: 1.2; }}
+    .gold-bubble {{
+        display: inline-block; padding: 6px 12px; border-radius: 999px;
+        background: rgba(212, 160, 23, 0.15); border: 1px solid rgba(212, 160, 23, 0.45); color: #d4a017;
+    }}
+</style>
+"""
+BEST_CARD = """
+<div class="max-apy-metric">
+    <div class="max-apy-label">🔥 当前最高收益 ({platform})</div>
+    <div class="max-apy-value"><span class="gold-bubble">{apy} {coin}</span></div>
+</div>
+"""
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    path: Path
+    files: List[str]          # 本次写出的文件名（不含压缩副本），index.html 在最后
+    data_bytes: int           # data JSON 的原始字节数
+
+
+def precompress(path: Path, *, br: bool = True) -> None:
+    """在 path 旁写出 .gz（br 为真时还有 .br）；已存在的副本不重写（带哈希的文件内容不会变）。"""
+    if br and brotli is None:
+        raise RuntimeError(NO_BROTLI)
+    data = path.read_bytes()
+    gz = path.with_name(path.name + '.gz')
+    if path.name == 'index.html' or not gz.exists():
+        _write_replace(gz, gzip.compress(data, compresslevel=9, mtime=0))
+    if br:
+        br_path = path.with_name(path.name + '.br')
+        if path.name == 'index.html' or not br_path.exists():
+            _write_replace(br_path, brotli.compress(data, quality=11))
+
+
+def _write_replace(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def render_page(enriched: EnrichedBoard, files, data_name: str, as_of: pd.Timestamp) -> str:
+    """用表格组件的 index.html 作为骨架，加上页面标题、数据时间和最高收益卡片。"""
+    template = (FRONTEND_DIR / 'index.html').read_text(encoding='utf-8')
+    page = render_index(template, files)
+
+    best = ''
+    row = enriched.board.best_offer()
+    if row is not None:
+        columns = enriched.board.columns
+        best = BEST_CARD.format(platform=html.escape(str(row[columns.platform])),
+                                apy=html.escape(str(row[columns.apy])), coin=html.escape(str(row[columns.coin])))
+    header = PAGE_HEADER.format(title=PAGE_TITLE, as_of=f'{as_of:%m-%d %H:%M}', best=best)
+    page = page.replace('<head>', f'<head>\n<title>{PAGE_TITLE}</title>', 1)
+    return page.replace('<body>', f'<body data-offers="{data_name}">\n{header}', 1)
+
+
+def export_static(enriched: EnrichedBoard, out: Path, *, as_of: Optional[pd.Timestamp] = None,
+                  br: bool = True) -> ExportResult:
+    """把 enriched 导出成静态页面；index.html 最后原子替换，访问者不会看到引用了缺失文件的页面。
+
+    br 为真时每个文件都预压缩出 .br，没有安装 brotli 则在写任何文件之前报错。
+    """
+    if br and brotli is None:
+        raise RuntimeError(NO_BROTLI)
+    out.mkdir(parents=True, exist_ok=True)
+    as_of = as_of if as_of is not None else enriched.now
+
+    files = {}
+    for name in ASSET_FILES:
+        data = (FRONTEND_DIR / name).read_bytes()
+        files[name] = hashed_name(name, content_digest(data))
+        write_atomic(out / files[name], data)
+
+    payload = render_table(enriched, mode='json').encode('utf-8')
+    data_name = hashed_name('data.json', content_digest(payload))
+    write_atomic(out / data_name, payload)
+
+    written = [files[name] for name in ASSET_FILES] + [data_name]
+    for name in written:
+        precompress(out / name, br=br)
+    index = render_page(enriched, files, data_name, as_of).encode('utf-8')
+    _write_replace(out / 'index.html', index)
+    precompress(out / 'index.html', br=br)
+    written.append('index.html')
+
+    _prune(out, written)
+    return ExportResult(path=out, files=written, data_bytes=len(payload))
+
+
+def _prune(out: Path, keep) -> None:
+    """删除超过 RETAIN_SECONDS 的旧版本带哈希文件。"""
+    keep = {name + suffix for name in keep for suffix in ('', '.gz', '.br')}
+    cutoff = time.time() - RETAIN_SECONDS
+    for p in out.iterdir():
+        if _HASHED_FILE.match(p.name) and p.name not in keep and p.stat().st_mtime < cutoff:
+            p.unlink(missing_ok=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='导出静态看板页面（可放在任意静态托管 / CDN 上）')
+    parser.add_argument('--out', default='public', help='输出目录')
+    parser.add_argument('--source', action='append', default=[],
+                        help='数据源（表格id:gid 或 CSV 地址，可重复）；默认读环境变量 SHEET_SOURCES / SHEET_URL')
+    parser.add_argument('--snapshot-db', help='本地快照存储：抓取失败时用其中最近一次的数据')
+    parser.add_argument('--history-db', help='APY 历史（有则在表格里画迷你走势图）')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--no-brotli', action='store_true', help='不输出 .br（没有安装 brotli 时使用）')
+    args = parser.parse_args(argv)
+    if not args.no_brotli and brotli is None:
+        parser.error(NO_BROTLI)
+
+    sources = sources_from_env(args.source)
+    if not sources:
+        parser.error('没有数据源：请用 --source 或环境变量 SHEET_SOURCES / SHEET_URL 指定')
+
+    store = open_store(args.snapshot_db) if args.snapshot_db else None
+    refresher = MultiSheetRefresher(sources, timeout=args.timeout, store=store)
+    try:
+        df = refresher.load_once()          # 每个数据源只抓一次，失败的用本地快照兜底
+    except Exception as e:
+        print(f'error: 没有可用的数据：{e!r}', file=sys.stderr)
+        return 1
+    for url, error in refresher.last_errors.items():
+        print(f'warning: {url}: {error!r}', file=sys.stderr)
+
+    history = open_history(args.history_db) if args.history_db else None
+    enriched = enrich(normalize(df), history=history)
+    as_of = pd.Timestamp.now(tz=APP_TZ) - pd.Timedelta(seconds=refresher.data_age() or 0)
+    result = export_static(enriched, Path(args.out), as_of=as_of, br=not args.no_brotli)
+    print(f'exported {len(enriched.board)} offers to {result.path} '
+          f'(data {result.data_bytes / 1024:.1f} KiB, brotli {"off" if args.no_brotli else "on"})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,409 @@
+"""fetch 阶段：下载 Google 表格 CSV，以及负责定时抓取的后台刷新器。
+
+抓取由一个后台线程独占：每轮带 If-None-Match / If-Modified-Since 发条件请求，
+返回 304 或字节完全相同的内容时不再解析 CSV。页面读取的永远是最近一次成功的
+快照，刷新在后台进行，脚本运行不会等待 Google 的网络往返。
+
+每次下载有明确的时间上限（FetchPolicy）：连接（含 TLS 握手）不超过 connect_timeout，
+之后整个响应（响应头 + 全部内容）必须在 read_timeout 内收完，对方一直不回或一点一点地发
+都会按时放弃；Content-Length 对不上的截断响应当作失败。连接失败、超时、截断和 5xx / 429
+按指数退避（随机抖动）重试 retries 次。上游连续失败时熔断器（breaker.py）暂停访问，
+期间继续提供最近一次成功的数据，冷却后放行一个试探请求。下载成功但 CSV 无法解析（SheetParseError）
+不算上游故障：不重试、不计入熔断，同样记录在 last_error 并继续提供旧数据。
+
+配置了本地快照存储（store.py）时，每次成功抓取都会写入存储；进程启动时先用
+存储里最新的快照，冷启动只是一次本地文件读取。
+配置了多进程共享缓存（shared.py）时，抓取经由共享缓存：同一台机器上只有一个进程访问上游，
+其余进程直接映射它解析好的数据。
+"""
+
+import hashlib
+import http.client
+import random
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from email.message import Message
+from typing import TYPE_CHECKING, Callable, Optional
+from urllib.parse import urljoin, urlsplit
+
+import pandas as pd
+
+from .breaker import CircuitBreaker
+from .ingest import read_sheet
+from .metrics import metrics
+from .store import SnapshotStore, StoredSnapshot
+
+if TYPE_CHECKING:
+    from .shared import SharedSnapshotCache
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class FetchError(Exception):
+    """下载失败（非 2xx / 304 的响应、截断的内容、重定向过多）。"""
+
+
+class HTTPStatusError(FetchError):
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status}: {url}")
+        self.status = status
+
+
+class TruncatedResponse(FetchError):
+    """收到的内容比 Content-Length 短（连接中途断开）。"""
+
+
+class SheetParseError(ValueError):
+    """下载成功，但内容不是能解析的表格 CSV（上游有应答，不计入熔断）。"""
+
+
+@dataclass(frozen=True)
+class FetchPolicy:
+    """一次抓取的时间上限和重试策略（秒）。"""
+
+    connect_timeout: float = 5.0     # 建立连接（含 TLS 握手）
+    read_timeout: float = 20.0       # 连接建立后收完整个响应
+    retries: int = 2                 # 失败后最多再试几次
+    backoff: float = 0.5             # 第 n 次重试前等待 [0, backoff * 2^n) 秒
+    max_backoff: float = 8.0
+    max_redirects: int = 5
+
+    def backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0.0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+DEFAULT_POLICY = FetchPolicy()
+
+
+@dataclass(frozen=True)
+class HttpResponse:
+    status: int
+    headers: Message
+    body: bytes
+
+
+def _read_body(resp: http.client.HTTPResponse, sock, deadline: float) -> bytes:
+    """在 deadline 前读完响应内容；每次系统调用的超时取剩余时间。"""
+    chunks = []
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("读取响应超时")
+        sock.settimeout(remaining)
+        chunk = resp.read1(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    if resp.length:
+        raise TruncatedResponse(f"响应被截断（还差 {resp.length} 字节）")
+    return b"".join(chunks)
+
+
+def http_get(url: str, headers: Optional[dict] = None, *, policy: FetchPolicy = DEFAULT_POLICY) -> HttpResponse:
+    """GET url，自行跟随重定向；连接和读取分别受 policy 的时间上限约束（超时抛 TimeoutError）。"""
+    for _ in range(policy.max_redirects + 1):
+        parts = urlsplit(url)
+        if parts.scheme == "https":
+            conn = http.client.HTTPSConnection(parts.hostname, parts.port, timeout=policy.connect_timeout)
+        elif parts.scheme == "http":
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=policy.connect_timeout)
+        else:
+            raise ValueError(f"不支持的地址：{url}")
+        try:
+            conn.connect()
+            deadline = time.monotonic() + policy.read_timeout
+            sock = conn.sock                    # 响应要求关闭连接时 getresponse() 后 conn.sock 为 None
+            sock.settimeout(policy.read_timeout)
+            target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            conn.request("GET", target, headers={"Accept-Encoding": "identity", **(headers or {})})
+            resp = conn.getresponse()
+            location = resp.headers.get("Location")
+            if resp.status in REDIRECT_STATUSES and location:
+                url = urljoin(url, location)
+                continue
+            return HttpResponse(resp.status, resp.headers, _read_body(resp, sock, deadline))
+        finally:
+            conn.close()
+    raise FetchError(f"重定向次数过多：{url}")
+
+
+def _retryable(e: Exception) -> bool:
+    if isinstance(e, HTTPStatusError):
+        return e.status in RETRY_STATUSES
+    return isinstance(e, (OSError, http.client.HTTPException, TruncatedResponse))
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """一次成功解析的表格数据（只读，多个会话共享同一份）。"""
+
+    df: pd.DataFrame
+    version: int          # 内容每变化一次 +1
+    body_hash: str        # 原始 CSV 字节的摘要
+    fetched_at: float     # 最近一次确认内容有效的时间（time.time()，含 304）
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    body: bytes = field(default=b"", repr=False)     # 原始 CSV 字节（写入本地存储用）
+    origin: str = "fetch"     # 内容从哪里来："fetch" 本进程下载，"store" 本地存储，"shared" 共享缓存（其他进程下载）
+
+
+def body_digest(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def fetch_snapshot(url: str, *, policy: FetchPolicy = DEFAULT_POLICY,
+                   previous: Optional[Snapshot] = None) -> Snapshot:
+    """fetch 阶段：下载并解析表格。
+
+    传入 previous 时发条件请求；304 或内容字节不变时直接沿用 previous 的 DataFrame
+    （返回的快照 version 不变，只更新校验信息和时间）。
+    可重试的失败按 policy 重试，重试用完后抛出最后一次的错误。
+    """
+    headers = {}
+    if previous is not None:
+        if previous.etag:
+            headers["If-None-Match"] = previous.etag
+        if previous.last_modified:
+            headers["If-Modified-Since"] = previous.last_modified
+
+    for attempt in range(policy.retries + 1):
+        try:
+            with metrics.timed("fetch"):
+                resp = http_get(url, headers, policy=policy)
+            if resp.status == 304 and previous is not None:
+                metrics.inc("fetch_total", result="not_modified")
+                return replace(previous, fetched_at=time.time())
+            if not 200 <= resp.status < 300:
+                raise HTTPStatusError(resp.status, url)
+            break
+        except Exception as e:
+            metrics.inc("fetch_total", result="error")
+            if attempt == policy.retries or not _retryable(e):
+                raise
+            metrics.inc("fetch_retries_total")
+            time.sleep(policy.backoff_delay(attempt))
+    body = resp.body
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    metrics.inc("fetch_bytes_total", len(body))
+
+    digest = body_digest(body)
+    if previous is not None and digest == previous.body_hash:
+        # 内容字节完全一致：沿用已解析的 DataFrame，只更新校验信息
+        metrics.inc("fetch_total", result="unchanged")
+        return replace(previous, fetched_at=time.time(), etag=etag, last_modified=last_modified)
+
+    with metrics.timed("read_csv") as t:
+        try:
+            df = read_sheet(body)
+        except Exception as e:
+            metrics.inc("fetch_total", result="parse_error")
+            raise SheetParseError(f"表格内容无法解析：{e}") from e
+        t.rows = len(df)
+    metrics.inc("fetch_total", result="changed")
+    return Snapshot(
+        df=df,
+        version=(previous.version + 1) if previous is not None else 1,
+        body_hash=digest,
+        fetched_at=time.time(),
+        etag=etag,
+        last_modified=last_modified,
+        body=body,
+    )
+
+
+def snapshot_from_store(stored: StoredSnapshot) -> Snapshot:
+    """把本地存储里的快照解析成 Snapshot（fetched_at 保留原来的抓取时间）。"""
+    return Snapshot(
+        df=read_sheet(stored.body),
+        version=1,
+        body_hash=stored.body_hash,
+        fetched_at=stored.fetched_at,
+        etag=stored.etag,
+        last_modified=stored.last_modified,
+        body=stored.body,
+        origin="store",
+    )
+
+
+class SheetRefresher:
+    """后台定时刷新表格，并以 stale-while-revalidate 方式提供最新快照。
+
+    传入 store 时，启动时先从本地存储恢复最新快照，之后每次抓取成功都写回存储
+    （按 url 区分数据源）。存储读写失败只记录在 store_error，不影响抓取。
+    on_change(snapshot) 在得到内容变化的新快照后调用（从本地存储恢复时也算一次；例如记录历史），
+    第一次抓取失败时也会以 None 调用一次，方便等待多个数据源都有结果；
+    它抛出的异常记录在 callback_error。
+    传入 shared 时，抓取经由多进程共享缓存（见 shared.py）。
+    timeout 是冷启动时 load() 等待第一次抓取的时间；单次下载的时间上限和重试见 policy。
+    每个刷新器有自己的熔断器（breaker），熔断期间的刷新直接以 CircuitOpenError 失败，
+    和其他抓取失败一样记录在 last_error，继续提供旧快照。熔断只统计网络、超时和 HTTP 错误，
+    内容解析失败（SheetParseError）只记录在 last_error。
+    传入 schedule 时，每轮抓取后调用它决定等多久再抓（例如 ExpiryScheduler.next_interval，
+    按 offer 结束时间加快或放慢），不传则固定等 interval 秒。
+    """
+
+    def __init__(self, url: str, *, interval: float = 60.0, timeout: float = 30.0,
+                 store: Optional[SnapshotStore] = None,
+                 on_change: Optional[Callable[[Snapshot], None]] = None,
+                 shared: Optional["SharedSnapshotCache"] = None,
+                 policy: FetchPolicy = DEFAULT_POLICY,
+                 breaker: Optional[CircuitBreaker] = None,
+                 schedule: Optional[Callable[[], float]] = None):
+        self.url = url
+        self.interval = interval
+        self.schedule = schedule
+        self.timeout = timeout
+        self.store = store
+        self.shared = shared
+        self.policy = policy
+        self.breaker = breaker if breaker is not None else CircuitBreaker(exclude=(SheetParseError,))
+        self.on_change = on_change
+        self.last_error: Optional[BaseException] = None
+        self.store_error: Optional[BaseException] = None
+        self.callback_error: Optional[BaseException] = None
+
+        self._snapshot: Optional[Snapshot] = None
+        self._next_wait = interval              # 本轮抓取后计划等待的秒数
+        self._fetch_lock = threading.Lock()     # 同一时刻只允许一个抓取在进行
+        self._start_lock = threading.Lock()
+        self._first_attempt = threading.Event()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- 读取 ----
+
+    def snapshot(self) -> Optional[Snapshot]:
+        """立即返回当前快照（可能为 None），从不触发网络请求。"""
+        return self._snapshot
+
+    def data_age(self) -> Optional[float]:
+        """当前快照距最近一次确认有效（含 304）过了多少秒；没有快照时为 None。"""
+        snap = self._snapshot
+        return None if snap is None else max(0.0, time.time() - snap.fetched_at)
+
+    def attempted(self) -> bool:
+        """已经有快照，或第一次抓取已经结束（无论成败）。"""
+        return self._snapshot is not None or self._first_attempt.is_set()
+
+    def is_stale(self) -> bool:
+        """最近一次抓取失败，或数据超过两个刷新周期没有确认过（例如刚从本地存储恢复）。
+
+        按计划放慢抓取（例如夜间）时，刷新周期按计划的等待时间算。
+        """
+        age = self.data_age()
+        period = max(self.interval, self._next_wait)
+        return age is not None and (self.last_error is not None or age > 2 * period)
+
+    def load(self) -> pd.DataFrame:
+        """返回最新的 DataFrame。
+
+        只有冷启动（没有任何快照，本地存储里也没有）时才会等待后台线程的第一次抓取；
+        第一次抓取失败则抛出该错误，之后的刷新失败只记录，继续提供旧数据。
+        """
+        snap = self.wait(self.timeout)
+        if snap is None:
+            raise self.last_error or TimeoutError("表格首次加载超时")
+        return snap.df
+
+    def wait(self, timeout: float) -> Optional[Snapshot]:
+        """启动刷新器并返回当前快照；还没有快照时最多等待第一次抓取 timeout 秒（不抛错）。"""
+        self.start()                        # 先尝试从本地存储恢复
+        if self._snapshot is None:
+            self._first_attempt.wait(timeout)
+        return self._snapshot
+
+    # ---- 刷新 ----
+
+    def start(self) -> "SheetRefresher":
+        with self._start_lock:
+            if self._thread is None:
+                if self.restore():
+                    self._notify(self._snapshot)
+                self._thread = threading.Thread(
+                    target=self._run, name="sheet-refresher", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    def request_refresh(self) -> None:
+        """唤醒后台线程立即刷新一次（不等待结果）。"""
+        self._wake.set()
+
+    def refresh(self) -> bool:
+        """同步执行一次条件请求，返回数据是否发生变化。"""
+        with self._fetch_lock:
+            prev = self._snapshot
+            if self.shared is not None:
+                self._snapshot = self.shared.refresh(self.url, prev, self._fetch)
+            else:
+                self._snapshot = self._fetch(prev)
+            self._persist(self._snapshot)
+            changed = prev is None or self._snapshot.version != prev.version
+        if changed:
+            self._notify(self._snapshot)
+        return changed
+
+    def _fetch(self, previous: Optional[Snapshot]) -> Snapshot:
+        return self.breaker.call(fetch_snapshot, self.url, policy=self.policy, previous=previous)
+
+    def _notify(self, snap: Optional[Snapshot]) -> None:
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(snap)
+        except Exception as e:
+            self.callback_error = e
+
+    # ---- 本地存储 ----
+
+    def restore(self) -> bool:
+        """用本地存储里最新的快照作为初始数据（后台线程启动前调用）；返回是否恢复成功。"""
+        if self.store is None or self._snapshot is not None:
+            return False
+        try:
+            stored = self.store.latest(self.url)
+            if stored is not None:
+                self._snapshot = snapshot_from_store(stored)
+                return True
+        except Exception as e:  # 存储损坏或 CSV 无法解析：当作没有本地数据
+            self.store_error = e
+        return False
+
+    def _persist(self, snap: Snapshot) -> None:
+        """写回本地存储（内容未变时存储只更新确认时间和校验信息）。
+
+        从共享缓存映射来的快照没有原始字节，由实际抓取的进程负责写存储。
+        """
+        if self.store is None or not snap.body:
+            return
+        try:
+            self.store.save(StoredSnapshot(
+                self.url, snap.body, snap.body_hash, snap.fetched_at, snap.etag, snap.last_modified
+            ))
+        except Exception as e:
+            self.store_error = e
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            first = not self._first_attempt.is_set()
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:  # 网络/解析失败：保留旧快照，下一轮再试
+                self.last_error = e
+                if first and self._snapshot is None:
+                    self._first_attempt.set()
+                    self._notify(None)
+            finally:
+                self._first_attempt.set()
+            self._next_wait = self.schedule() if self.schedule is not None else self.interval
+            self._wake.wait(self._next_wait)
+            self._wake.clear()
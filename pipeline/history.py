@@ -0,0 +1,316 @@
+"""APY 历史：每份不同的快照只追加变化了的 APY，用于走势图。
+
+存储（SQLite，只追加）：
+- history_dict：平台 / 币种字符串字典，序列里只存整数编号；
+- history_series：每个 (平台, 币种) 一条序列，记着最后一次的值；
+- history_tail：最近的变化点 (序列, 时间, APY)，只有 APY 变化（或 offer 消失 / 重新出现）时才写；
+- history_blocks：每条序列的 tail 攒够 BLOCK_SIZE 个点后压成一个块：
+  时间做差分（uint32 秒），APY 存成百分之一的整数（int32，消失记为 GONE），再 zlib 压缩。
+- history_meta：写入版本号，每次写入变化 +1。
+同一个 (平台, 币种) 在表格里出现多行时记最高的 APY。
+
+多个进程（多个看板副本、JSON 接口）可以共用同一个文件：写入在 BEGIN IMMEDIATE 事务里
+先按版本号同步其他进程写过的序列和最后的值再比较，字典和序列的编号由数据库分配；
+查询前同样按版本号同步，其他进程写入后本进程的 version 也会变化。
+
+查询返回阶梯序列（每个点的值一直持续到下一个点），长区间按等宽时间桶降采样，
+每个桶取桶内（含进入桶时的值）的最高 APY，尖峰不会被采样掉。
+"""
+
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .normalize import COL_APY_VALUE, Board
+from .timeparse import APP_TZ
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_dict (
+    id    INTEGER PRIMARY KEY,
+    value TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS history_series (
+    id       INTEGER PRIMARY KEY,
+    platform INTEGER NOT NULL,
+    coin     INTEGER NOT NULL,
+    last_t   INTEGER,
+    last_apy INTEGER,
+    UNIQUE (platform, coin)
+);
+CREATE TABLE IF NOT EXISTS history_tail (
+    series INTEGER NOT NULL,
+    t      INTEGER NOT NULL,
+    apy    INTEGER,
+    PRIMARY KEY (series, t)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS history_blocks (
+    series INTEGER NOT NULL,
+    t0     INTEGER NOT NULL,
+    t1     INTEGER NOT NULL,
+    n      INTEGER NOT NULL,
+    data   BLOB NOT NULL,
+    PRIMARY KEY (series, t0)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS history_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO history_meta (key, value) VALUES ('version', 0);
+"""
+
+BLOCK_SIZE = 64
+GONE = np.iinfo(np.int32).min      # offer 消失（表格里没有这一行）
+
+SeriesKey = Tuple[str, str]
+
+
+def _encode_block(t: np.ndarray, apy: np.ndarray) -> bytes:
+    dt = np.diff(t, prepend=t[0]).astype('<u4')
+    return zlib.compress(dt.tobytes() + apy.astype('<i4').tobytes())
+
+
+def _decode_block(t0: int, n: int, data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    raw = zlib.decompress(data)
+    dt = np.frombuffer(raw, dtype='<u4', count=n)
+    apy = np.frombuffer(raw, dtype='<i4', count=n, offset=4 * n)
+    return t0 + np.cumsum(dt, dtype=np.int64), apy
+
+
+def _to_float(centi: np.ndarray) -> np.ndarray:
+    out = centi.astype(float) / 100
+    out[centi == GONE] = np.nan
+    return out
+
+
+def resample(t: np.ndarray, values: np.ndarray, start: float, end: float, n: int) -> np.ndarray:
+    """把阶梯序列按 [start, end) 等分成 n 个桶，每个桶取最高值（没有数据为 NaN）。"""
+    edges = np.linspace(start, end, n + 1)
+    carry = np.searchsorted(t, edges[:-1], side='right') - 1
+    out = np.where(carry >= 0, values[np.maximum(carry, 0)], np.nan)
+    inside = (t >= start) & (t < end)
+    if inside.any():
+        buckets = np.minimum(np.searchsorted(edges, t[inside], side='right') - 1, n - 1)
+        np.fmax.at(out, buckets, values[inside])
+    return out
+
+
+class HistoryStore:
+    """APY 历史存储（线程安全）；record() 只写变化，查询按时间范围读取。"""
+
+    def __init__(self, path, *, block_size: int = BLOCK_SIZE):
+        self.path = Path(path)
+        self.block_size = block_size
+        self.version = 0                # 看到的数据每变化一次 +1（含其他进程的写入），用于缓存走势
+        self._lock = threading.RLock()
+        self._series: Dict[SeriesKey, int] = {}
+        self._last: Dict[int, int] = {}
+        self._db_version: Optional[int] = None     # 内存里的序列对应的 history_meta 版本号
+        self._trend_cache: Optional[Tuple[tuple, Dict[SeriesKey, str]]] = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            self._sync(conn)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _sync(self, conn) -> None:
+        """库里的版本号变了（本进程以外的写入）时重新读取序列和各序列最后的值。"""
+        (db_version,) = conn.execute("SELECT value FROM history_meta WHERE key = 'version'").fetchone()
+        if db_version == self._db_version:
+            return
+        names = dict(conn.execute("SELECT id, value FROM history_dict"))
+        self._series, self._last = {}, {}
+        for sid, p, c, last_apy in conn.execute("SELECT id, platform, coin, last_apy FROM history_series"):
+            self._series[(names[p], names[c])] = sid
+            self._last[sid] = GONE if last_apy is None else last_apy
+        self._db_version = db_version
+        self.version += 1
+
+    # ---- 写入 ----
+
+    def _intern(self, conn, value: str) -> int:
+        conn.execute("INSERT OR IGNORE INTO history_dict (value) VALUES (?)", (value,))
+        return conn.execute("SELECT id FROM history_dict WHERE value = ?", (value,)).fetchone()[0]
+
+    def _series_id(self, conn, key: SeriesKey) -> int:
+        sid = self._series.get(key)
+        if sid is None:
+            platform, coin = self._intern(conn, key[0]), self._intern(conn, key[1])
+            conn.execute("INSERT OR IGNORE INTO history_series (platform, coin) VALUES (?, ?)", (platform, coin))
+            sid = conn.execute(
+                "SELECT id FROM history_series WHERE platform = ? AND coin = ?", (platform, coin)
+            ).fetchone()[0]
+            self._series[key] = sid
+        return sid
+
+    def record(self, board: Board, at: float) -> int:
+        """记录一份快照，返回写入的变化点数（APY 都没变时不写数据库）。"""
+        df, columns = board.df, board.columns
+        best = (
+            pd.DataFrame({
+                'platform': df[columns.platform].astype('string').str.strip(),
+                'coin': df[columns.coin].astype('string').str.strip(),
+                'apy': (df[COL_APY_VALUE].to_numpy(dtype=float) * 100).round(),
+            })
+            .dropna()
+            .groupby(['platform', 'coin'], sort=False)['apy'].max()
+        )
+        current = {key: int(v) for key, v in best.items()}
+        t = int(at)
+
+        with self._lock:
+            with self._connect() as conn:
+                # 先拿写锁再和库里最后的值比较：其他进程刚记过同一份数据时这里什么都不写
+                conn.execute("BEGIN IMMEDIATE")
+                self._sync(conn)
+                changed = [(k, v) for k, v in current.items()
+                           if self._last.get(self._series.get(k), GONE) != v]
+                gone = [sid for k, sid in self._series.items() if k not in current and self._last.get(sid) != GONE]
+                if not changed and not gone:
+                    return 0
+                self._db_version = None         # 提交成功之前内存状态作废（失败时下次重新读取）
+                points = [(self._series_id(conn, k), v) for k, v in changed] + [(sid, GONE) for sid in gone]
+                conn.executemany(
+                    "INSERT OR REPLACE INTO history_tail (series, t, apy) VALUES (?, ?, ?)",
+                    [(sid, t, v) for sid, v in points],
+                )
+                conn.executemany(
+                    "UPDATE history_series SET last_t = ?, last_apy = ? WHERE id = ?",
+                    [(t, v, sid) for sid, v in points],
+                )
+                for sid, v in points:
+                    self._last[sid] = v
+                # 按表里实际的行数判断（同一时间重复写入是覆盖，不增加点数）
+                sids = [sid for sid, _ in points]
+                full = conn.execute(
+                    f"SELECT series FROM history_tail WHERE series IN ({','.join('?' * len(sids))}) "
+                    f"GROUP BY series HAVING COUNT(*) >= ?",
+                    (*sids, self.block_size),
+                ).fetchall()
+                for (sid,) in full:
+                    self._compact(conn, sid)
+                conn.execute("UPDATE history_meta SET value = value + 1 WHERE key = 'version'")
+                (db_version,) = conn.execute("SELECT value FROM history_meta WHERE key = 'version'").fetchone()
+            self._db_version = db_version
+            self.version += 1
+            return len(points)
+
+    def _compact(self, conn, sid: int) -> None:
+        """把一条序列的 tail 压成一个块。"""
+        rows = conn.execute("SELECT t, apy FROM history_tail WHERE series = ? ORDER BY t", (sid,)).fetchall()
+        t = np.array([r[0] for r in rows], dtype=np.int64)
+        apy = np.array([r[1] for r in rows], dtype=np.int64)
+        conn.execute(
+            "INSERT OR REPLACE INTO history_blocks (series, t0, t1, n, data) VALUES (?, ?, ?, ?, ?)",
+            (sid, int(t[0]), int(t[-1]), len(t), _encode_block(t, apy)),
+        )
+        conn.execute("DELETE FROM history_tail WHERE series = ?", (sid,))
+
+    # ---- 查询 ----
+
+    def _read(self, conn, sids: List[int], start: float, end: float) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """读取若干序列在 [start, end] 的点（另带 start 之前的最后一个点，作为起始值）。"""
+        marks = ','.join('?' * len(sids))
+        parts: Dict[int, list] = {sid: [] for sid in sids}
+        blocks = conn.execute(
+            f"SELECT series, t0, n, data FROM history_blocks WHERE series IN ({marks}) AND t0 <= ? "
+            f"AND (t1 >= ? OR t1 = (SELECT MAX(t1) FROM history_blocks b "
+            f"WHERE b.series = history_blocks.series AND b.t1 < ?)) ORDER BY series, t0",
+            (*sids, end, start, start),
+        )
+        for sid, t0, n, data in blocks:
+            parts[sid].append(_decode_block(t0, n, data))
+        tail = conn.execute(
+            f"SELECT series, t, apy FROM history_tail WHERE series IN ({marks}) AND t <= ? ORDER BY series, t",
+            (*sids, end),
+        ).fetchall()
+        if tail:
+            arr = np.array(tail, dtype=np.int64)
+            for sid in np.unique(arr[:, 0]):
+                rows = arr[arr[:, 0] == sid]
+                parts[int(sid)].append((rows[:, 1], rows[:, 2]))
+
+        out = {}
+        for sid, chunks in parts.items():
+            if not chunks:
+                out[sid] = (np.empty(0, dtype=np.int64), np.empty(0))
+                continue
+            t = np.concatenate([c[0] for c in chunks])
+            v = _to_float(np.concatenate([c[1] for c in chunks]))
+            first = max(0, np.searchsorted(t, start, side='right') - 1)
+            out[sid] = (t[first:], v[first:])
+        return out
+
+    def series(self, platform: str, coin: str, start: float, end: float,
+               max_points: Optional[int] = None) -> pd.Series:
+        """一个 (平台, 币种) 在 [start, end] 的 APY 序列（索引为 APP_TZ 时间，NaN 表示下架）。
+
+        不传 max_points 时返回原始变化点；传入时降采样成 max_points 个等宽时间桶。
+        """
+        with self._lock, self._connect() as conn:
+            self._sync(conn)
+            sid = self._series.get((platform, coin))
+            if sid is None:
+                return pd.Series(dtype=float)
+            t, v = self._read(conn, [sid], start, end)[sid]
+        if max_points:
+            v = resample(t, v, start, end, max_points)
+            t = np.linspace(start, end, max_points + 1)[:-1]
+        return pd.Series(v, index=pd.to_datetime(t, unit='s', utc=True).tz_convert(APP_TZ))
+
+    def keys(self) -> List[SeriesKey]:
+        with self._lock, self._connect() as conn:
+            self._sync(conn)
+            return sorted(self._series)
+
+    def trends(self, now: float, *, days: int = 30, points: int = 30) -> Dict[SeriesKey, str]:
+        """所有序列最近 days 天的走势（降采样成 points 个值，逗号分隔，没有数据的位置留空）。
+
+        结果按（历史版本, 小时）缓存：数据没有新变化时一小时内不重新计算。
+        """
+        with self._lock, self._connect() as conn:
+            self._sync(conn)
+            cache_key = (self.version, int(now // 3600), days, points)
+            if self._trend_cache is not None and self._trend_cache[0] == cache_key:
+                return self._trend_cache[1]
+            items = list(self._series.items())
+            start, end = now - days * 86400, now
+            trends = {}
+            if items:
+                data = self._read(conn, [sid for _, sid in items], start, end)
+                for key, sid in items:
+                    values = resample(*data[sid], start, end, points)
+                    if np.isnan(values).all():
+                        continue
+                    trends[key] = ','.join('' if np.isnan(x) else f'{x:g}' for x in values)
+            self._trend_cache = (cache_key, trends)
+            return trends
+
+    def trend_column(self, board: Board, now: float, **kwargs) -> pd.Series:
+        """按 board 的行对齐的走势字符串（没有历史的行为空字符串）。"""
+        trends = self.trends(now, **kwargs)
+        df, columns = board.df, board.columns
+        keys = zip(df[columns.platform].astype('string').str.strip(), df[columns.coin].astype('string').str.strip())
+        return pd.Series([trends.get(k, '') for k in keys], index=df.index, dtype=object)
+
+
+def open_history(path, **kwargs) -> Optional[HistoryStore]:
+    """打开历史存储；目录不可写等情况返回 None（只是没有走势图）。"""
+    try:
+        return HistoryStore(path, **kwargs)
+    except (OSError, sqlite3.Error):
+        return None
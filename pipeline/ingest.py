@@ -0,0 +1,43 @@
+"""ingest：把表格 CSV 字节解析成 DataFrame（fetch 阶段的解析部分）。
+
+只读取看板用到的列（ColumnMap 里的各列，开始时间列按表头识别），其余列（备注、
+「投入1wu一个月收益」等）直接跳过。平台、币种读成 category（几千行只有几十个取值，
+之后的过滤、分组、去重都按类别算一次）；其余列一律读成字符串，不做类型推断
+——同一列有时全是数字、有时带单位，推断出的类型会随表格内容变化。
+
+解析器默认用 pyarrow（多线程，比 C 解析器快数倍），没有安装 pyarrow 时用 C 解析器；
+两者的结果相同。
+"""
+
+import importlib.util
+import io
+from dataclasses import asdict
+from typing import List, Optional
+
+import pandas as pd
+
+from .normalize import COL_COIN, COL_PLATFORM, ColumnMap, detect_start_column
+
+CSV_ENGINES = ('c', 'pyarrow')
+DEFAULT_ENGINE = 'pyarrow' if importlib.util.find_spec('pyarrow') else 'c'
+
+# 看板用到的列（开始时间列名不固定，按表头另行识别）
+SHEET_COLUMNS = [col for col in asdict(ColumnMap()).values() if col]
+CATEGORY_COLUMNS = (COL_PLATFORM, COL_COIN)
+
+
+def sheet_columns(header) -> List[str]:
+    """表头里看板会用到的列（按表头顺序）。"""
+    start = detect_start_column(header)
+    return [col for col in header if col in SHEET_COLUMNS or col == start]
+
+
+def read_sheet(body: bytes, *, engine: Optional[str] = None) -> pd.DataFrame:
+    """解析表格 CSV：只保留看板用到的列，平台 / 币种为 category，其余为字符串。"""
+    engine = engine or DEFAULT_ENGINE
+    if engine not in CSV_ENGINES:
+        raise ValueError(f'unknown csv engine: {engine!r}')
+    header = pd.read_csv(io.BytesIO(body), nrows=0).columns
+    usecols = sheet_columns(header)
+    dtype = {col: 'category' if col in CATEGORY_COLUMNS else 'str' for col in usecols}
+    return pd.read_csv(io.BytesIO(body), engine=engine, usecols=usecols, dtype=dtype)
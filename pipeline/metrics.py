@@ -0,0 +1,194 @@
+"""运行指标：各阶段耗时（滚动 p50 / p95）、处理行数、数据量、缓存命中和快照年龄。
+
+    with metrics.timed('normalize') as t:
+        board = ...
+        t.rows = len(board)
+
+进程内共享一个 metrics 实例（与 render_cache 一样）。每个阶段保留最近 window 次耗时
+用于计算分位数，另外累计总耗时和次数。to_prometheus() 输出 Prometheus 文本格式，
+export_to() 在后台线程里定期写文件（供 node_exporter 的 textfile collector 之类抓取）。
+"""
+
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+PREFIX = 'stablecoin_dashboard'
+QUANTILES = (0.5, 0.95)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Timer:
+    __slots__ = ('rows',)
+
+    def __init__(self):
+        self.rows: Optional[int] = None
+
+
+def _labels(labels: Labels, **extra) -> str:
+    items = list(labels) + [(k, str(v)) for k, v in extra.items()]
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+
+def _number(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Metrics:
+    """线程安全的指标登记处。"""
+
+    def __init__(self, *, window: int = 512):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._sums: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+        self._last: Dict[str, float] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._callbacks: Dict[Tuple[str, Labels], Tuple[str, Callable[[], Optional[float]]]] = {}
+        self._exporter: Optional[threading.Thread] = None
+
+    # ---- 记录 ----
+
+    def observe(self, stage: str, seconds: float, rows: Optional[int] = None) -> None:
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._sums[stage] = self._sums.get(stage, 0.0) + seconds
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+            self._last[stage] = seconds
+        if rows is not None:
+            self.inc('rows_total', rows, stage=stage)
+
+    @contextmanager
+    def timed(self, stage: str):
+        """计时一个阶段；在 with 块里给 t.rows 赋值可同时记录处理行数。"""
+        timer = _Timer()
+        start = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            self.observe(stage, time.perf_counter() - start, timer.rows)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def register(self, name: str, fn: Callable[[], Optional[float]], *, kind: str = 'gauge', **labels) -> None:
+        """导出时才取值的指标（例如快照年龄、缓存命中数）；fn 返回 None 时不输出。"""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._callbacks[key] = (kind, fn)
+
+    # ---- 读取 ----
+
+    def stages(self) -> List[dict]:
+        """每个阶段的最近一次 / p50 / p95 / 次数（毫秒），供调试面板展示。"""
+        with self._lock:
+            items = [(s, np.array(v), self._last[s], self._counts[s]) for s, v in self._samples.items()]
+        rows = []
+        for stage, samples, last, count in sorted(items):
+            p50, p95 = np.quantile(samples, QUANTILES)
+            rows.append({'stage': stage, 'last_ms': last * 1000, 'p50_ms': float(p50) * 1000,
+                         'p95_ms': float(p95) * 1000, 'count': count})
+        return rows
+
+    def values(self) -> Dict[str, float]:
+        """计数器、仪表和回调指标的当前值（键为带标签的指标名）。"""
+        out = {}
+        for kind, name, labels, value in self._scalars():
+            out[name + _labels(labels)] = value
+        return out
+
+    def _scalars(self):
+        with self._lock:
+            counters = list(self._counters.items())
+            gauges = list(self._gauges.items())
+            callbacks = list(self._callbacks.items())
+        for (name, labels), value in counters:
+            yield 'counter', name, labels, value
+        for (name, labels), value in gauges:
+            yield 'gauge', name, labels, value
+        for (name, labels), (kind, fn) in callbacks:
+            try:
+                value = fn()
+            except Exception:
+                value = None
+            if value is not None:
+                yield kind, name, labels, value
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            stages = [(s, np.array(v), self._sums[s], self._counts[s]) for s, v in self._samples.items()]
+        name = f'{PREFIX}_stage_seconds'
+        if stages:
+            lines.append(f'# HELP {name} Wall time per pipeline stage (rolling quantiles).')
+            lines.append(f'# TYPE {name} summary')
+        for stage, samples, total, count in sorted(stages):
+            for q, v in zip(QUANTILES, np.quantile(samples, QUANTILES)):
+                lines.append(f'{name}{_labels((("stage", stage),), quantile=q)} {v:.6f}')
+            lines.append(f'{name}_sum{_labels((("stage", stage),))} {total:.6f}')
+            lines.append(f'{name}_count{_labels((("stage", stage),))} {count}')
+
+        typed = set()
+        for kind, metric, labels, value in sorted(self._scalars(), key=lambda x: (x[1], x[2])):
+            full = f'{PREFIX}_{metric}'
+            if full not in typed:
+                typed.add(full)
+                lines.append(f'# TYPE {full} {kind}')
+            lines.append(f'{full}{_labels(labels)} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+    # ---- 导出 ----
+
+    def write_prometheus(self, path) -> None:
+        """原子写入 Prometheus 文本文件（先写临时文件再改名，抓取方不会读到半个文件）。"""
+        path = os.fspath(path)
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+    def export_to(self, path, *, interval: float = 15.0) -> 'Metrics':
+        """启动后台线程，每 interval 秒写一次 Prometheus 文本文件（只启动一次）。"""
+        with self._lock:
+            if self._exporter is not None:
+                return self
+
+            def run():
+                while True:
+                    try:
+                        self.write_prometheus(path)
+                    except OSError:
+                        pass
+                    time.sleep(interval)
+
+            self._exporter = threading.Thread(target=run, name='metrics-exporter', daemon=True)
+            self._exporter.start()
+        return self
+
+
+# 进程级共享实例
+metrics = Metrics()
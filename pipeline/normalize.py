@@ -0,0 +1,137 @@
+"""normalize 阶段：识别列、过滤不展示的 offer、计算 APY 数值。
+
+APY 无法识别的行（空白、「待定」等）不展示，放进 Board.quarantine，其余行照常展示。
+"""
+
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .apy import parse_apy_values
+from .metrics import metrics
+
+# 列名常量（从表格获取）
+COL_PLATFORM = '平台'
+COL_COIN = '币种'
+COL_APY = '年化（APY）'
+COL_LINK = '理财链接'
+COL_END = '结束时间'
+COL_LIMIT = '单个账户限额'
+COL_LOCK = '是否锁仓'
+COL_PAY = '派息时间'
+
+# 派生列：APY 数值（主值，用于排序和高亮）以及区间 / 阶梯的最低、最高值
+COL_APY_VALUE = 'APY数值'
+COL_APY_MIN = 'APY最低'
+COL_APY_MAX = 'APY最高'
+# 隔离列表里记录原因的列
+COL_QUARANTINE_REASON = '隔离原因'
+
+# 可能的开始时间列名（表格里列名不一致时兜底）
+START_TIME_COL_CANDIDATES = [
+    '开始时间',
+    '活动开始时间',
+    '起始时间',
+    '开始日期',
+    '活动开始',
+]
+
+# 不展示在看板中的币种（按包含关系匹配）
+EXCLUDED_COINS = ['亮亮币']
+
+
+@dataclass(frozen=True)
+class ColumnMap:
+    """逻辑字段 -> 表格里的真实列名。"""
+
+    platform: str = COL_PLATFORM
+    coin: str = COL_COIN
+    apy: str = COL_APY
+    link: str = COL_LINK
+    end: str = COL_END
+    limit: str = COL_LIMIT
+    lock: str = COL_LOCK
+    pay: str = COL_PAY
+    start: Optional[str] = None     # 表格没有开始时间列时为 None
+
+    def as_dict(self) -> Dict[str, Optional[str]]:
+        return asdict(self)
+
+
+def detect_start_column(columns) -> Optional[str]:
+    """识别开始时间列（若表格没有则为 None）。"""
+    start_col = next((c for c in START_TIME_COL_CANDIDATES if c in columns), None)
+    if start_col is None:
+        # 模糊匹配：列名包含“开始”且包含“时间/日期”
+        for col in columns:
+            col_s = str(col)
+            if ('开始' in col_s) and (('时间' in col_s) or ('日期' in col_s)):
+                start_col = col
+                break
+    return start_col
+
+
+def detect_columns(df: pd.DataFrame) -> ColumnMap:
+    return ColumnMap(start=detect_start_column(df.columns))
+
+
+def parse_apy(values: pd.Series) -> pd.Series:
+    """「12%」-> 12.0，「5%-10%」-> 10.0（主值，见 apy.py）；无法识别的为 NaN。"""
+    return parse_apy_values(values)['headline']
+
+
+@dataclass(frozen=True)
+class Board:
+    """normalize 的输出：要展示的 offer（按表格顺序，索引从 0 开始）和列映射。"""
+
+    df: pd.DataFrame
+    columns: ColumnMap
+    quarantine: pd.DataFrame = field(default_factory=pd.DataFrame)     # APY 无法识别的原始行 + 隔离原因
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def best_offer(self) -> Optional[pd.Series]:
+        """APY 最高的一行（没有数据时为 None）。"""
+        if self.df.empty:
+            return None
+        return self.df.loc[self.df[COL_APY_VALUE].idxmax()]
+
+
+def excluded_rows(coins: pd.Series) -> np.ndarray:
+    """币种包含 EXCLUDED_COINS 任一项的行（按不同取值各判断一次，category 列直接用类别）。"""
+    if isinstance(coins.dtype, pd.CategoricalDtype):
+        codes, uniques = coins.cat.codes.to_numpy(), coins.cat.categories
+    else:
+        codes, uniques = pd.factorize(coins)
+    hit = np.zeros(len(uniques) + 1, dtype=bool)        # 末尾一格对应缺失值（code -1）
+    for coin in EXCLUDED_COINS:
+        hit[:-1] |= np.asarray(uniques.astype(str).str.contains(coin, regex=False), dtype=bool)
+    return hit[codes]
+
+
+def normalize(df: pd.DataFrame) -> Board:
+    with metrics.timed('normalize') as t:
+        columns = detect_columns(df)
+
+        # 先算出「亮亮币」等不展示的行和 APY 解析失败的行，最后只取一次要展示的行
+        excluded = excluded_rows(df[columns.coin])
+        apy = parse_apy_values(df[columns.apy])
+        error = apy['error'].to_numpy()
+        bad = pd.notna(error) & ~excluded
+        keep = ~(excluded | bad)
+
+        # APY 解析失败的行单独隔离，不让一个格子拖垮整个看板
+        quarantine = df[bad].assign(**{COL_QUARANTINE_REASON: error[bad]})
+        if keep.all():
+            filtered_df = df.reset_index(drop=True)     # 不复制数据（写时复制）
+        else:
+            filtered_df = df.take(np.flatnonzero(keep)).reset_index(drop=True)
+        filtered_df[COL_APY_VALUE] = apy['headline'].to_numpy()[keep]
+        filtered_df[COL_APY_MIN] = apy['min'].to_numpy()[keep]
+        filtered_df[COL_APY_MAX] = apy['max'].to_numpy()[keep]
+        t.rows = len(filtered_df)
+    metrics.set('apy_quarantined_rows', len(quarantine))
+    return Board(df=filtered_df, columns=columns, quarantine=quarantine.reset_index(drop=True))
@@ -0,0 +1,279 @@
+"""看板表格行的 HTML 渲染与渲染缓存。
+
+表头、样式、弹窗和脚本是静态资源（见 assets.py），这里只生成表体：
+- HTML 模式：服务端生成所有 <tr>；
+- JSON 模式：只输出紧凑的 offer 数组，由前端按可视区域渲染（虚拟滚动）。
+
+两级缓存，都按内容哈希寻址、按 LRU 淘汰：
+- 整表缓存：键为所有行哈希 + 列映射的摘要，同一份数据的重复渲染直接命中
+  （HTML 和 JSON 两种输出分别缓存）；
+- 行片段缓存：键为单行内容的哈希，只有改动过的 offer 会重新生成 <tr>。
+行片段与当前时间无关（只带 data-start / data-end 毫秒时间戳），
+剩余时间文案和进度条宽度由页面脚本在加载时立即填充并每秒更新。
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from .metrics import metrics
+from .normalize import COL_APY_VALUE
+
+# 行渲染用到的逻辑字段；列映射把它们对应到表格里的真实列名
+RENDER_FIELDS = ['coin', 'platform', 'apy', 'end', 'limit', 'lock', 'pay', 'link']
+
+# 标签 / 结束时间列里视为「没有内容」的写法
+TAG_EMPTY_VALUES = ['无', '-']
+END_EMPTY_VALUES = ['暂无', '无截止', '无']
+
+
+def _has_value(value, empty_values) -> bool:
+    return pd.notna(value) and bool(str(value).strip()) and str(value).strip() not in empty_values
+
+
+def build_render_frame(df: pd.DataFrame, columns: Mapping[str, Optional[str]], countdown,
+                       trend: Optional[pd.Series] = None, badge: Optional[pd.Series] = None) -> pd.DataFrame:
+    """按列映射取出渲染需要的字段（缺失列补空字符串），并附上 APY 数值、走势、徽标和开始/结束毫秒时间戳。"""
+    data = {}
+    for field in RENDER_FIELDS:
+        col = columns.get(field)
+        data[field] = df[col].to_numpy() if col and col in df.columns else np.full(len(df), '', dtype=object)
+    frame = pd.DataFrame(data, index=df.index)
+    frame['apy_value'] = df[COL_APY_VALUE].to_numpy(dtype=float) if COL_APY_VALUE in df.columns else np.nan
+    frame['trend'] = trend.to_numpy() if trend is not None else ''
+    frame['badge'] = badge.to_numpy() if badge is not None else ''
+    frame['start_ms'] = countdown.start_ms
+    frame['end_ms'] = countdown.end_ms
+    return frame
+
+
+def render_row(row) -> str:
+    """渲染单个 offer 的 <tr>（row 为 build_render_frame 的一行）。"""
+    coin, platform, apy, link = row.coin, row.platform, row.apy, row.link
+
+    # 构建限额+锁仓+派息时间的气泡标签
+    tags_html = ""
+    if _has_value(row.limit, TAG_EMPTY_VALUES):
+        tags_html += f'<span class="tag tag-limit">{row.limit}</span>'
+    if _has_value(row.lock, TAG_EMPTY_VALUES):
+        tags_html += f'<span class="tag tag-lock">{row.lock}</span>'
+    if _has_value(row.pay, TAG_EMPTY_VALUES):
+        tags_html += f'<span class="tag tag-pay">{row.pay}</span>'
+
+    # 币种单元格（手机端在下方显示气泡标签）
+    coin_html = f'{coin}<div class="sub-text">{platform}</div>'
+    if row.badge:
+        coin_html = f'{coin}<span class="badge">{row.badge}</span><div class="sub-text">{platform}</div>'
+    if tags_html:
+        coin_html += f'<div class="mobile-tags">{tags_html}</div>'
+
+    # APY单元格（带剩余时间和进度条，内容由前端按 data-* 填充）
+    apy_html = f'<span class="highlight">{apy}</span>'
+    if not np.isnan(row.end_ms):
+        start_ms, end_ms = int(row.start_ms), int(row.end_ms)
+        apy_html += f'<div class="remaining-time" data-end="{end_ms}"></div>'
+        apy_html += (
+            f'<div class="progress-bar"><div class="progress-fill" data-start="{start_ms}" '
+            f'data-end="{end_ms}" style="width: 0%"></div></div>'
+        )
+
+    # 气泡标签（PC端显示）
+    tags_display = tags_html if tags_html else "-"
+
+    # 操作列：计算器图标 + 前往理财按钮（左右分布）
+    action_html = (
+        f'<td class="action-cell">'
+        f'<span class="calc-btn" onclick="openCalcModal(\'{coin}\', \'{platform}\', \'{apy}\')" title="计算收益">🧮</span> '
+        f'<a href="{link}" target="_blank" class="go-btn">前往理财</a>'
+        f'</td>'
+    )
+
+    end_text = row.end if _has_value(row.end, END_EMPTY_VALUES) else '-'
+    # 片段不带缩进和换行：每次重跑都要发给浏览器，空白也是负载
+    return (
+        f'<tr><td class="coin-cell">{coin_html}</td>'
+        f'<td>{apy_html}</td>'
+        f'<td class="pc-only">{end_text}</td>'
+        f'<td class="pc-only">{tags_display}</td>'
+        f'{action_html}</tr>'
+    )
+
+
+# JSON 模式下每个 offer 的字段顺序（rows 里是按此顺序排列的数组，避免重复键名）；
+# apy_value 是 APY 数值，供前端排序 / 取前 K 名；trend 是最近的 APY 走势（逗号分隔，画迷你走势图）；
+# badge 是「新」/「APY↑」徽标
+OFFER_FIELDS = ['coin', 'platform', 'badge', 'apy', 'apy_value', 'trend', 'start', 'end', 'end_text', 'limit',
+                'lock', 'pay', 'link']
+
+
+def _text_or_none(values: pd.Series, empty_values) -> list:
+    """把「没有内容」的单元格（空值、空白、占位写法）统一成 None。"""
+    text = values.astype('string').str.strip()
+    keep = text.notna() & (text != '') & ~text.isin(empty_values)
+    return text.astype(object).where(keep, None).tolist()
+
+
+def _ms_or_none(values: np.ndarray) -> list:
+    return [None if np.isnan(v) else int(v) for v in values.tolist()]
+
+
+def _float_or_none(values: np.ndarray) -> list:
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+
+def build_offers(frame: pd.DataFrame) -> dict:
+    """把渲染帧转成紧凑的 offer 列表：{"fields": [...], "rows": [[...], ...]}。"""
+    has_end = ~np.isnan(frame['end_ms'].to_numpy(dtype=float))
+    columns = {
+        'coin': _text_or_none(frame['coin'], []),
+        'platform': _text_or_none(frame['platform'], []),
+        'apy': _text_or_none(frame['apy'], []),
+        'apy_value': _float_or_none(frame['apy_value'].to_numpy(dtype=float)),
+        'trend': _text_or_none(frame['trend'], []),
+        'badge': _text_or_none(frame['badge'], []),
+        'start': _ms_or_none(np.where(has_end, frame['start_ms'], np.nan)),
+        'end': _ms_or_none(frame['end_ms'].to_numpy(dtype=float)),
+        'end_text': _text_or_none(frame['end'], END_EMPTY_VALUES),
+        'limit': _text_or_none(frame['limit'], TAG_EMPTY_VALUES),
+        'lock': _text_or_none(frame['lock'], TAG_EMPTY_VALUES),
+        'pay': _text_or_none(frame['pay'], TAG_EMPTY_VALUES),
+        'link': _text_or_none(frame['link'], []),
+    }
+    return {'fields': OFFER_FIELDS, 'rows': [list(r) for r in zip(*(columns[f] for f in OFFER_FIELDS))]}
+
+
+def render_rows(frame: pd.DataFrame) -> str:
+    """不走缓存，直接渲染全部行（表体 HTML）。"""
+    return "".join(render_row(row) for row in frame.itertuples(index=False))
+
+
+class LRUCache:
+    """线程安全的定长 LRU 字典，记录命中/未命中次数。"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_many(self, keys) -> list:
+        """批量查询（只加一次锁），未命中的位置为 None。"""
+        with self._lock:
+            out = []
+            for key in keys:
+                value = self._data.get(key)
+                if value is not None:
+                    self._data.move_to_end(key)
+                out.append(value)
+            found = sum(v is not None for v in out)
+            self.hits += found
+            self.misses += len(out) - found
+            return out
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def discard(self, keys) -> int:
+        """删掉这些键（不存在的忽略），返回实际删掉的条数。"""
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RenderCache:
+    """整表 + 行片段两级渲染缓存（进程内共享）。"""
+
+    def __init__(self, *, max_documents: int = 8, max_rows: int = 20000):
+        self.documents = LRUCache(max_documents)
+        self.payloads = LRUCache(max_documents)
+        self.rows = LRUCache(max_rows)
+
+    @staticmethod
+    def _keys(frame: pd.DataFrame, columns: Mapping[str, Optional[str]]):
+        row_keys = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+        doc_key = hashlib.blake2b(
+            row_keys.tobytes() + repr(sorted(columns.items())).encode(), digest_size=16
+        ).hexdigest()
+        return row_keys, doc_key
+
+    def render_offers(self, frame: pd.DataFrame, columns: Mapping[str, Optional[str]]) -> str:
+        """返回 JSON 模式的 offer 列表（已序列化的 JSON 字符串，带数据版本号 v）。"""
+        _, doc_key = self._keys(frame, columns)
+        payload = self.payloads.get(doc_key)
+        if payload is None:
+            payload = json.dumps(
+                {'v': doc_key, **build_offers(frame)}, ensure_ascii=False, separators=(',', ':')
+            )
+            self.payloads.put(doc_key, payload)
+        return payload
+
+    def render(self, frame: pd.DataFrame, columns: Mapping[str, Optional[str]]) -> str:
+        """返回表体 HTML（所有 <tr>），表头、样式和脚本在静态资源里。"""
+        row_keys, doc_key = self._keys(frame, columns)
+        html = self.documents.get(doc_key)
+        if html is not None:
+            return html
+
+        keys = row_keys.tolist()
+        fragments = self.rows.get_many(keys)
+        missing = [i for i, fragment in enumerate(fragments) if fragment is None]
+        for i, row in zip(missing, frame.iloc[missing].itertuples(index=False)):
+            fragments[i] = render_row(row)
+            self.rows.put(keys[i], fragments[i])
+
+        html = "".join(fragments)
+        self.documents.put(doc_key, html)
+        return html
+
+    def forget_rows(self, frame: pd.DataFrame, columns: Mapping[str, Optional[str]]) -> int:
+        """从行片段缓存里删掉这些行（例如已结束的 offer），返回删掉的条数；其他行的片段不受影响。"""
+        row_keys, _ = self._keys(frame, columns)
+        return self.rows.discard(row_keys.tolist())
+
+
+# 进程级共享实例：Streamlit 每次重跑脚本都会复用同一个模块对象
+render_cache = RenderCache()
+
+for _name in ('documents', 'payloads', 'rows'):
+    _lru = getattr(render_cache, _name)
+    metrics.register('cache_hits_total', lambda c=_lru: c.hits, kind='counter', cache=_name)
+    metrics.register('cache_misses_total', lambda c=_lru: c.misses, kind='counter', cache=_name)
+    metrics.register('cache_entries', lambda c=_lru: len(c), cache=_name)
+
+# 表格输出方式："json" 输出 offer 列表（前端虚拟滚动渲染），"html" 输出表体 <tr>
+TABLE_MODES = ('json', 'html')
+
+
+def render_table(enriched, *, mode: str = 'json', cache: RenderCache = render_cache) -> str:
+    """render 阶段：把 enrich 的结果渲染成表格组件需要的数据（走渲染缓存）。"""
+    if mode not in TABLE_MODES:
+        raise ValueError(f"unknown table mode: {mode!r}")
+    columns = enriched.board.columns.as_dict()
+    with metrics.timed(f'render_{mode}') as t:
+        frame = build_render_frame(enriched.board.df, columns, enriched.countdown, enriched.trend, enriched.badge)
+        out = cache.render(frame, columns) if mode == 'html' else cache.render_offers(frame, columns)
+        t.rows = len(frame)
+    metrics.set('payload_bytes', len(out.encode('utf-8')), mode=mode)
+    return out
@@ -0,0 +1,132 @@
+"""按 offer 结束时间安排刷新：结束时间的最小堆 + 自适应抓取间隔。
+
+固定 60 秒轮询的问题：offer 到期后，页面要等下一次整表重建才把它去掉，最高收益卡片可能还停在
+已结束的 offer 上；而夜里表格没人改、也没有 offer 到期，照样每分钟访问一次 Google。
+
+ExpiryScheduler 把看板里每个 offer 解析好的结束时间放进最小堆（堆顶是最近的一个）：
+- 视图（view.py）每次取用时看一眼堆顶，有 offer 到期就弹出，从视图里去掉刚结束的行，
+  不重新 normalize / enrich；
+- 刷新器每拿到一份新数据就重新装载（app.py 的 on_change），没有会话在看时抓取节奏也跟着新数据走；
+- 刷新器（fetch.py）每轮抓取后问 next_interval() 下一次等多久：近期到期的 offer 多就抓得勤，
+  马上有 offer 到期就在到期后立刻抓一次（运营通常在 offer 结束时更新表格），
+  很久都没有 offer 到期就放慢；安静时段（默认北京时间夜里）没有到期就一直等到时段结束。
+"""
+
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .metrics import metrics
+from .timeparse import APP_TZ
+
+
+def parse_quiet_hours(text: str) -> Optional[Tuple[int, int]]:
+    """「1-7」-> (1, 7)（应用时区的整点，可跨零点，如「23-6」）；空字符串为 None（不设安静时段）。"""
+    text = text.strip()
+    if not text:
+        return None
+    start, sep, end = text.partition('-')
+    if not sep:
+        raise ValueError(f"安静时段应写成「开始-结束」的整点，例如 1-7：{text!r}")
+    hours = int(start), int(end)
+    if not all(0 <= h < 24 for h in hours) or hours[0] == hours[1]:
+        raise ValueError(f"无效的安静时段：{text!r}")
+    return hours
+
+
+class ExpiryScheduler:
+    """offer 结束时间的最小堆（线程安全）。
+
+    load() 用一组结束时间（毫秒时间戳，NaN 表示没有结束时间）重建堆，堆里存 (结束秒数, 行号)；
+    已经过去的结束时间不入堆。行号就是传入数组的下标；堆可能被不同的调用方按各自的行序装载，
+    ViewCache 只把它当作「该看了」的信号，到期的行按自己算好的结束时间判断。
+    """
+
+    def __init__(self, *, base_interval: float = 60.0, min_interval: float = 15.0,
+                 max_interval: float = 900.0, window: float = 600.0, busy: int = 3,
+                 quiet_hours: Optional[Tuple[int, int]] = None,
+                 clock: Callable[[], float] = time.time):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.window = window            # 「近期」的范围（秒）
+        self.busy = busy                # 近期有这么多个 offer 到期时按 min_interval 抓
+        self.quiet_hours = quiet_hours
+        self.clock = clock
+        self._heap: List[Tuple[float, int]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def load(self, end_ms: Sequence[float]) -> None:
+        """按新的结束时间重建堆（行号为数组下标）。"""
+        ends = np.asarray(end_ms, dtype=float) / 1000.0
+        rows = np.flatnonzero(ends > self.clock())      # NaN 比较为 False，直接排除
+        heap = list(zip(ends[rows].tolist(), rows.tolist()))
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+
+    def next_deadline(self) -> Optional[float]:
+        """最近一个还在堆里的结束时间（秒）；没有时为 None。"""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """堆顶是否已经到期（取视图时调用，只看堆顶）。"""
+        deadline = self.next_deadline()
+        return deadline is not None and deadline <= (self.clock() if now is None else now)
+
+    def pop_expired(self, now: Optional[float] = None) -> List[int]:
+        """弹出所有已到期的行号。"""
+        now = self.clock() if now is None else now
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                expired.append(heapq.heappop(self._heap)[1])
+        if expired:
+            metrics.inc('offers_expired_total', len(expired))
+        return expired
+
+    def _quiet_until(self, now: float) -> Optional[float]:
+        """now 在安静时段内时返回时段结束的时间（秒），否则为 None。"""
+        if self.quiet_hours is None:
+            return None
+        start, end = self.quiet_hours
+        local = datetime.fromtimestamp(now, tz=APP_TZ)
+        hour = local.hour
+        inside = start <= hour < end if start < end else (hour >= start or hour < end)
+        if not inside:
+            return None
+        until = local.replace(hour=end, minute=0, second=0, microsecond=0)
+        if until <= local:
+            until += timedelta(days=1)
+        return until.timestamp()
+
+    def next_interval(self, now: Optional[float] = None) -> float:
+        """下一次抓取前等待的秒数。"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            upcoming = heapq.nsmallest(self.busy, (end for end, _ in self._heap if end > now))
+        soon = [end for end in upcoming if end - now <= self.window]
+        if len(soon) >= self.busy:
+            interval = self.min_interval                            # 近期到期的多：抓得勤
+        elif soon and soon[0] - now < self.base_interval:
+            interval = max(self.min_interval, soon[0] - now + 1.0)  # 到期后马上抓一次
+        elif not soon:
+            # 近期没有到期：放慢，但不晚于下一个到期时间
+            interval = self.max_interval if not upcoming else min(self.max_interval, upcoming[0] - now + 1.0)
+            interval = max(self.base_interval, interval)
+            quiet_until = self._quiet_until(now)
+            if quiet_until is not None:
+                # 安静时段：一直等到时段结束（中途有 offer 到期则到期后抓一次）
+                interval = quiet_until - now if not upcoming else min(quiet_until, upcoming[0] + 1.0) - now
+        else:
+            interval = self.base_interval
+        metrics.set('fetch_interval_seconds', interval)
+        return interval
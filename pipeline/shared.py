@@ -0,0 +1,150 @@
+"""同一台机器上多个进程（多个 Streamlit 副本）共享的快照缓存。
+
+每个数据源在缓存目录里有三类文件：
+- <键>.json：当前快照的元数据（内容摘要、最近一次确认时间、ETag 等）；
+- <键>.<内容摘要>.arrow：解析好的 DataFrame（Arrow IPC，不压缩，可以直接内存映射）；
+- <键>.lock：抓取锁（fcntl.flock）。
+
+刷新时先看元数据：别的进程在 ttl 内刚确认过就直接用（内容没变什么都不做，变了就内存映射
+新的 Arrow 文件，不再解析 CSV）；否则抢抓取锁，抢到的进程发条件请求并发布结果，没抢到的
+等它发布后直接使用（single-flight）。这样每台机器每个 ttl 只向上游抓取一次，各进程映射的是
+同一份页缓存，字符串列（pyarrow 存储）转换成 DataFrame 时也不复制。
+Arrow 文件按内容摘要命名、从不覆盖，已映射旧文件的进程不受影响。
+"""
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, Optional
+
+from .fetch import Snapshot
+from .metrics import metrics
+
+try:
+    import fcntl
+except ImportError:     # 非 POSIX 系统：不支持共享缓存
+    fcntl = None
+
+try:
+    import pyarrow as pa
+except ImportError:     # 没有安装 pyarrow：不支持共享缓存（其余功能不受影响）
+    pa = None
+
+
+class SharedSnapshotCache:
+    """按数据源 url 共享的快照缓存（ttl 一般取刷新周期）。"""
+
+    def __init__(self, directory, *, ttl: float = 60.0, lock_timeout: float = 60.0):
+        if pa is None:
+            raise ImportError('共享快照缓存需要 pyarrow：pip install pyarrow')
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.publish_error: Optional[BaseException] = None
+
+    def _key(self, url: str) -> str:
+        return hashlib.blake2b(url.encode('utf-8'), digest_size=8).hexdigest()
+
+    def read_meta(self, url: str) -> Optional[dict]:
+        try:
+            return json.loads((self.directory / f'{self._key(url)}.json').read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def _fresh(self, meta: Optional[dict]) -> bool:
+        return meta is not None and time.time() - meta['fetched_at'] < self.ttl
+
+    @contextmanager
+    def _lock(self, url: str):
+        """独占抓取锁；lock_timeout 内拿不到抛出 TimeoutError。"""
+        with open(self.directory / f'{self._key(url)}.lock', 'a') as f:
+            deadline = time.monotonic() + self.lock_timeout
+            while True:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError('等待其他进程抓取超时') from None
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _adopt(self, url: str, meta: dict, previous: Optional[Snapshot]) -> Snapshot:
+        """使用元数据描述的快照：内容与 previous 相同只更新校验信息，否则内存映射 Arrow 文件。"""
+        info = dict(fetched_at=meta['fetched_at'], etag=meta.get('etag'), last_modified=meta.get('last_modified'))
+        if previous is not None and previous.body_hash == meta['body_hash']:
+            metrics.inc('shared_cache_total', result='hit')
+            return replace(previous, **info)
+        path = self.directory / f"{self._key(url)}.{meta['body_hash']}.arrow"
+        with metrics.timed('shared_load') as t:
+            df = pa.ipc.open_file(pa.memory_map(str(path))).read_all().to_pandas()
+            t.rows = len(df)
+        metrics.inc('shared_cache_total', result='load')
+        return Snapshot(df=df, version=(previous.version + 1) if previous is not None else 1,
+                        body_hash=meta['body_hash'], origin='shared', **info)
+
+    def _publish(self, url: str, snap: Snapshot) -> None:
+        key = self._key(url)
+        path = self.directory / f'{key}.{snap.body_hash}.arrow'
+        if not path.exists():
+            table = pa.Table.from_pandas(snap.df, preserve_index=False)
+            tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+            with pa.OSFile(str(tmp), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, path)
+        meta = {'body_hash': snap.body_hash, 'fetched_at': snap.fetched_at,
+                'etag': snap.etag, 'last_modified': snap.last_modified}
+        tmp = self.directory / f'.{key}.json.{os.getpid()}.tmp'
+        tmp.write_text(json.dumps(meta), encoding='utf-8')
+        os.replace(tmp, self.directory / f'{key}.json')
+        # 旧内容的 Arrow 文件：已映射的进程仍可继续读（POSIX 删除不影响已有映射）
+        for old in self.directory.glob(f'{key}.*.arrow'):
+            if old != path:
+                old.unlink(missing_ok=True)
+
+    def refresh(self, url: str, previous: Optional[Snapshot],
+                fetch: Callable[[Optional[Snapshot]], Snapshot]) -> Snapshot:
+        """返回该数据源的最新快照；需要时由拿到锁的进程调用 fetch(基准快照) 抓取并发布。"""
+        meta = self.read_meta(url)
+        if self._fresh(meta):
+            try:
+                return self._adopt(url, meta, previous)
+            except (OSError, pa.ArrowException):     # Arrow 文件缺失或损坏：当作没有缓存
+                pass
+        with self._lock(url):
+            meta = self.read_meta(url)
+            base = previous
+            if meta is not None:
+                try:
+                    adopted = self._adopt(url, meta, previous)
+                    if self._fresh(meta):           # 等锁期间别的进程刚发布过
+                        return adopted
+                    base = adopted
+                except (OSError, pa.ArrowException):
+                    pass
+            snap = fetch(base)
+            metrics.inc('shared_cache_total', result='fetch')
+            try:
+                self._publish(url, snap)
+                self.publish_error = None
+            except Exception as e:                  # 发布失败不影响本进程使用新数据
+                self.publish_error = e
+            return snap
+
+
+def open_shared_cache(directory, *, ttl: float = 60.0) -> Optional[SharedSnapshotCache]:
+    """打开共享缓存；目录为空、不可用、系统不支持文件锁或没有 pyarrow 时返回 None（各进程各自抓取）。"""
+    if not directory or fcntl is None or pa is None:
+        return None
+    try:
+        return SharedSnapshotCache(directory, ttl=ttl)
+    except OSError:
+        return None
@@ -0,0 +1,230 @@
+"""多个表格 / 标签页合并成一个看板。
+
+每个数据源（表格 id + 标签页 gid）有自己的 SheetRefresher 和后台线程，互不等待：
+冷启动时所有数据源并行抓取，整体等待时间取决于最慢的一个（且不超过 timeout），
+慢的数据源晚到的结果在下一次重跑时自动并入。合并前把各数据源的开始时间列统一成
+同一个列名（沿用 normalize 的列名识别），再按 (平台, 币种) 去重：排在前面的数据源优先，
+同一数据源内部的行不去重。
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .fetch import DEFAULT_POLICY, FetchPolicy, SheetRefresher
+from .ingest import CATEGORY_COLUMNS
+from .metrics import metrics
+from .normalize import COL_COIN, COL_PLATFORM, START_TIME_COL_CANDIDATES, detect_start_column
+from .store import SnapshotStore
+
+if TYPE_CHECKING:
+    from .shared import SharedSnapshotCache
+
+# 合并后开始时间列的统一列名
+CANONICAL_START_COL = START_TIME_COL_CANDIDATES[0]
+
+
+@dataclass(frozen=True)
+class SheetSource:
+    """一个数据源：Google 表格的某个标签页（或任意 CSV 地址）。"""
+
+    url: str
+    name: Optional[str] = None
+
+    @classmethod
+    def google(cls, sheet_id: str, gid: Optional[str] = None, name: Optional[str] = None) -> "SheetSource":
+        url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv"
+        if gid:
+            url += f"&gid={gid}"
+        return cls(url, name)
+
+
+def parse_sources(text: str) -> List[SheetSource]:
+    """解析逗号分隔的数据源列表：「表格id」「表格id:gid」或完整的 http(s) 地址。"""
+    sources = []
+    for item in (s.strip() for s in text.split(",")):
+        if not item:
+            continue
+        if item.startswith(("http://", "https://")):
+            sources.append(SheetSource(item))
+        else:
+            sheet_id, _, gid = item.partition(":")
+            sources.append(SheetSource.google(sheet_id, gid or None))
+    return sources
+
+
+def sources_from_env(items: Sequence[str] = ()) -> List[SheetSource]:
+    """命令行工具用：优先取 items（同 parse_sources 的写法），其次环境变量 SHEET_SOURCES、SHEET_URL。"""
+    sources = parse_sources(",".join(items)) or parse_sources(os.environ.get("SHEET_SOURCES", ""))
+    if not sources and os.environ.get("SHEET_URL"):
+        sources = [SheetSource(os.environ["SHEET_URL"])]
+    return sources
+
+
+def canonicalize(df: pd.DataFrame) -> pd.DataFrame:
+    """把开始时间列改名为统一列名（没有开始时间列或已是统一列名时原样返回）。"""
+    start_col = detect_start_column(df.columns)
+    if start_col is None or start_col == CANONICAL_START_COL:
+        return df
+    return df.rename(columns={start_col: CANONICAL_START_COL})
+
+
+def offer_keys(df: pd.DataFrame) -> np.ndarray:
+    """(平台, 币种) 的 64 位哈希，忽略首尾空白和大小写。"""
+    keys = pd.DataFrame({
+        col: df[col].astype("string").str.strip().str.casefold() if col in df.columns
+        else pd.Series("", index=df.index, dtype="string")
+        for col in (COL_PLATFORM, COL_COIN)
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def merge_frames(frames: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """按数据源顺序合并；后面数据源里已出现过的 (平台, 币种) 被丢弃。"""
+    if len(frames) == 1:
+        return frames[0]
+    seen = np.empty(0, dtype=np.uint64)
+    parts = []
+    for df in frames:
+        df = canonicalize(df)
+        keys = offer_keys(df)
+        parts.append(df[~np.isin(keys, seen)])
+        seen = np.union1d(seen, keys)
+    merged = pd.concat(parts, ignore_index=True)
+    # 各数据源的类别不同时 concat 退回字符串，合并后重新编码
+    for col in CATEGORY_COLUMNS:
+        if col in merged.columns and not isinstance(merged[col].dtype, pd.CategoricalDtype):
+            merged[col] = merged[col].astype("category")
+    return merged
+
+
+class MultiSheetRefresher:
+    """多个数据源的刷新器，对外接口与 SheetRefresher 一致，load() 返回合并后的 DataFrame。
+
+    on_change(df, fetched_at, upstream) 在任一数据源内容变化后以合并后的数据调用（在该数据源的刷新线程里，
+    多个数据源的通知串行执行）。upstream 表示这次变化是本进程从上游下载到的（不是从本地存储恢复、
+    也不是从共享缓存拿到其他进程的抓取结果），多个副本里只有一个进程会以 True 收到同一次变化。冷启动时等所有数据源都有了第一次结果才开始通知，
+    避免先到的数据源被当作基准、后到的数据源被当成「新增」。
+    """
+
+    def __init__(self, sources: Sequence[SheetSource], *, interval: float = 60.0, timeout: float = 30.0,
+                 store: Optional[SnapshotStore] = None,
+                 on_change: Optional[Callable[[pd.DataFrame, float, bool], None]] = None,
+                 shared: Optional["SharedSnapshotCache"] = None,
+                 policy: FetchPolicy = DEFAULT_POLICY,
+                 schedule: Optional[Callable[[], float]] = None):
+        if not sources:
+            raise ValueError("至少需要一个数据源")
+        self.sources = list(sources)
+        self.interval = interval
+        self.timeout = timeout
+        self.on_change = on_change
+        self.refreshers = [
+            SheetRefresher(s.url, interval=interval, timeout=timeout, store=store,
+                           on_change=self._source_changed if on_change else None, shared=shared,
+                           policy=policy, schedule=schedule)
+            for s in self.sources
+        ]
+        self._merged: Optional[Tuple[tuple, pd.DataFrame]] = None
+        self._merge_lock = threading.Lock()
+        self._notify_lock = threading.Lock()
+
+    @property
+    def last_errors(self) -> Dict[str, BaseException]:
+        return {s.url: r.last_error for s, r in zip(self.sources, self.refreshers) if r.last_error}
+
+    def data_age(self) -> Optional[float]:
+        """最旧的数据源距最近一次确认有效过了多少秒；所有数据源都没有数据时为 None。"""
+        ages = [a for a in (r.data_age() for r in self.refreshers) if a is not None]
+        return max(ages) if ages else None
+
+    def open_circuits(self) -> int:
+        """熔断中（open / half_open）的数据源个数。"""
+        return sum(r.breaker.state != "closed" for r in self.refreshers)
+
+    def is_stale(self) -> bool:
+        return any(r.is_stale() or r.snapshot() is None for r in self.refreshers)
+
+    def load(self) -> pd.DataFrame:
+        """合并所有已有数据的数据源；冷启动时最多等待 timeout 秒（各数据源并行等待）。"""
+        self.start()
+        deadline = time.monotonic() + self.timeout
+        for r in self.refreshers:
+            r.wait(max(0.0, deadline - time.monotonic()))
+        df = self._merge()
+        if df is None:
+            errors = list(self.last_errors.values())
+            raise errors[0] if errors else TimeoutError("表格首次加载超时")
+        return df
+
+    def load_once(self) -> pd.DataFrame:
+        """不启动后台线程，每个数据源只做一次请求（一次性任务用，如静态导出）。
+
+        先用本地存储恢复，再并行做一次条件请求；请求失败的数据源沿用恢复的快照。
+        """
+        for r in self.refreshers:
+            r.restore()
+        self.refresh()
+        df = self._merge()
+        if df is None:
+            errors = list(self.last_errors.values())
+            raise errors[0] if errors else RuntimeError("没有任何数据源返回数据")
+        return df
+
+    def _merge(self) -> Optional[pd.DataFrame]:
+        """合并当前已有数据的数据源（按各数据源的版本缓存）；都没有数据时为 None。"""
+        snapshots = [(s.url, r.snapshot()) for s, r in zip(self.sources, self.refreshers)]
+        ready = [(url, snap) for url, snap in snapshots if snap is not None]
+        if not ready:
+            return None
+        key = tuple((url, snap.version) for url, snap in ready)
+        with self._merge_lock:
+            if self._merged is None or self._merged[0] != key:
+                with metrics.timed("merge") as t:
+                    self._merged = (key, merge_frames([snap.df for _, snap in ready]))
+                    t.rows = len(self._merged[1])
+            return self._merged[1]
+
+    def _source_changed(self, snapshot) -> None:
+        with self._notify_lock:
+            if not all(r.attempted() for r in self.refreshers):
+                return
+            df = self._merge()
+            if df is not None:
+                if snapshot is None:
+                    self.on_change(df, time.time(), False)
+                else:
+                    self.on_change(df, snapshot.fetched_at, snapshot.origin == "fetch")
+
+    def start(self) -> "MultiSheetRefresher":
+        for r in self.refreshers:
+            r.start()
+        return self
+
+    def stop(self) -> None:
+        for r in self.refreshers:
+            r.stop()
+
+    def request_refresh(self) -> None:
+        for r in self.refreshers:
+            r.request_refresh()
+
+    def refresh(self) -> bool:
+        """并行对所有数据源各做一次条件请求，返回是否有数据源发生变化（失败的数据源记在 last_error）。"""
+        def one(r: SheetRefresher) -> bool:
+            try:
+                changed = r.refresh()
+                r.last_error = None
+                return changed
+            except Exception as e:
+                r.last_error = e
+                return False
+
+        with ThreadPoolExecutor(max_workers=len(self.refreshers), thread_name_prefix="sheet-fetch") as pool:
+            return any(list(pool.map(one, self.refreshers)))
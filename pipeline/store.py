@@ -0,0 +1,108 @@
+"""本地快照存储：每次抓取成功后把原始 CSV 字节写进 SQLite。
+
+进程启动时直接读最新的本地快照（不等网络），Google 导出接口变慢或不可用时
+页面继续展示本地数据并标注「数据更新于」的时间。按数据源（表格地址）分别保存，
+每个数据源只保留最近几份。
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    source        TEXT NOT NULL,
+    body_hash     TEXT NOT NULL,
+    fetched_at    REAL NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    body          BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_source ON snapshots (source, id);
+"""
+
+
+@dataclass(frozen=True)
+class StoredSnapshot:
+    """存储里的一份快照（原始 CSV 字节 + 校验信息）。"""
+
+    source: str
+    body: bytes
+    body_hash: str
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class SnapshotStore:
+    """基于 SQLite 的快照存储（线程安全，多个进程可共用同一个文件）。"""
+
+    def __init__(self, path, *, keep: int = 5):
+        self.path = Path(path)
+        self.keep = keep
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """打开连接并在一个事务里执行，结束后关闭。"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def latest(self, source: str) -> Optional[StoredSnapshot]:
+        """返回该数据源最新的快照（没有时为 None）。"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT body, body_hash, fetched_at, etag, last_modified FROM snapshots "
+                "WHERE source = ? ORDER BY id DESC LIMIT 1",
+                (source,),
+            ).fetchone()
+        if row is None:
+            return None
+        body, body_hash, fetched_at, etag, last_modified = row
+        return StoredSnapshot(source, bytes(body), body_hash, fetched_at, etag, last_modified)
+
+    def save(self, snap: StoredSnapshot) -> None:
+        """写入一份快照；内容与最新一份相同时只更新时间和校验信息。"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, body_hash FROM snapshots WHERE source = ? ORDER BY id DESC LIMIT 1",
+                (snap.source,),
+            ).fetchone()
+            if row is not None and row[1] == snap.body_hash:
+                conn.execute(
+                    "UPDATE snapshots SET fetched_at = ?, etag = ?, last_modified = ? WHERE id = ?",
+                    (snap.fetched_at, snap.etag, snap.last_modified, row[0]),
+                )
+                return
+            conn.execute(
+                "INSERT INTO snapshots (source, body_hash, fetched_at, etag, last_modified, body) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (snap.source, snap.body_hash, snap.fetched_at, snap.etag, snap.last_modified,
+                 sqlite3.Binary(snap.body)),
+            )
+            # 每个数据源只保留最近 keep 份
+            conn.execute(
+                "DELETE FROM snapshots WHERE source = ? AND id NOT IN "
+                "(SELECT id FROM snapshots WHERE source = ? ORDER BY id DESC LIMIT ?)",
+                (snap.source, snap.source, self.keep),
+            )
+
+
+def open_store(path, **kwargs) -> Optional[SnapshotStore]:
+    """打开快照存储；目录不可写等情况返回 None（只是失去本地兜底，不影响抓取）。"""
+    try:
+        return SnapshotStore(path, **kwargs)
+    except (OSError, sqlite3.Error):
+        return None
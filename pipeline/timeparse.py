@@ -0,0 +1,215 @@
+"""按列批量解析开始/结束时间，并计算剩余时间与进度（北京时间口径）。
+
+整列一次完成：先对字符串去重，再用向量化的正则抽取和日期组装解析每个不同的值，
+最后按编码映射回每一行；所有行共用同一个 "now" 快照。
+
+支持的格式：
+- 2026-01-24 07:59 / 2026/1/24 7:59 / 2026-01-24
+- 1月24日7点59 / 1月24日7:59 / 1月24日7点 / 1月24日（无年份时按当前月份推断跨年）
+- 其他 pandas 能识别的写法（如 2026.01.24）作为兜底
+- 结束时间写成「7天定期存款」「14天」等：用开始时间 + N 天推导
+无时分时：开始默认 00:00，结束默认 23:59；只写到「H点」时按整点。
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+try:
+    APP_TZ = ZoneInfo("Asia/Shanghai")
+except Exception:
+    APP_TZ = None
+
+# 视为「没有时间」的占位写法
+EMPTY_TIME_VALUES = ['暂无', '无截止', '-', '无']
+
+ISO_PATTERN = r'^(\d{4})[\-/](\d{1,2})[\-/](\d{1,2})(?:\s+(\d{1,2}):(\d{1,2}))?$'
+CN_PATTERN = r'^(\d{1,2})月(\d{1,2})日(?:(\d{1,2})(?:[点:](\d{1,2})?)?)?$'
+DAYS_PATTERN = r'(\d+)\s*天'
+
+# 没有开始时间时，默认总时长 30 天
+DEFAULT_SPAN = timedelta(days=30)
+
+
+def now_in_app_tz() -> pd.Timestamp:
+    return pd.Timestamp.now(tz=APP_TZ)
+
+
+def _empty_times(index) -> pd.Series:
+    dtype = pd.DatetimeTZDtype(tz=APP_TZ) if APP_TZ else 'datetime64[ns]'
+    return pd.Series(pd.NaT, index=index, dtype=dtype)
+
+
+def _assemble(parts: pd.DataFrame, index) -> pd.Series:
+    """把 year/month/day/hour/minute 数值列组装成日期；非法日期（如 2月30日）得到 NaT。"""
+    ts = pd.to_datetime(parts, errors='coerce')
+    ts.index = index
+    if APP_TZ:
+        ts = ts.dt.tz_localize(APP_TZ)
+    return ts
+
+
+def _fallback(values: pd.Series) -> pd.Series:
+    """兜底：交给 pandas 解析其余写法，统一换算到北京时间。"""
+    try:
+        ts = pd.to_datetime(values, errors='coerce', format='mixed')
+    except (ValueError, TypeError):
+        # 时区写法混杂时无法整列解析，逐个处理（只会落到极少数不同的值上）
+        ts = pd.Series([_to_app_tz(pd.to_datetime(v, errors='coerce')) for v in values],
+                       index=values.index, dtype=_empty_times(values.index).dtype)
+        return ts
+    if APP_TZ:
+        ts = ts.dt.tz_localize(APP_TZ) if ts.dt.tz is None else ts.dt.tz_convert(APP_TZ)
+    return ts
+
+
+def _to_app_tz(ts):
+    if pd.isna(ts) or not APP_TZ:
+        return ts
+    return ts.tz_localize(APP_TZ) if ts.tzinfo is None else ts.tz_convert(APP_TZ)
+
+
+def _parse_unique(s: pd.Series, now: pd.Timestamp, is_end: bool) -> pd.Series:
+    """解析一组互不相同、已去除空白的字符串。"""
+    out = _empty_times(s.index)
+    default_hour, default_minute = (23, 59) if is_end else (0, 0)
+
+    iso = s.str.extract(ISO_PATTERN).astype(float)
+    hit = iso[0].notna()
+    if hit.any():
+        g = iso[hit]
+        out.loc[hit] = _assemble(pd.DataFrame({
+            'year': g[0],
+            'month': g[1],
+            'day': g[2],
+            'hour': g[3].fillna(default_hour),
+            'minute': g[4].fillna(default_minute),
+        }), g.index)
+
+    rest = ~hit
+    cn = s[rest].str.extract(CN_PATTERN).astype(float)
+    cn_hit = cn[0].notna()
+    if cn_hit.any():
+        g = cn[cn_hit]
+        month = g[0]
+        # 跨年推断：
+        # - 结束时间：如果月份明显早于当前月（例如 12 月看到 1 月），视为明年
+        # - 开始时间：如果月份明显晚于当前月（例如 1 月看到 12 月），视为去年
+        if is_end:
+            year = now.year + ((now.month - month) >= 6).astype(int)
+        else:
+            year = now.year - ((month - now.month) >= 6).astype(int)
+        out.loc[g.index] = _assemble(pd.DataFrame({
+            'year': year,
+            'month': month,
+            'day': g[1],
+            'hour': g[2].fillna(default_hour),
+            # 「M月D日H点」写了小时没写分钟：按整点；只有日期时才用默认的 23:59 / 00:00
+            'minute': g[3].fillna(default_minute).where(g[2].isna(), g[3].fillna(0)),
+        }), g.index)
+
+    leftover = cn.index[~cn_hit]
+    if len(leftover):
+        out.loc[leftover] = _fallback(s[leftover])
+    return out
+
+
+def _clean(values) -> pd.Series:
+    s = pd.Series(values, dtype=object).astype('string').str.strip()
+    return s.mask(s.isin(EMPTY_TIME_VALUES) | (s == ''))
+
+
+def parse_time_column(values, now: Optional[pd.Timestamp] = None, *, is_end: bool) -> pd.Series:
+    """把一整列时间字符串解析成带时区的 datetime Series（无法解析为 NaT）。"""
+    now = now if now is not None else now_in_app_tz()
+    s = _clean(values)
+    codes, uniques = pd.factorize(s)
+    parsed = _parse_unique(pd.Series(uniques, dtype='string'), now, is_end)
+    # 从带时区的数组按编码取值（-1 即空值取 NaT）；整列都解析不出来时也保持时区类型
+    return pd.Series(parsed.array.take(codes, allow_fill=True), index=s.index)
+
+
+def _epoch_ms(ts: pd.Series) -> np.ndarray:
+    epoch = pd.Timestamp(0, tz='UTC') if APP_TZ else pd.Timestamp(0)
+    return ((ts - epoch) / pd.Timedelta(milliseconds=1)).to_numpy(dtype=float)
+
+
+@dataclass(frozen=True)
+class Countdown:
+    """一整列 offer 的时间计算结果，数组按行对齐。
+
+    remaining_seconds / elapsed_percent / start_ms / end_ms 中 NaN 表示没有可用的结束时间。
+    """
+
+    start: pd.Series
+    end: pd.Series
+    remaining_seconds: np.ndarray
+    elapsed_percent: np.ndarray
+    start_ms: np.ndarray
+    end_ms: np.ndarray
+
+    @property
+    def has_end(self) -> np.ndarray:
+        return ~np.isnan(self.remaining_seconds)
+
+    def take(self, rows: np.ndarray) -> 'Countdown':
+        """只保留 rows（行号数组）这些行，索引重新从 0 开始。"""
+        return Countdown(
+            start=self.start.take(rows).reset_index(drop=True),
+            end=self.end.take(rows).reset_index(drop=True),
+            remaining_seconds=self.remaining_seconds[rows],
+            elapsed_percent=self.elapsed_percent[rows],
+            start_ms=self.start_ms[rows],
+            end_ms=self.end_ms[rows],
+        )
+
+    def remaining_text(self) -> np.ndarray:
+        """剩余时间文案（「剩余 X天Y小时」/「剩余 Y小时」/「已结束」，无结束时间为 None）。"""
+        secs = pd.Series(self.remaining_seconds)
+        days = (secs // 86400).astype('Int64').astype('string')
+        hours = (secs % 86400 // 3600).astype('Int64').astype('string')
+        text = ('剩余 ' + hours + '小时').where(secs < 86400, '剩余 ' + days + '天' + hours + '小时')
+        text = text.where(secs > 0, '已结束')
+        return text.astype(object).where(secs.notna(), None).to_numpy()
+
+
+def compute_countdown(end_values, start_values=None, *, now: Optional[pd.Timestamp] = None) -> Countdown:
+    """按同一个 now 计算整列的结束/开始时间、剩余秒数和已过百分比。"""
+    now = now if now is not None else now_in_app_tz()
+    end_raw = _clean(end_values)
+    end = parse_time_column(end_raw, now, is_end=True)
+    if start_values is not None:
+        start = parse_time_column(start_values, now, is_end=False)
+        start.index = end.index
+    else:
+        start = _empty_times(end.index)
+
+    # 结束时间可能是「7天定期存款」这类描述：可用开始时间推导结束时间
+    derive = end.isna() & start.notna() & end_raw.notna()
+    if derive.any():
+        days = end_raw[derive].str.extract(DAYS_PATTERN)[0].astype(float)
+        days = days.dropna()
+        end.loc[days.index] = start[days.index] + pd.to_timedelta(days, unit='D')
+
+    # 没有开始时间时，默认总时长 30 天
+    start = start.where(start.notna() | end.isna(), end - DEFAULT_SPAN)
+
+    remaining = ((end - now) / pd.Timedelta(seconds=1)).to_numpy(dtype=float)
+    total = np.maximum(1.0, ((end - start) / pd.Timedelta(seconds=1)).to_numpy(dtype=float))
+    elapsed = ((now - start) / pd.Timedelta(seconds=1)).to_numpy(dtype=float)
+    percent = np.clip(elapsed / total * 100.0, 0.0, 100.0)
+    percent = np.where(remaining <= 0, 100.0, percent)
+    percent[np.isnan(remaining)] = np.nan
+
+    return Countdown(
+        start=start,
+        end=end,
+        remaining_seconds=remaining,
+        elapsed_percent=percent,
+        start_ms=_epoch_ms(start),
+        end_ms=_epoch_ms(end),
+    )
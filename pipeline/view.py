@@ -0,0 +1,127 @@
+"""多个会话共享的看板视图（normalize + enrich + render 的结果）。
+
+Streamlit 每个会话每次重跑都会执行一遍脚本；如果每次都从快照重新 normalize、enrich、
+拼渲染数据，几百个会话同时在线时内存和 CPU 都随会话数线性增长，而大家看到的是同一张表。
+ViewCache 在进程里只保留一份 BoardView：数据（快照 DataFrame 对象）、历史或变化徽标有更新，
+或距上次构建超过 max_age 秒时才重建，其余时候所有会话拿到的都是同一个对象的引用。
+重建加锁，同一时刻只有一个会话在算，其他会话等它算完直接用。
+
+已经结束的 offer 不进入视图。传入 ExpiryScheduler 时，构建后把各行的结束时间交给它（最小堆；
+刷新线程拿到新数据时也会装载），之后每次取用只看堆顶：有 offer 到期就弹出，再按已算好的结束时间
+找出视图里刚结束的行，从上一次构建的结果里切掉它们、重新生成表格数据
+（HTML 模式下其余行的片段都命中缓存，到期行的片段从缓存里删掉），不重新 normalize / enrich；
+最高收益卡片读的是视图里的 board，下一次重跑就不会再指向已结束的 offer。
+
+BoardView 是只读的：dataclass 不可修改，DataFrame 在写时复制模式下，某个会话即使改了
+拿到的表也只会改到自己的副本，不影响其他会话。
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .diff import DiffEngine
+from .enrich import EnrichedBoard, enrich
+from .history import HistoryStore
+from .metrics import metrics
+from .normalize import Board, normalize
+from .render import RenderCache, build_render_frame, render_cache, render_table
+from .schedule import ExpiryScheduler
+
+
+@dataclass(frozen=True)
+class BoardView:
+    key: tuple              # (快照 DataFrame 的 id, 历史版本, 变化版本)
+    source: pd.DataFrame    # 持有快照引用，保证 id 在视图存活期间不被复用
+    board: Board
+    enriched: EnrichedBoard
+    payload: str            # 表格组件的数据（JSON 或表体 HTML，取决于 mode）
+    built_at: float         # time.monotonic()
+
+
+class ViewCache:
+    """进程内共享的看板视图（线程安全）。"""
+
+    def __init__(self, *, mode: str = 'json', max_age: float = 60.0,
+                 history: Optional[HistoryStore] = None, changes: Optional[DiffEngine] = None,
+                 scheduler: Optional[ExpiryScheduler] = None, cache: RenderCache = render_cache):
+        self.mode = mode
+        self.max_age = max_age
+        self.history = history
+        self.changes = changes
+        self.scheduler = scheduler
+        self.cache = cache
+        self._view: Optional[BoardView] = None
+        self._built: Optional[EnrichedBoard] = None     # 最近一次构建的结果
+        self._live: Optional[np.ndarray] = None         # _built 里还没结束的行
+        self._lock = threading.Lock()
+
+    def _key(self, df: pd.DataFrame) -> tuple:
+        return (id(df),
+                self.history.version if self.history is not None else None,
+                self.changes.version if self.changes is not None else None)
+
+    def _fresh(self, view: Optional[BoardView], key: tuple) -> bool:
+        return view is not None and view.key == key and time.monotonic() - view.built_at < self.max_age
+
+    def _expiring(self) -> bool:
+        return self.scheduler is not None and self.scheduler.due()
+
+    def _make(self, key: tuple, df: pd.DataFrame, enriched: EnrichedBoard, built_at: float) -> BoardView:
+        return BoardView(key=key, source=df, board=enriched.board, enriched=enriched,
+                         payload=render_table(enriched, mode=self.mode, cache=self.cache), built_at=built_at)
+
+    def _build(self, key: tuple, df: pd.DataFrame) -> BoardView:
+        enriched = enrich(normalize(df), history=self.history, changes=self.changes)
+        key = self._key(df)     # enrich 读走势时可能同步到其他进程写入的历史：按读完之后的版本记
+        ended = enriched.countdown.remaining_seconds <= 0     # 没有结束时间（NaN）的行保留
+        if ended.any():
+            enriched = enriched.take(np.flatnonzero(~ended))
+        self._built, self._live = enriched, np.ones(len(enriched.board), dtype=bool)
+        if self.scheduler is not None:
+            self.scheduler.load(enriched.countdown.end_ms)
+        metrics.inc('board_view_total', result='build')
+        return self._make(key, df, enriched, time.monotonic())
+
+    def _expire(self, view: BoardView) -> BoardView:
+        """去掉刚到期的行（只切片已算好的结果并重新生成表格数据），返回新视图。
+
+        堆可能是刷新线程按更新的数据装载的，行号不一定对应 _built：堆只用来判断该看了，
+        哪些行结束按 _built 自己的结束时间判断（没有结束时间的 NaN 比较为 False）。
+        """
+        now = self.scheduler.clock()
+        self.scheduler.pop_expired(now)
+        rows = np.flatnonzero(self._live & (self._built.countdown.end_ms <= now * 1000))
+        if not len(rows):
+            return view
+        self._live[rows] = False
+        if self.mode == 'html':
+            gone = self._built.take(rows)
+            columns = gone.board.columns.as_dict()
+            self.cache.forget_rows(build_render_frame(gone.board.df, columns, gone.countdown,
+                                                      gone.trend, gone.badge), columns)
+        view = self._make(view.key, view.source, self._built.take(np.flatnonzero(self._live)), view.built_at)
+        metrics.inc('board_view_total', result='expire')
+        return view
+
+    def get(self, df: pd.DataFrame) -> BoardView:
+        """返回 df 对应的视图；需要时（只由一个线程）重建，或去掉刚到期的 offer。"""
+        key = self._key(df)
+        view = self._view
+        if self._fresh(view, key) and not self._expiring():
+            metrics.inc('board_view_total', result='hit')
+            return view
+        with self._lock:
+            view = self._view
+            if not self._fresh(view, key):
+                view = self._build(key, df)
+            elif self._expiring():
+                view = self._expire(view)
+            else:                                   # 等锁期间别的会话刚建好 / 刚处理完到期
+                metrics.inc('board_view_total', result='hit')
+            self._view = view
+            return view
@@ -0,0 +1,157 @@
+"""收益与资金分配：把限额、锁仓和到期时间换成数字，整列计算投入一笔钱的预计收益。
+
+每个 offer 的单位收益 = APY × 计息天数 / 365，其中计息天数为期限 [现在, 现在 + horizon_days]
+与活动 [开始, 结束] 重叠的天数；没有结束时间的计到期限末，没有开始时间的从现在起算。
+单个 offer 的收益 = min(投入, 单账户限额) × 单位收益。
+
+资金分配：在总额不超过投入金额、每个 offer 不超过限额的前提下使总收益最大。
+收益对投入是线性的，所以按单位收益从高到低依次填满限额（贪心）就是最优解；
+排序和累计和只算一次，一组金额用 searchsorted 一次性求出。
+各稳定币按 1:1 计。
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .enrich import EnrichedBoard
+from .metrics import metrics
+from .normalize import COL_APY_VALUE
+
+DAYS_PER_YEAR = 365.0
+DEFAULT_HORIZON_DAYS = 30.0
+
+# 限额 / 锁仓列里表示「不限」「不锁」的写法
+LIMIT_NONE_VALUES = ['', '无', '-', '不限', '无限额']
+LOCK_NONE_VALUES = ['', '否', '无', '-', '活期', '随存随取']
+
+_AMOUNT = re.compile(r'(\d+(?:,\d{3})*(?:\.\d+)?)\s*(万|w|k)?', re.IGNORECASE)
+_LOCK_PERIOD = re.compile(r'(\d+(?:\.\d+)?)\s*(天|日|个月|月|周|年)')
+_UNIT_MULTIPLIERS = {'万': 10000.0, 'w': 10000.0, 'k': 1000.0}
+_PERIOD_DAYS = {'天': 1.0, '日': 1.0, '周': 7.0, '月': 30.0, '个月': 30.0, '年': 365.0}
+
+
+@lru_cache(maxsize=8192)
+def parse_limit_text(text: str) -> float:
+    """「5000 USDT」-> 5000，「1万U」-> 10000；不限额（或没有数字）为 inf。"""
+    s = text.strip()
+    m = _AMOUNT.search(s) if s not in LIMIT_NONE_VALUES else None
+    if m is None:
+        return np.inf
+    value = float(m.group(1).replace(',', ''))
+    return value * _UNIT_MULTIPLIERS.get((m.group(2) or '').lower(), 1.0)
+
+
+@lru_cache(maxsize=8192)
+def parse_lock_text(text: str) -> float:
+    """锁仓天数：「否」-> 0，「锁仓30天」-> 30，「3个月」-> 90；只写「是」为 NaN（锁到活动结束）。"""
+    s = text.strip()
+    if s in LOCK_NONE_VALUES:
+        return 0.0
+    m = _LOCK_PERIOD.search(s)
+    return float(m.group(1)) * _PERIOD_DAYS[m.group(2)] if m else np.nan
+
+
+def _map_text(values: pd.Series, parse) -> np.ndarray:
+    """按不同的原始文字逐个解析（带缓存），再按行取值；缺失值当作空字符串。"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    mapped = np.array([parse(str(u)) for u in uniques] + [parse('')], dtype=float)
+    return mapped[codes]
+
+
+@dataclass(frozen=True)
+class YieldTerms:
+    """按 board 行对齐的数值化条款。"""
+
+    rate: np.ndarray          # APY（小数，12% -> 0.12）
+    cap: np.ndarray           # 单账户限额，inf 为不限
+    days: np.ndarray          # 期限内可计息的天数
+    lock_days: np.ndarray     # 锁仓天数，0 为活期；锁到活动结束的为从现在到结束的天数（没有结束时间为 inf）
+
+    @property
+    def unit_return(self) -> np.ndarray:
+        """每投入 1 个单位在期限内的收益。"""
+        return self.rate * self.days / DAYS_PER_YEAR
+
+    def __len__(self) -> int:
+        return len(self.rate)
+
+
+@dataclass(frozen=True)
+class Allocation:
+    amounts: np.ndarray       # 每个 offer 分到的金额（按 board 行对齐）
+    returns: np.ndarray       # 每个 offer 的预计收益
+    invested: float
+    total_return: float
+
+
+def yield_terms(enriched: EnrichedBoard, *, horizon_days: float = DEFAULT_HORIZON_DAYS) -> YieldTerms:
+    df, columns, countdown = enriched.board.df, enriched.board.columns, enriched.countdown
+    empty = pd.Series(np.nan, index=df.index)
+    cap = _map_text(df[columns.limit] if columns.limit in df.columns else empty, parse_limit_text)
+    lock = _map_text(df[columns.lock] if columns.lock in df.columns else empty, parse_lock_text)
+
+    day_ms = 86400000.0
+    now_ms = enriched.now.timestamp() * 1000
+    end_ms = np.where(np.isnan(countdown.end_ms), np.inf, countdown.end_ms)     # 没有结束时间：不限
+    # 计息区间 = [max(开始, 现在), min(结束, 现在 + 期限)]；期限内还没开始的 offer 只算开始之后的天数
+    accrue_from = np.fmax(countdown.start_ms, now_ms)
+    accrue_to = np.minimum(end_ms, now_ms + horizon_days * day_ms)
+    # 「锁到活动结束」的锁仓天数和期限一样从现在算起
+    to_end = np.maximum(0.0, (end_ms - now_ms) / day_ms)
+    return YieldTerms(
+        rate=df[COL_APY_VALUE].to_numpy(dtype=float) / 100,
+        cap=cap,
+        days=np.maximum(0.0, (accrue_to - accrue_from) / day_ms),
+        lock_days=np.where(np.isnan(lock), to_end, lock),
+    )
+
+
+def offer_returns(terms: YieldTerms, amounts) -> np.ndarray:
+    """每个金额全部投入单个 offer 的收益，形状 (金额数, offer 数)。"""
+    amounts = np.asarray(amounts, dtype=float)
+    return np.minimum.outer(amounts, terms.cap) * terms.unit_return
+
+
+class _Plan:
+    """按单位收益从高到低排好的可投 offer 和限额累计和（同一份 terms 可复用）。"""
+
+    def __init__(self, terms: YieldTerms, top: float, max_lock_days: float):
+        unit = terms.unit_return
+        eligible = np.flatnonzero((unit > 0) & (terms.lock_days <= max_lock_days))
+        self.order = eligible[np.argsort(-unit[eligible], kind='stable')]
+        self.unit = unit[self.order]
+        self.caps = np.minimum(terms.cap[self.order], top)      # 不限额的按最大金额计，避免 inf
+        self.filled = np.cumsum(self.caps)
+        self.gained = np.cumsum(self.caps * self.unit)
+
+
+def best_returns(terms: YieldTerms, amounts, *, max_lock_days: float = np.inf) -> np.ndarray:
+    """一组金额各自的最优总收益（贪心分配）。"""
+    amounts = np.asarray(amounts, dtype=float)
+    with metrics.timed('allocate') as t:
+        plan = _Plan(terms, float(amounts.max(initial=0.0)), max_lock_days)
+        t.rows = len(terms)
+        if not len(plan.order):
+            return np.zeros_like(amounts)
+        k = np.searchsorted(plan.filled, amounts, side='right')    # 填满的 offer 个数
+        done_amount = np.where(k > 0, plan.filled[np.maximum(k - 1, 0)], 0.0)
+        done_return = np.where(k > 0, plan.gained[np.maximum(k - 1, 0)], 0.0)
+        next_unit = np.where(k < len(plan.unit), plan.unit[np.minimum(k, len(plan.unit) - 1)], 0.0)
+        return done_return + (amounts - done_amount) * next_unit
+
+
+def allocate(terms: YieldTerms, amount: float, *, max_lock_days: float = np.inf) -> Allocation:
+    """把 amount 分配到各 offer，使期限内总收益最大。"""
+    with metrics.timed('allocate') as t:
+        plan = _Plan(terms, amount, max_lock_days)
+        t.rows = len(terms)
+        before = plan.filled - plan.caps
+        amounts = np.zeros(len(terms))
+        amounts[plan.order] = np.clip(amount - before, 0.0, plan.caps)
+        returns = amounts * terms.unit_return
+        return Allocation(amounts=amounts, returns=returns,
+                          invested=float(amounts.sum()), total_return=float(returns.sum()))
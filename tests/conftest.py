@@ -0,0 +1,33 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from pipeline import read_sheet
+from tools import sheet_stub, webhook_stub
+
+
+@pytest.fixture
+def sample_df():
+    """tools/sample_sheet.csv 解析后的 DataFrame。"""
+    return read_sheet(Path(sheet_stub.DEFAULT_CSV).read_bytes())
+
+
+@pytest.fixture
+def sheet(tmp_path):
+    """本地表格替身，提供 tools/sample_sheet.csv 的副本（改 server.csv_path 即模拟表格改动），用完关闭。"""
+    csv_path = tmp_path / 'sheet.csv'
+    shutil.copy(sheet_stub.DEFAULT_CSV, csv_path)
+    server = sheet_stub.serve(str(csv_path))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def hook():
+    """本地 webhook 接收端替身，用完关闭。"""
+    server = webhook_stub.serve()
+    yield server
+    server.shutdown()
+    server.server_close()
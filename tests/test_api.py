@@ -0,0 +1,58 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from pipeline import normalize, read_sheet
+from pipeline.api import OfferApi, _encode
+
+SAMPLE = Path(__file__).resolve().parent.parent / 'tools' / 'sample_sheet.csv'
+GZIP = {'accept-encoding': 'gzip, br'}
+
+
+@pytest.fixture(scope='module')
+def api():
+    api = OfferApi()
+    api.update(normalize(read_sheet(SAMPLE.read_bytes())), time.time())
+    return api
+
+
+def test_gzip_and_identity_have_their_own_etag(api):
+    plain = api.handle('GET', '/offers', {})
+    gz = api.handle('GET', '/offers', GZIP)
+    assert plain.status == gz.status == 200
+    assert gz.encoding == 'gzip' and gz.etag == plain.etag[:-1] + '-gz"'
+    assert plain.vary and gz.vary
+
+
+@pytest.mark.parametrize('headers', [{}, GZIP])
+def test_not_modified_carries_the_variant_validator(api, headers):
+    full = api.handle('GET', '/offers', headers)
+    cached = api.handle('GET', '/offers', {**headers, 'if-none-match': full.etag})
+    assert cached.status == 304
+    assert cached.etag == full.etag and cached.vary
+    head = _encode(cached, False, True).decode('latin-1')
+    assert f'ETag: {full.etag}' in head and 'Vary: Accept-Encoding' in head
+    assert 'Content-Encoding' not in head
+
+
+def test_validator_of_the_other_variant_does_not_match(api):
+    gz = api.handle('GET', '/offers', GZIP)
+    assert api.handle('GET', '/offers', {'if-none-match': gz.etag}).status == 200
+
+
+def test_if_none_match_star(api):
+    response = api.handle('GET', '/offers', {**GZIP, 'if-none-match': '*'})
+    assert response.status == 304 and response.etag.endswith('-gz"')
+
+
+def test_unexpected_error_returns_500(api, monkeypatch, caplog):
+    def boom(*args):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr('pipeline.api.select', boom)
+    response = api.handle('GET', '/offers?limit=3', {})
+    assert response.status == 500 and b'internal error' in response.body
+    assert _encode(response, False, True).startswith(b'HTTP/1.1 500 Internal Server Error\r\n')
+    assert 'boom' in caplog.text
+    assert api.handle('GET', '/healthz', {}).status == 200
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from pipeline import enrich, normalize, render_table
+from pipeline.apy import ApyParseError, parse_apy_text, parse_apy_values
+from pipeline.normalize import COL_APY_MAX, COL_APY_MIN, COL_APY_VALUE, COL_QUARANTINE_REASON
+from pipeline.timeparse import APP_TZ
+
+NOW = pd.Timestamp('2026-01-20 12:00', tz=APP_TZ)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('12%', (12, 12, 12)),
+    ('12', (12, 12, 12)),
+    (' 3.5 % ', (3.5, 3.5, 3.5)),
+    ('5%-8%', (5, 8, 8)),
+    ('5~10%', (5, 10, 10)),
+    ('10%至5%', (5, 10, 10)),
+    ('５％～８％', (5, 8, 8)),                # 全角
+    ('最高10%', (10, 10, 10)),
+    ('基础 2%，最高 10%', (2, 10, 10)),
+    ('up to 15%', (15, 15, 15)),
+    ('阶梯 8%/5%', (5, 8, 8)),
+    ('前1000U 8%，超出部分 3%', (3, 8, 8)),
+])
+def test_parse_apy_text(text, expected):
+    v = parse_apy_text(text)
+    assert (v.min, v.max, v.headline) == expected
+
+
+@pytest.mark.parametrize('text, reason', [
+    ('', '空白'),
+    ('  ', '空白'),
+    ('-', '空白'),
+    ('待定', '空白'),
+    ('敬请期待', '无法识别'),
+    ('abc', '无法识别'),
+])
+def test_parse_apy_text_rejects_blank_and_garbage(text, reason):
+    with pytest.raises(ApyParseError, match=reason):
+        parse_apy_text(text)
+
+
+def test_parse_apy_values_by_column():
+    values = pd.Series(['5%-8%', None, '最高10%', '5%-8%', 'abc'], index=[10, 11, 12, 13, 14])
+    got = parse_apy_values(values)
+    assert got.index.tolist() == [10, 11, 12, 13, 14]
+    assert got['headline'][10] == 8 and got['headline'][12] == 10
+    assert got['min'][10] == 5 and got['max'][13] == 8
+    assert got['headline'].isna().tolist() == [False, True, False, False, True]
+    assert got['error'].fillna('').tolist() == ['', '空白', '', '', '无法识别']
+
+
+def test_bad_rows_are_quarantined_and_the_rest_still_renders():
+    df = pd.DataFrame({
+        '平台': ['Binance', 'OKX', 'Bybit', 'Gate', 'HTX', 'MEXC'],
+        '币种': ['USDT', 'USDC', 'USDT', '亮亮币', 'USDT', 'FDUSD'],
+        '年化（APY）': ['5%-8%', '', '最高10%', '待定', '待定', '阶梯 8%/5%'],
+    })
+    board = normalize(df)
+    assert board.df['平台'].tolist() == ['Binance', 'Bybit', 'MEXC']
+    assert board.df[COL_APY_VALUE].tolist() == [8, 10, 8]
+    assert board.df[COL_APY_MIN].tolist() == [5, 10, 5]
+    assert board.df[COL_APY_MAX].tolist() == [8, 10, 8]
+    # 不展示的币种（亮亮币）即使 APY 无法识别也不进隔离列表
+    assert board.quarantine['平台'].tolist() == ['OKX', 'HTX']
+    assert board.quarantine[COL_QUARANTINE_REASON].tolist() == ['空白', '空白']
+    assert board.best_offer()['平台'] == 'Bybit'
+
+    html = render_table(enrich(board, NOW), mode='html')
+    assert 'Binance' in html and 'MEXC' in html and 'OKX' not in html
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from pipeline import DiffEngine, WebhookSink, normalize
+from tools import webhook_stub
+
+COLUMNS = ['平台', '币种', '年化（APY）', '结束时间', '单个账户限额', '理财链接']
+
+
+def _board(rows):
+    return normalize(pd.DataFrame(rows, columns=COLUMNS))
+
+
+BASE = [
+    ['Binance', 'USDT', '10%', '2026-02-01 00:00', '5000 USDT', 'https://a'],
+    ['OKX', 'USDC', '8%', '2026-02-01 00:00', '1000 USDC', 'https://b'],
+]
+
+
+def test_webhook_receives_the_change_events(hook):
+    engine = DiffEngine([WebhookSink(hook.url)])
+    assert engine.observe(_board(BASE), at=1.0) == []
+    assert engine.observe(_board(BASE), at=2.0) == []
+    assert hook.received == []                      # 基准和未变化的数据都不推送
+
+    engine.observe(_board([
+        ['Binance', 'USDT', '12%', '2026-02-01 00:00', '5000 USDT', 'https://a'],
+        ['Bybit', 'USDT', '15%', '2026-02-01 00:00', '', 'https://c'],
+    ]), at=3.0)
+    assert engine.sink_errors == {}
+    [payload] = hook.received
+    events = {(e['kind'], e['platform']): e for e in payload['events']}
+    assert set(events) == {('apy_changed', 'Binance'), ('added', 'Bybit'), ('removed', 'OKX')}
+    changed = events['apy_changed', 'Binance']
+    assert (changed['old'], changed['new'], changed['delta'], changed['at']) == ('10%', '12%', 2.0, 3.0)
+    assert events['added', 'Bybit']['new'] == '15%'
+
+
+def test_webhook_failure_is_recorded_not_raised():
+    server = webhook_stub.serve(status=500)
+    try:
+        engine = DiffEngine([WebhookSink(server.url)])
+        engine.observe(_board(BASE), at=1.0)
+        events = engine.observe(_board(BASE[:1]), at=2.0)
+        assert [e.kind for e in events] == ['removed']
+        assert len(server.received) == 1
+        assert 'WebhookSink' in engine.sink_errors
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,31 @@
+import pytest
+
+from pipeline import export
+
+
+def test_export_fetches_each_source_once(sheet, tmp_path):
+    out = tmp_path / 'public'
+    assert export.main(['--out', str(out), '--source', sheet.url, '--no-brotli']) == 0
+    assert sheet.stats['requests'] == 1
+    names = {p.name for p in out.iterdir()}
+    assert {'index.html', 'index.html.gz'} <= names
+    assert any(n.startswith('data.') and n.endswith('.json.gz') for n in names)
+    assert not any(n.endswith('.br') for n in names)
+
+
+def test_export_falls_back_to_stored_snapshot(sheet, tmp_path):
+    args = ['--out', str(tmp_path / 'public'), '--source', sheet.url, '--no-brotli',
+            '--snapshot-db', str(tmp_path / 'sheets.sqlite3')]
+    assert export.main(args) == 0
+    sheet.set_fault('error')
+    assert export.main(args) == 0
+    assert sheet.stats['faults'] >= 1         # 抓取失败（含重试），页面用本地快照导出
+
+
+def test_brotli_requested_but_missing(sheet, tmp_path, monkeypatch):
+    monkeypatch.setattr(export, 'brotli', None)
+    with pytest.raises(SystemExit):
+        export.main(['--out', str(tmp_path / 'public'), '--source', sheet.url])
+    assert sheet.stats['requests'] == 0
+    with pytest.raises(RuntimeError, match='brotli'):
+        export.precompress(tmp_path / 'missing.json')
@@ -0,0 +1,124 @@
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from pipeline import (CircuitBreaker, CircuitOpenError, FetchPolicy, SheetParseError, SheetRefresher,
+                      fetch_snapshot)
+from pipeline.fetch import HTTPStatusError, TruncatedResponse
+from tools import sheet_stub
+
+
+def test_parse_errors_do_not_open_the_breaker(sheet):
+    refresher = SheetRefresher(sheet.url)
+    assert refresher.refresh()
+    good = refresher.snapshot()
+
+    Path(sheet.csv_path).write_bytes(b'<html><body>Sign in</body></html>')
+    for _ in range(refresher.breaker.failure_threshold + 1):
+        with pytest.raises(SheetParseError):
+            refresher.refresh()
+    assert refresher.breaker.state == 'closed'
+    assert refresher.snapshot() is good
+    assert sheet.stats['faults'] == 0 and sheet.stats['full'] == 5     # 每次都真的访问了上游
+
+
+def test_not_modified_reuses_the_parsed_frame(sheet):
+    refresher = SheetRefresher(sheet.url)
+    assert refresher.refresh()
+    first = refresher.snapshot()
+    assert not refresher.refresh()
+    assert sheet.stats['not_modified'] == 1
+    assert refresher.snapshot().version == first.version
+    assert refresher.snapshot().df is first.df
+
+
+def test_unchanged_body_without_validators_skips_parsing(tmp_path):
+    csv_path = tmp_path / 'sheet.csv'
+    csv_path.write_bytes(Path(sheet_stub.DEFAULT_CSV).read_bytes())
+    server = sheet_stub.serve(str(csv_path), validators=False)
+    try:
+        refresher = SheetRefresher(server.url)
+        assert refresher.refresh()
+        first = refresher.snapshot()
+        assert not refresher.refresh()
+        assert server.stats['full'] == 2 and server.stats['not_modified'] == 0
+        assert refresher.snapshot().df is first.df
+
+        csv_path.write_bytes(csv_path.read_bytes() + '\nNew,USDT,9%,,,,,,,\n'.encode('utf-8'))
+        assert refresher.refresh()
+        assert refresher.snapshot().version == first.version + 1
+        assert len(refresher.snapshot().df) == len(first.df) + 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_background_refresher_serves_while_revalidating(sheet):
+    refresher = SheetRefresher(sheet.url, interval=0.05)
+    try:
+        df = refresher.load()
+        deadline = time.monotonic() + 5
+        while sheet.stats['not_modified'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert sheet.stats['not_modified'] >= 2
+        assert refresher.load() is df
+        assert not refresher.is_stale()
+    finally:
+        refresher.stop()
+
+
+FAST = FetchPolicy(connect_timeout=1.0, read_timeout=0.3, retries=0, backoff=0.0)
+
+
+@pytest.mark.parametrize('fault, error', [
+    ('stall', TimeoutError),
+    ('drip', TimeoutError),
+    ('truncate', TruncatedResponse),
+    ('error', HTTPStatusError),
+])
+def test_faults_fail_within_the_deadline(sheet, fault, error):
+    sheet.stall = 5.0
+    sheet.set_fault(fault)
+    started = time.monotonic()
+    with pytest.raises(error):
+        fetch_snapshot(sheet.url, policy=FAST)
+    assert time.monotonic() - started < 2.0
+
+
+def test_transient_errors_are_retried(sheet):
+    sheet.set_fault('error', 2)
+    snap = fetch_snapshot(sheet.url, policy=replace(FAST, retries=2))
+    assert len(snap.df)
+    assert sheet.stats['faults'] == 2 and sheet.stats['full'] == 1
+
+
+def test_breaker_opens_probes_and_closes(sheet):
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=lambda: now[0])
+    refresher = SheetRefresher(sheet.url, policy=FAST, breaker=breaker)
+    assert refresher.refresh()
+    good = refresher.snapshot()
+
+    sheet.set_fault('error')
+    for _ in range(2):
+        with pytest.raises(HTTPStatusError):
+            refresher.refresh()
+    assert breaker.state == 'open'
+    requests = sheet.stats['requests']
+    with pytest.raises(CircuitOpenError):
+        refresher.refresh()
+    assert sheet.stats['requests'] == requests          # 熔断期间不访问上游
+    assert refresher.snapshot() is good
+
+    now[0] = 10.0                                       # 冷却结束：放行一个试探请求，失败后冷却翻倍
+    assert breaker.state == 'half_open'
+    with pytest.raises(HTTPStatusError):
+        refresher.refresh()
+    assert breaker.state == 'open' and breaker.retry_in() == pytest.approx(20.0)
+
+    now[0] = 30.0
+    sheet.set_fault(None)
+    assert not refresher.refresh()                      # 试探成功（304）
+    assert breaker.state == 'closed' and breaker.retry_in() is None
@@ -0,0 +1,88 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import HistoryStore, normalize
+from pipeline.history import GONE, _decode_block, _encode_block, resample
+
+
+def _board(rows):
+    return normalize(pd.DataFrame(rows, columns=['平台', '币种', '年化（APY）']))
+
+
+def _rows(store, table):
+    with sqlite3.connect(store.path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_block_round_trip():
+    t = np.array([1_700_000_000, 1_700_000_060, 1_700_003_600, 1_700_090_000], dtype=np.int64)
+    apy = np.array([1250, GONE, 800, 1250], dtype=np.int64)
+    got_t, got_apy = _decode_block(int(t[0]), len(t), _encode_block(t, apy))
+    assert got_t.tolist() == t.tolist() and got_apy.tolist() == apy.tolist()
+
+
+def test_resample_keeps_the_bucket_maximum():
+    t = np.array([10, 12, 14, 25])
+    v = np.array([1.0, 9.0, 1.0, 3.0])
+    # 桶 [0,10) 还没有数据；[10,20) 里的尖峰 9 保留；[20,30) 以进入桶时的 1 和桶内的 3 取最高
+    assert resample(t, v, 0, 30, 3).tolist() == pytest.approx([np.nan, 9.0, 3.0], nan_ok=True)
+    # 没有新点的桶沿用进入时的值
+    assert resample(np.array([0]), np.array([5.0]), 0, 30, 3).tolist() == [5.0, 5.0, 5.0]
+
+
+def test_read_across_blocks_and_tail_with_carry_in(tmp_path):
+    store = HistoryStore(tmp_path / 'history.sqlite3', block_size=3)
+    for i, apy in enumerate([5, 6, 7, 8, 9, 10, 11]):
+        store.record(_board([['Binance', 'USDT', f'{apy}%']]), at=100 * (i + 1))
+    assert _rows(store, 'history_blocks') == 2 and _rows(store, 'history_tail') == 1
+
+    full = store.series('Binance', 'USDT', 0, 1000)
+    assert full.tolist() == [5, 6, 7, 8, 9, 10, 11]
+    # 从 450 开始：带上之前最后一个点（400 时的 8）作为起始值，跨越第二个块和 tail
+    part = store.series('Binance', 'USDT', 450, 650)
+    assert part.tolist() == [8, 9, 10]
+    assert [int(ts.timestamp()) for ts in part.index] == [400, 500, 600]
+
+
+def test_gone_and_reappear(tmp_path):
+    store = HistoryStore(tmp_path / 'history.sqlite3')
+    both = [['Binance', 'USDT', '10%'], ['OKX', 'USDC', '8%']]
+    assert store.record(_board(both), at=100) == 2
+    assert store.record(_board(both), at=150) == 0                 # 没有变化不写
+    assert store.record(_board(both[:1]), at=200) == 1             # OKX 下架
+    assert store.record(_board(both[:1]), at=250) == 0
+    assert store.record(_board(both), at=300) == 1                 # 重新出现
+    okx = store.series('OKX', 'USDC', 0, 400)
+    assert okx.tolist() == pytest.approx([8, np.nan, 8], nan_ok=True)
+    assert store.series('Binance', 'USDT', 0, 400).tolist() == [10]
+
+
+def test_rewrites_at_the_same_time_do_not_count_towards_a_block(tmp_path):
+    store = HistoryStore(tmp_path / 'history.sqlite3', block_size=2)
+    store.record(_board([['Binance', 'USDT', '5%']]), at=100)
+    store.record(_board([['Binance', 'USDT', '6%']]), at=100)      # 覆盖同一时间的点
+    assert _rows(store, 'history_blocks') == 0 and _rows(store, 'history_tail') == 1
+    store.record(_board([['Binance', 'USDT', '7%']]), at=200)
+    assert _rows(store, 'history_blocks') == 1 and _rows(store, 'history_tail') == 0
+    assert store.series('Binance', 'USDT', 0, 300).tolist() == [6, 7]
+
+
+def test_two_instances_share_one_file(tmp_path):
+    path = tmp_path / 'history.sqlite3'
+    a, b = HistoryStore(path), HistoryStore(path)
+    assert a.record(_board([['Binance', 'USDT', '5%']]), 100) == 1
+    # b 还没读过 a 写的序列：同一份数据不再重复写，新 offer 的编号由库分配
+    assert b.record(_board([['Binance', 'USDT', '5%'], ['OKX', 'USDC', '7%']]), 100) == 1
+    assert b.record(_board([['OKX', 'USDC', '7%'], ['Bybit', 'USDT', '6%']]), 200) == 2    # Bybit 新增，Binance 消失
+    assert _rows(a, 'history_series') == 3 and _rows(a, 'history_dict') == 5
+
+    version = a.version
+    assert a.keys() == [('Binance', 'USDT'), ('Bybit', 'USDT'), ('OKX', 'USDC')]
+    assert a.version > version
+    assert np.isnan(a.series('Binance', 'USDT', 0, 300).iloc[-1])
+    assert a.trends(300, days=1, points=3)[('Bybit', 'USDT')] == ',,6'
+    # a 已同步到 b 的写入：同一份数据不再写
+    assert a.record(_board([['OKX', 'USDC', '7%'], ['Bybit', 'USDT', '6%']]), 300) == 0
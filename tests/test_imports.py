@@ -0,0 +1,20 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_pipeline_works_without_pyarrow():
+    # sys.modules 里设为 None 等同于没有安装
+    script = (
+        "import sys; sys.modules['pyarrow'] = None\n"
+        "from pipeline import enrich, normalize, open_shared_cache, read_sheet\n"
+        "from pipeline.ingest import DEFAULT_ENGINE\n"
+        "assert DEFAULT_ENGINE == 'c', DEFAULT_ENGINE\n"
+        "assert open_shared_cache('shared-dir') is None\n"
+        "board = normalize(read_sheet(open('tools/sample_sheet.csv', 'rb').read()))\n"
+        "assert len(enrich(board).board.df)\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from pipeline import RenderCache, enrich, normalize, render_table
+from pipeline.render import LRUCache, build_render_frame
+from pipeline.timeparse import APP_TZ
+
+NOW = pd.Timestamp('2026-01-20 12:00', tz=APP_TZ)
+
+
+@pytest.fixture
+def cache():
+    return RenderCache()
+
+
+def _enriched(df):
+    return enrich(normalize(df), NOW)
+
+
+def test_identical_snapshot_hits_the_document_cache(sample_df, cache):
+    first = render_table(_enriched(sample_df), mode='html', cache=cache)
+    rows = len(cache.rows)
+    again = render_table(_enriched(sample_df.copy()), mode='html', cache=cache)
+    assert again is first
+    assert cache.documents.hits == 1 and cache.rows.hits == 0 and len(cache.rows) == rows
+
+
+def test_one_row_edit_renders_one_row(sample_df, cache):
+    render_table(_enriched(sample_df), mode='html', cache=cache)
+    edited = sample_df.copy()
+    edited.loc[0, '年化（APY）'] = '99%'
+    html = render_table(_enriched(edited), mode='html', cache=cache)
+    rendered = len(normalize(edited).df)
+    assert cache.rows.misses == rendered + 1           # 第一次全部未命中，第二次只有改动的那一行
+    assert cache.rows.hits == rendered - 1
+    assert '99%' in html
+
+
+def test_json_payload_is_cached_by_content(sample_df, cache):
+    first = render_table(_enriched(sample_df), mode='json', cache=cache)
+    assert render_table(_enriched(sample_df.copy()), mode='json', cache=cache) is first
+    assert cache.payloads.hits == 1
+
+
+def test_forget_rows_only_drops_those_fragments(sample_df, cache):
+    enriched = _enriched(sample_df)
+    render_table(enriched, mode='html', cache=cache)
+    total = len(cache.rows)
+    gone = enriched.take([0, 1])
+    columns = gone.board.columns.as_dict()
+    frame = build_render_frame(gone.board.df, columns, gone.countdown, gone.trend, gone.badge)
+    assert cache.forget_rows(frame, columns) == 2
+    assert len(cache.rows) == total - 2
+
+
+def test_lru_evicts_the_least_recently_used():
+    lru = LRUCache(2)
+    lru.put('a', 1)
+    lru.put('b', 2)
+    assert lru.get('a') == 1
+    lru.put('c', 3)
+    assert lru.get('b') is None and lru.get('a') == 1 and lru.get('c') == 3
+    assert len(lru) == 2 and (lru.hits, lru.misses) == (3, 1)
+    assert lru.get_many(['a', 'x']) == [1, None]
+    assert lru.discard(['a', 'x']) == 1 and len(lru) == 1
@@ -0,0 +1,109 @@
+import math
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import ExpiryScheduler, RenderCache, ViewCache, enrich, normalize, parse_quiet_hours
+from pipeline.timeparse import APP_TZ
+
+NOON = pd.Timestamp('2026-01-20 12:00', tz=APP_TZ).timestamp()
+
+
+def _at(text):
+    return pd.Timestamp(text, tz=APP_TZ).timestamp()
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1-7', (1, 7)),
+    (' 23-6 ', (23, 6)),
+    ('0-23', (0, 23)),
+    ('', None),
+    ('  ', None),
+])
+def test_parse_quiet_hours(text, expected):
+    assert parse_quiet_hours(text) == expected
+
+
+@pytest.mark.parametrize('text', ['7', 'a-b', '3-3', '1-24', '-1-5'])
+def test_parse_quiet_hours_rejects(text):
+    with pytest.raises(ValueError):
+        parse_quiet_hours(text)
+
+
+def test_heap_load_and_pop():
+    s = ExpiryScheduler(clock=lambda: NOON)
+    s.load([math.nan, (NOON - 1) * 1000, (NOON + 10) * 1000, (NOON + 5) * 1000])
+    assert len(s) == 2 and s.next_deadline() == NOON + 5      # 没有结束时间和已经过去的不入堆
+    assert not s.due() and s.pop_expired() == []
+    assert s.due(NOON + 5)
+    assert s.pop_expired(NOON + 6) == [3]
+    assert s.pop_expired(NOON + 20) == [2] and len(s) == 0 and s.next_deadline() is None
+
+
+def _interval(ends=(), now=NOON, **kwargs):
+    s = ExpiryScheduler(base_interval=60, min_interval=15, max_interval=900, window=600, busy=3,
+                        clock=lambda: now, **kwargs)
+    s.load(np.array([now + e for e in ends], dtype=float) * 1000)
+    return s.next_interval()
+
+
+@pytest.mark.parametrize('ends, expected', [
+    ((100, 200, 300, 5000), 15),        # 近期到期的多
+    ((20, 5000), 21),                   # 马上有 offer 到期：到期后抓一次
+    ((5, 5000), 15),                    # 不低于 min_interval
+    ((300,), 60),                       # 近期有到期但还早：正常节奏
+    ((), 900),                          # 没有到期：放慢
+    ((700,), 701),                      # 放慢，但不晚于下一个到期
+    ((601,), 602),
+])
+def test_next_interval(ends, expected):
+    assert _interval(ends) == pytest.approx(expected)
+
+
+def test_quiet_hours_wait_until_the_end():
+    night = _at('2026-01-20 02:00')
+    assert _interval(now=night, quiet_hours=(1, 7)) == pytest.approx(5 * 3600)
+    # 安静时段里有 offer 到期：到期后抓一次
+    assert _interval((3600,), now=night, quiet_hours=(1, 7)) == pytest.approx(3601)
+    # 近期有到期时不受安静时段影响
+    assert _interval((20,), now=night, quiet_hours=(1, 7)) == pytest.approx(21)
+    # 跨零点的时段
+    assert _interval(now=_at('2026-01-20 23:30'), quiet_hours=(23, 6)) == pytest.approx(6.5 * 3600)
+    assert _interval(now=NOON, quiet_hours=(23, 6)) == 900
+
+
+def _sheet(ends):
+    return pd.DataFrame({
+        '平台': ['Binance', 'OKX', 'Bybit'],
+        '币种': ['USDT', 'USDC', 'FDUSD'],
+        '年化（APY）': ['10%', '8%', '12%'],
+        '结束时间': ends,
+    })
+
+
+@pytest.mark.parametrize('mode', ['json', 'html'])
+def test_view_drops_expired_rows_without_rebuilding(mode):
+    now = time.time()
+    clock = [now]
+    fmt = '%Y-%m-%d %H:%M'
+    local = pd.Timestamp(now, unit='s', tz=APP_TZ).floor('min')
+    df = _sheet([(local + pd.Timedelta(hours=1)).strftime(fmt), '', (local + pd.Timedelta(hours=2)).strftime(fmt)])
+    scheduler = ExpiryScheduler(clock=lambda: clock[0])
+    views = ViewCache(mode=mode, max_age=3600, scheduler=scheduler, cache=RenderCache())
+    first = views.get(df)
+    assert first.board.df['平台'].tolist() == ['Binance', 'OKX', 'Bybit'] and len(scheduler) == 2
+
+    # 刷新线程按另一种行序装载了堆：到期的行仍按视图自己的结束时间判断
+    end_ms = enrich(normalize(df)).countdown.end_ms
+    scheduler.load(end_ms[::-1])
+    clock[0] = end_ms[0] / 1000 + 1
+    second = views.get(df)
+    assert second is not first and second.key == first.key
+    assert second.board.df['平台'].tolist() == ['OKX', 'Bybit']
+    assert 'Binance' not in second.payload and 'Bybit' in second.payload
+    assert views.get(df) is second                      # 没有新的到期：命中
+
+    clock[0] = end_ms[2] / 1000 + 1
+    assert views.get(df).board.df['平台'].tolist() == ['OKX']
@@ -0,0 +1,106 @@
+
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pipeline import (DiffEngine, MultiSheetRefresher, SheetSource, merge_frames, normalize, open_shared_cache,
+                      open_store, parse_sources, read_sheet)
+
+
+def _sheet(text):
+    return read_sheet(text.encode('utf-8'))
+
+
+FIRST = _sheet(
+    '平台,币种,年化（APY）,开始时间,结束时间\n'
+    'Binance,USDT,10%,1月1日,2月1日\n'
+    'Binance,USDT,12%,1月1日,3月1日\n'           # 同一数据源内的重复保留
+    'OKX,USDC,8%,1月2日,2月2日\n'
+)
+SECOND = _sheet(
+    '平台,币种,年化（APY）,活动开始时间,结束时间\n'
+    ' binance ,usdt,20%,1月5日,2月5日\n'        # 与第一个数据源重复（忽略空白和大小写）
+    'Bybit,FDUSD,15%,1月6日,2月6日\n'
+)
+
+
+def test_earlier_source_wins_and_start_columns_are_unified():
+    merged = merge_frames([FIRST, SECOND])
+    assert list(merged['平台']) == ['Binance', 'Binance', 'OKX', 'Bybit']
+    assert list(merged['年化（APY）']) == ['10%', '12%', '8%', '15%']
+    assert '活动开始时间' not in merged.columns
+    assert list(merged['开始时间']) == ['1月1日', '1月1日', '1月2日', '1月6日']
+
+
+def test_merged_dtypes():
+    merged = merge_frames([FIRST, SECOND])
+    for col in ('平台', '币种'):
+        assert isinstance(merged[col].dtype, pd.CategoricalDtype)
+        assert set(merged[col].cat.categories) == set(merged[col])
+    assert merged['年化（APY）'].dtype == FIRST['年化（APY）'].dtype
+
+
+def test_single_source_is_returned_as_is():
+    assert merge_frames([FIRST]) is FIRST
+
+
+def test_parse_sources():
+    sources = parse_sources('abc:12, https://example.com/x.csv,,def')
+    assert [s.url for s in sources] == [
+        'https://docs.google.com/spreadsheets/d/abc/export?format=csv&gid=12',
+        'https://example.com/x.csv',
+        'https://docs.google.com/spreadsheets/d/def/export?format=csv',
+    ]
+
+
+class ListSink:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, events):
+        self.events.extend(events)
+
+
+def test_only_the_fetching_replica_emits(sheet, tmp_path):
+    """两个副本共用一个共享缓存：同一次变化只有实际下载的进程以 upstream=True 收到并发出事件。"""
+    pytest.importorskip('pyarrow')
+    replicas = []
+    for _ in range(2):
+        sink, calls = ListSink(), []
+        engine = DiffEngine([sink])
+
+        def on_change(df, at, upstream, engine=engine, calls=calls):
+            calls.append(upstream)
+            engine.observe(normalize(df), at, emit=upstream)
+
+        refresher = MultiSheetRefresher([SheetSource(sheet.url)], on_change=on_change,
+                                        shared=open_shared_cache(tmp_path / 'shared', ttl=1.0))
+        replicas.append((refresher, engine, sink, calls))
+    (a, a_engine, a_sink, a_calls), (b, b_engine, b_sink, b_calls) = replicas
+
+    a.refresh()
+    b.refresh()
+    assert (a_calls, b_calls) == ([True], [False]) and sheet.stats['full'] == 1
+
+    path = Path(sheet.csv_path)
+    path.write_text(path.read_text(encoding='utf-8').replace('Binance,USDT,12%', 'Binance,USDT,15%', 1),
+                    encoding='utf-8')
+    time.sleep(1.1)                     # 共享缓存过期，下一次刷新由先到的进程下载
+    a.refresh()
+    b.refresh()
+    assert (a_calls, b_calls) == ([True, True], [False, False]) and sheet.stats['full'] == 2
+    assert [e.kind for e in a_sink.events] == ['apy_changed'] and b_sink.events == []
+    assert a_engine.version == b_engine.version == 2       # 徽标两边都更新
+
+
+def test_restored_snapshot_is_not_upstream(sheet, tmp_path):
+    store = open_store(tmp_path / 'snapshots.sqlite3')
+    MultiSheetRefresher([SheetSource(sheet.url)], store=store, on_change=lambda *args: None).refresh()
+    calls = []
+    restored = MultiSheetRefresher([SheetSource(sheet.url)], store=store,
+                                   on_change=lambda df, at, upstream: calls.append(upstream))
+    restored.start()                    # 先用本地存储恢复并通知一次，再在后台线程里抓取
+    restored.stop()
+    assert calls[0] is False
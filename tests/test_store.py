@@ -0,0 +1,66 @@
+import sqlite3
+import time
+
+from pipeline import FetchPolicy, SheetRefresher, SnapshotStore, StoredSnapshot
+from pipeline.fetch import body_digest
+
+
+def _snap(source, body, at, etag=None):
+    return StoredSnapshot(source, body, body_digest(body), at, etag=etag)
+
+
+def _count(store, source):
+    with sqlite3.connect(store.path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM snapshots WHERE source = ?", (source,)).fetchone()[0]
+
+
+def test_keeps_the_latest_five_per_source(tmp_path):
+    store = SnapshotStore(tmp_path / 'sheets.sqlite3')
+    store.save(_snap('other', b'x', 1.0))
+    for i in range(7):
+        store.save(_snap('sheet', f'v{i}'.encode(), float(i)))
+    assert _count(store, 'sheet') == 5
+    assert _count(store, 'other') == 1
+    assert store.latest('sheet').body == b'v6'
+    assert store.latest('missing') is None
+
+
+def test_same_body_only_updates_the_fetch_time(tmp_path):
+    store = SnapshotStore(tmp_path / 'sheets.sqlite3')
+    store.save(_snap('sheet', b'body', 1.0, etag='"a"'))
+    store.save(_snap('sheet', b'body', 2.0, etag='"b"'))
+    latest = store.latest('sheet')
+    assert _count(store, 'sheet') == 1
+    assert (latest.body, latest.fetched_at, latest.etag) == (b'body', 2.0, '"b"')
+
+
+def test_not_modified_refreshes_the_stored_fetch_time(sheet, tmp_path):
+    store = SnapshotStore(tmp_path / 'sheets.sqlite3')
+    refresher = SheetRefresher(sheet.url, store=store)
+    refresher.refresh()
+    first = store.latest(sheet.url).fetched_at
+    time.sleep(0.01)
+    assert not refresher.refresh()
+    assert sheet.stats['not_modified'] == 1
+    assert _count(store, sheet.url) == 1
+    assert store.latest(sheet.url).fetched_at > first
+
+
+def test_cold_start_restores_while_the_sheet_is_down(sheet, tmp_path):
+    store = SnapshotStore(tmp_path / 'sheets.sqlite3')
+    SheetRefresher(sheet.url, store=store).refresh()
+    sheet.shutdown()
+    sheet.server_close()
+
+    policy = FetchPolicy(connect_timeout=0.5, read_timeout=0.5, retries=0)
+    refresher = SheetRefresher(sheet.url, store=store, policy=policy, interval=3600)
+    try:
+        df = refresher.load()                       # 不等网络，直接用本地快照
+        assert len(df) and refresher.snapshot().body == store.latest(sheet.url).body
+        deadline = time.monotonic() + 5
+        while refresher.last_error is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert refresher.last_error is not None     # 后台抓取失败：继续提供旧数据，并标为过期
+        assert refresher.load() is df and refresher.is_stale()
+    finally:
+        refresher.stop()
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from pipeline import compute_countdown, enrich, normalize, parse_time_column
+from pipeline.timeparse import APP_TZ
+
+NOW = pd.Timestamp('2026-01-10 12:00', tz=APP_TZ)
+
+
+def test_all_unparseable_end_column_has_no_countdown():
+    countdown = compute_countdown(pd.Series(['长期', '活期']), now=NOW)
+    assert countdown.end.isna().all()
+    assert np.isnan(countdown.remaining_seconds).all()
+
+
+def test_all_unparseable_start_column():
+    countdown = compute_countdown(pd.Series(['1月20日', '活期']), pd.Series(['即日起', '即日起']), now=NOW)
+    assert countdown.start.dt.tz is not None
+    assert countdown.end[0] == pd.Timestamp('2026-01-20 23:59', tz=APP_TZ)
+    assert countdown.remaining_seconds[0] > 0
+    assert np.isnan(countdown.remaining_seconds[1])
+
+
+def test_unparseable_rows_do_not_break_enrich():
+    df = pd.DataFrame({
+        '平台': ['A', 'B'],
+        '币种': ['USDT', 'USDC'],
+        '年化（APY）': ['5%', '8%'],
+        '结束时间': ['长期', '活期'],
+        '开始时间': ['即日起', '即日起'],
+    })
+    enriched = enrich(normalize(df), NOW)
+    assert not enriched.countdown.has_end.any()
+
+
+def test_mixed_column_keeps_row_alignment():
+    parsed = parse_time_column(pd.Series(['2026-01-24 07:59', None, '长期', '2026-01-24 07:59']),
+                               NOW, is_end=True)
+    assert parsed.dt.tz is not None
+    assert parsed[0] == parsed[3] == pd.Timestamp('2026-01-24 07:59', tz=APP_TZ)
+    assert parsed[[1, 2]].isna().all()
+
+
+def test_hour_without_minutes_is_on_the_hour():
+    end = parse_time_column(pd.Series(['1月24日7点', '2月1日0点', '1月24日7点30', '1月24日']), NOW, is_end=True)
+    assert list(end.dt.strftime('%m-%d %H:%M')) == ['01-24 07:00', '02-01 00:00', '01-24 07:30', '01-24 23:59']
+    start = parse_time_column(pd.Series(['1月5日9点', '1月5日']), NOW, is_end=False)
+    assert list(start.dt.strftime('%H:%M')) == ['09:00', '00:00']
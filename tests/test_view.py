@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from pipeline import DiffEngine, RenderCache, ViewCache, open_history
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """记录 ViewCache 的重建次数。"""
+    count = []
+    original = ViewCache._build
+
+    def build(self, key, df):
+        count.append(key)
+        return original(self, key, df)
+
+    monkeypatch.setattr(ViewCache, '_build', build)
+    return count
+
+
+def test_same_snapshot_shares_one_view(sample_df, builds):
+    views = ViewCache(cache=RenderCache())
+    view = views.get(sample_df)
+    assert views.get(sample_df) is view and views.get(sample_df) is view
+    assert len(builds) == 1
+
+
+def test_rebuilt_when_snapshot_history_or_changes_move(sample_df, builds, tmp_path):
+    history, changes = open_history(tmp_path / 'history.sqlite3'), DiffEngine()
+    views = ViewCache(cache=RenderCache(), history=history, changes=changes)
+    view = views.get(sample_df)
+
+    copy = sample_df.copy()                         # 新的快照对象
+    assert views.get(copy) is not view
+    view = views.get(copy)
+
+    history.version += 1
+    assert views.get(copy) is not view
+    view = views.get(copy)
+
+    changes.version += 1
+    assert views.get(copy) is not view
+    assert len(builds) == 4
+
+
+def test_rebuilt_after_max_age(sample_df, builds):
+    views = ViewCache(cache=RenderCache(), max_age=0.0)
+    views.get(sample_df)
+    views.get(sample_df)
+    assert len(builds) == 2
+
+
+def test_concurrent_sessions_build_once(sample_df, builds):
+    views = ViewCache(cache=RenderCache())
+    barrier = threading.Barrier(8)
+    got = []
+
+    def session():
+        barrier.wait()
+        got.append(views.get(sample_df))
+
+    threads = [threading.Thread(target=session) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(builds) == 1
+    assert len(got) == 8 and all(v is got[0] for v in got)
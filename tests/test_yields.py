@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import enrich, normalize
+from pipeline.timeparse import APP_TZ
+from pipeline.yields import allocate, yield_terms
+
+NOW = pd.Timestamp('2026-01-10 00:00', tz=APP_TZ)
+
+
+def _terms(rows, horizon_days=30):
+    df = pd.DataFrame(rows, columns=['平台', '币种', '年化（APY）', '开始时间', '结束时间', '单个账户限额', '是否锁仓'])
+    return yield_terms(enrich(normalize(df), NOW), horizon_days=horizon_days)
+
+
+def test_accrual_days_are_the_overlap_with_the_horizon():
+    terms = _terms([
+        ['running', 'USDT', '10%', '2026-01-01', '2026-01-20 00:00', '', '否'],    # 还剩 10 天
+        ['later', 'USDT', '10%', '2026-01-30', '2026-03-01 00:00', '', '否'],      # 20 天后开始
+        ['open', 'USDT', '10%', '', '', '', '否'],                                 # 没有起止时间
+        ['future', 'USDT', '10%', '2026-02-15', '2026-03-01 00:00', '', '否'],     # 期限外
+    ])
+    assert terms.days == pytest.approx([10, 10, 30, 0])
+
+
+def test_lock_until_end_is_measured_from_now():
+    terms = _terms([
+        ['later', 'USDT', '10%', '2026-01-30', '2026-02-04 00:00', '', '是'],
+        ['fixed', 'USDT', '8%', '', '2026-01-20 00:00', '', '锁仓7天'],
+        ['flex', 'USDT', '5%', '', '', '', '否'],
+        ['forever', 'USDT', '20%', '', '', '', '是'],
+    ])
+    assert terms.lock_days[:3] == pytest.approx([25, 7, 0])
+    assert np.isinf(terms.lock_days[3])
+    plan = allocate(terms, 1000, max_lock_days=20)
+    assert plan.amounts[0] == 0 and plan.amounts[3] == 0
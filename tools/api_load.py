@@ -0,0 +1,130 @@
+"""JSON 接口（pipeline/api.py）的本地压测。
+
+    python -m tools.api_load --rows 2000 --concurrency 64 --duration 10
+    python -m tools.api_load --url "http://127.0.0.1:8780/offers?sort=apy&limit=50" --etag
+
+不指定 --url 时，先用合成表格启动本地替身服务，再在子进程里启动接口（与压测客户端分开，
+不争抢同一个 GIL）。客户端用 asyncio 保持长连接并发请求，打印吞吐量和延迟分位数。
+--etag 时带上第一次拿到的 ETag（If-None-Match），测 304 路径。
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from tools.sheet_stub import serve as serve_sheet
+from tools.synthetic import make_csv
+
+
+async def _worker(host, port, target, headers, deadline, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    request = (f"GET {target} HTTP/1.1\r\nHost: {host}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+               + "\r\n").encode("latin-1")
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = int(head.split(b" ", 2)[1])
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length and status != 304:
+                await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(url, *, concurrency=64, duration=10.0, etag=False, gzip=True):
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    headers = {"Accept-Encoding": "gzip"} if gzip else {}
+    if etag:
+        request = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(request) as resp:
+            headers["If-None-Match"] = resp.headers["ETag"]
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _worker(parts.hostname, parts.port, target, headers, deadline, latencies, statuses)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "statuses": statuses,
+    }
+
+
+def _spawn_api(rows, port):
+    """合成表格 + 替身服务 + 子进程里的接口；返回 (接口进程, 替身服务, 临时文件路径)。"""
+    csv = tempfile.NamedTemporaryFile(suffix=".csv", delete=False)
+    csv.write(make_csv(rows))
+    csv.close()
+    sheet = serve_sheet(csv.name)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "pipeline.api", "--port", str(port), "--source", sheet.url],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1) as resp:
+                if resp.status == 200:
+                    return proc, sheet, csv.name
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("接口启动超时")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="压测地址；不指定时在本地启动替身服务和接口")
+    parser.add_argument("--rows", type=int, default=2000, help="本地启动时合成表格的行数")
+    parser.add_argument("--port", type=int, default=8781, help="本地启动时接口的端口")
+    parser.add_argument("--query", default="sort=apy&limit=50", help="本地启动时的查询参数")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--etag", action="store_true", help="带 If-None-Match（测 304）")
+    parser.add_argument("--no-gzip", action="store_true")
+    args = parser.parse_args()
+
+    proc = sheet = csv_path = None
+    url = args.url
+    if url is None:
+        proc, sheet, csv_path = _spawn_api(args.rows, args.port)
+        url = f"http://127.0.0.1:{args.port}/offers?{args.query}"
+    try:
+        result = asyncio.run(run_load(url, concurrency=args.concurrency, duration=args.duration,
+                                      etag=args.etag, gzip=not args.no_gzip))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+            sheet.shutdown()
+            os.unlink(csv_path)
+    print(f"{url}  concurrency={args.concurrency}  {result['requests']} requests")
+    print(f"{result['rps']:.0f} req/s  p50 {result['p50_ms']:.2f} ms  p95 {result['p95_ms']:.2f} ms  "
+          f"p99 {result['p99_ms']:.2f} ms  statuses {result['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
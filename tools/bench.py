@@ -0,0 +1,145 @@
+"""各阶段的离线基准测试（合成表格，不访问网络）。
+
+    python -m tools.bench --sizes 100,1000,10000,100000
+    python -m tools.bench --compare bench_results/<旧提交>.json
+
+分别计时：CSV 解析（pipeline.ingest.read_sheet）、APY 解析、normalize、倒计时（原 calc_remaining）、
+HTML 表体拼接（不走缓存）、JSON offer 序列化。每项取多次运行的中位数，
+并用 tracemalloc 记录该阶段的峰值内存。结果写到 bench_results/<提交号>.json，
+--compare 打印与旧结果的耗时比值。
+"""
+
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline import build_offers, build_render_frame, compute_countdown, normalize, read_sheet, render_rows
+from pipeline.normalize import parse_apy
+from tools.synthetic import BASE_TIME, make_csv
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / 'bench_results'
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+# 倒计时以固定的 now 计算，保证不同时间运行结果可比
+BENCH_NOW = BASE_TIME.tz_localize('Asia/Shanghai')
+
+
+def _git_sha() -> str:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _measure(fn, repeat: int):
+    """返回 (结果, 中位耗时秒, 峰值内存字节)。"""
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, statistics.median(times), peak
+
+
+def bench_size(rows: int, repeat: int) -> dict:
+    raw = make_csv(rows)
+    stages = {}
+
+    def run(name, fn):
+        result, seconds, peak = _measure(fn, repeat)
+        stages[name] = {'seconds': seconds, 'peak_bytes': peak}
+        return result
+
+    df = run('csv_parse', lambda: read_sheet(raw))
+    run('apy_parse', lambda: parse_apy(df['年化（APY）']))
+    board = run('normalize', lambda: normalize(df))
+    columns = board.columns
+    countdown = run('countdown', lambda: compute_countdown(
+        board.df[columns.end], board.df[columns.start] if columns.start else None, now=BENCH_NOW))
+    frame = build_render_frame(board.df, columns.as_dict(), countdown)
+    html = run('render_html', lambda: render_rows(frame))
+    payload = run('render_json', lambda: json.dumps(build_offers(frame), ensure_ascii=False,
+                                                    separators=(',', ':')))
+    return {
+        'rows': rows,
+        'shown_rows': len(board),
+        'csv_bytes': len(raw),
+        'html_bytes': len(html.encode()),
+        'json_bytes': len(payload.encode()),
+        'total_seconds': sum(s['seconds'] for s in stages.values()),
+        'stages': stages,
+    }
+
+
+def compare(current: dict, previous: dict) -> None:
+    """打印当前结果相对旧结果的耗时比值（<1 表示变快）。"""
+    old = {r['rows']: r for r in previous['results']}
+    print(f"\ncompare with {previous.get('commit', '?')} (new / old):")
+    for result in current['results']:
+        base = old.get(result['rows'])
+        if base is None:
+            continue
+        ratios = []
+        for name, stage in result['stages'].items():
+            old_stage = base['stages'].get(name)
+            if old_stage and old_stage['seconds'] > 0:
+                ratios.append(f"{name}={stage['seconds'] / old_stage['seconds']:.2f}x")
+        print(f"  {result['rows']:>7} rows: " + '  '.join(ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='逗号分隔的行数')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', help='结果文件（默认 bench_results/<提交号>.json）')
+    parser.add_argument('--compare', help='与之对比的旧结果文件')
+    args = parser.parse_args()
+
+    sha = _git_sha()
+    results = []
+    print(f"{'rows':>7} " + ' '.join(f'{n:>12}' for n in
+                                     ['csv_parse', 'apy_parse', 'normalize', 'countdown',
+                                      'render_html', 'render_json']) + '   peak MiB')
+    for rows in (int(s) for s in args.sizes.split(',')):
+        result = bench_size(rows, args.repeat)
+        results.append(result)
+        stages = result['stages']
+        peak = max(s['peak_bytes'] for s in stages.values()) / 2**20
+        print(f'{rows:>7} ' + ' '.join(f"{s['seconds'] * 1000:>10.1f}ms" for s in stages.values())
+              + f'   {peak:>8.1f}')
+
+    report = {
+        'commit': sha,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'repeat': args.repeat,
+        'max_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'results': results,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f'{sha}.json'
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f'\nsaved {out}')
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == '__main__':
+    main()
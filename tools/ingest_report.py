@@ -0,0 +1,120 @@
+"""对比 CSV 解析 + normalize 的耗时和峰值内存：改动前的做法 vs 精简解析（C / pyarrow 解析器）。
+
+    python -m tools.ingest_report --sizes 10000,100000,500000
+
+- legacy：pd.read_csv 读全部列、自动推断类型，normalize 先按币种过滤复制一份，
+  再按 APY 是否可解析过滤又复制一份（改动前的 normalize）；
+- lean-c / lean-pyarrow：pipeline.ingest.read_sheet（只读用到的列，平台 / 币种为 category，
+  其余为字符串）+ 现在的 normalize（算好掩码后只取一次行）。
+
+每种做法在单独的子进程里跑（合成表格先写到临时文件），峰值内存取子进程最大 RSS 相对
+开始前的增量——pandas 的字符串列由 pyarrow 分配，tracemalloc 统计不到。
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+VARIANTS = ("legacy", "lean-c", "lean-pyarrow")
+
+
+def _legacy(body):
+    import pandas as pd
+
+    from pipeline.normalize import (COL_APY_MAX, COL_APY_MIN, COL_APY_VALUE, EXCLUDED_COINS, detect_columns,
+                                    parse_apy_values)
+
+    df = pd.read_csv(io.BytesIO(body))
+    parsed = time.perf_counter()
+    columns = detect_columns(df)
+    excluded = pd.Series(False, index=df.index)
+    for coin in EXCLUDED_COINS:
+        excluded |= df[columns.coin].astype(str).str.contains(coin, na=False)
+    filtered = df[~excluded].reset_index(drop=True)
+    apy = parse_apy_values(filtered[columns.apy])
+    bad = apy["error"].notna().to_numpy()
+    filtered = filtered[~bad].reset_index(drop=True)
+    filtered[COL_APY_VALUE] = apy["headline"].to_numpy()[~bad]
+    filtered[COL_APY_MIN] = apy["min"].to_numpy()[~bad]
+    filtered[COL_APY_MAX] = apy["max"].to_numpy()[~bad]
+    return df, filtered, parsed
+
+
+def _lean(body, engine):
+    from pipeline.ingest import read_sheet
+    from pipeline.normalize import normalize
+
+    df = read_sheet(body, engine=engine)
+    parsed = time.perf_counter()
+    return df, normalize(df).df, parsed
+
+
+def run_variant(variant, path, repeat):
+    """子进程：跑 repeat 次，输出中位耗时、峰值 RSS 增量和结果大小。"""
+    import pipeline.normalize  # noqa: F401  先导入，导入本身的内存不计入
+
+    with open(path, "rb") as f:
+        body = f.read()
+    base_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    parse, norm = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        if variant == "legacy":
+            raw, board, parsed = _legacy(body)
+        else:
+            raw, board, parsed = _lean(body, variant.split("-", 1)[1])
+        done = time.perf_counter()
+        parse.append(parsed - started)
+        norm.append(done - parsed)
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "parse_ms": statistics.median(parse) * 1000,
+        "normalize_ms": statistics.median(norm) * 1000,
+        "peak_mib": (peak_kib - base_kib) / 1024,
+        "raw_mib": raw.memory_usage(deep=True).sum() / 2**20,
+        "board_mib": board.memory_usage(deep=True).sum() / 2**20,
+        "columns": len(raw.columns),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,500000", help="逗号分隔的行数")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--variant", nargs=2, metavar=("VARIANT", "CSV"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args.variant[0], args.variant[1], args.repeat)
+        return
+
+    from tools.synthetic import make_csv
+
+    print(f"{'rows':>7} {'variant':>13} {'parse':>10} {'normalize':>10} {'peak MiB':>9} "
+          f"{'raw MiB':>8} {'board MiB':>9} {'cols':>5}")
+    for rows in (int(s) for s in args.sizes.split(",")):
+        with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as f:
+            f.write(make_csv(rows))
+        try:
+            for variant in VARIANTS:
+                out = subprocess.run(
+                    [sys.executable, "-m", "tools.ingest_report", "--repeat", str(args.repeat),
+                     "--variant", variant, f.name],
+                    capture_output=True, text=True, check=True,
+                ).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(f"{rows:>7} {variant:>13} {r['parse_ms']:>8.1f}ms {r['normalize_ms']:>8.1f}ms "
+                      f"{r['peak_mib']:>9.1f} {r['raw_mib']:>8.1f} {r['board_mib']:>9.1f} {r['columns']:>5}")
+        finally:
+            os.unlink(f.name)
+
+
+if __name__ == "__main__":
+    main()
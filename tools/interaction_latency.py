@@ -0,0 +1,142 @@
+"""用 Streamlit 的 AppTest 测页面交互的延迟：整页重跑 vs 只重跑所在的 fragment。
+
+    python -m tools.interaction_latency --rows 2000 --repeat 40
+
+先用合成表格启动本地替身服务，让 app.py 读它（快照、历史等写到临时目录）。
+每种交互重复 --repeat 次，打印 p50 / p95：
+- full：改完输入后整页重跑（改成 fragment 之前，任何交互都是这样）；
+- fragment：只重跑交互所在的 fragment（浏览器里实际发生的情况）。
+
+AppTest 的 run() 总是整页重跑，fragment 重跑通过给脚本执行器待处理的 RerunData 加上
+fragment_id_queue 实现（和浏览器发来的重跑请求相同）；fragment 按 app.py 里的 key 查找。
+"""
+
+import argparse
+import dataclasses
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from tools.sheet_stub import serve
+from tools.synthetic import make_csv
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app.py"
+
+
+@contextmanager
+def _fragment_scope(fragment_id):
+    """让下一次 AppTest 运行只执行 fragment_id 对应的 fragment。"""
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    original = LocalScriptRunner.request_rerun
+
+    def request_rerun(self, rerun_data):
+        # 执行器创建时已排了一次整页重跑，再排的 fragment 重跑会被合并进去，所以直接改合并后的请求
+        accepted = original(self, rerun_data)
+        requests = self._requests
+        requests._rerun_data = dataclasses.replace(requests._rerun_data, fragment_id_queue=[fragment_id])
+        return accepted
+
+    LocalScriptRunner.request_rerun = request_rerun
+    try:
+        yield
+    finally:
+        LocalScriptRunner.request_rerun = original
+
+
+def _fragment_id(at, key):
+    ids = at._fragment_storage._ids_by_target_key.get(key)
+    if not ids:
+        raise RuntimeError(f"app.py 里没有 key={key!r} 的 fragment")
+    return next(iter(ids))
+
+
+def _timed_run(at, fragment_key=None):
+    widget_states = at._tree.get_widget_states()
+    started = time.perf_counter()
+    if fragment_key is None:
+        at._run(widget_states)
+    else:
+        with _fragment_scope(_fragment_id(at, fragment_key)):
+            at._run(widget_states)
+    elapsed = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed
+
+
+# (名称, fragment key, 每次交互前对页面做的改动)
+INTERACTIONS = [
+    ("allocation amount", "allocation_panel",
+     lambda at, i: at.number_input[0].set_value(10000.0 + 1000 * (i % 20))),
+    ("allocation horizon", "allocation_panel",
+     lambda at, i: at.number_input[1].set_value(7 + i % 60)),
+    # 选项是 (平台, 币种) 元组，AppTest 只拿到格式化后的文字，select_index 会把文字当值，这里还原成元组
+    ("trend select", "trend_panel",
+     lambda at, i: at.selectbox[0].set_value(
+         tuple(at.selectbox[0].options[i % len(at.selectbox[0].options)].split(" · ", 1)))),
+    ("refresh button", "offer_table",
+     lambda at, i: at.button[0].click()),
+]
+
+
+def measure(repeat, timeout=60):
+    from streamlit.testing.v1 import AppTest
+
+    results = []
+    for name, key, interact in INTERACTIONS:
+        for scope in ("full", "fragment"):
+            at = AppTest.from_file(str(APP_PATH), default_timeout=timeout).run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+            times = []
+            for i in range(repeat + 1):
+                try:
+                    interact(at, i)
+                except (IndexError, KeyError):
+                    # fragment 重跑后 AppTest 只解析到该 fragment 的元素；控件不在其中时先整页跑一次
+                    at.run()
+                    interact(at, i)
+                elapsed = _timed_run(at, key if scope == "fragment" else None)
+                if i:                               # 第一次有导入和缓存预热，不计入
+                    times.append(elapsed)
+            ms = np.array(times) * 1000
+            results.append((name, scope, np.percentile(ms, 50), np.percentile(ms, 95)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "sheet.csv")
+        with open(csv_path, "wb") as f:
+            f.write(make_csv(args.rows))
+        server = serve(csv_path)
+        os.environ.update({
+            "SHEET_URL": server.url,
+            "SNAPSHOT_DB": os.path.join(tmp, "sheets.sqlite3"),
+            "HISTORY_DB": os.path.join(tmp, "history.sqlite3"),
+            "CHANGE_LOG": os.path.join(tmp, "changes.jsonl"),
+            "METRICS_FILE": os.path.join(tmp, "metrics.prom"),
+        })
+        try:
+            results = measure(args.repeat)
+        finally:
+            server.shutdown()
+
+    print(f"rows={args.rows} repeat={args.repeat}")
+    print(f"{'interaction':>20} {'rerun':>9} {'p50':>9} {'p95':>9}")
+    for name, scope, p50, p95 in results:
+        print(f"{name:>20} {scope:>9} {p50:>7.1f}ms {p95:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
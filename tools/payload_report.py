@@ -0,0 +1,110 @@
+"""测量每次脚本重跑发给浏览器的表格数据量。
+
+    python -m tools.payload_report --csv tools/sample_sheet.csv
+
+用本地替身服务提供表格，通过 Streamlit 的 AppTest 跑一遍 app.py，
+统计表格组件在 ForwardMsg 里的字节数（每次重跑都要发送），以及静态资源包的字节数
+（只在首次加载时下载，之后走浏览器缓存）。「全部内联」一栏是把资源包和行数据
+塞进同一个 HTML 字符串时每次重跑的字节数，即改造前 components.html 的发送方式。
+
+    python -m tools.payload_report --baseline ca429eb
+
+--baseline 另外在临时 git worktree 里检出该版本的 app.py 实测一遍（改造前的页面把整张表
+拼成 components.html 的 srcdoc，统计 IFrame 元素的字节数）。旧版本直接用 pd.read_csv 读
+Google 表格地址，测量时把 http(s) 地址换成 --csv 指定的文件。
+"""
+
+import argparse
+import os
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from tools.sheet_stub import DEFAULT_CSV, serve
+
+REPO = Path(__file__).resolve().parent.parent
+APP_PATH = str(REPO / 'app.py')
+
+
+def _walk(node):
+    yield node
+    for child in getattr(node, 'children', {}).values():
+        yield from _walk(child)
+
+
+def component_payloads(at, kinds=('ComponentInstance',)):
+    """返回 AppTest 元素树里所有自定义组件（或 kinds 指定类型的元素）的 proto。"""
+    for node in _walk(at._tree):
+        proto = getattr(node, 'proto', None)
+        if proto is not None and type(proto).__name__ in kinds:
+            yield proto
+
+
+@contextmanager
+def _worktree(rev):
+    """把 rev 检出到临时 worktree，用完删除。"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tree')
+        subprocess.run(['git', '-C', str(REPO), 'worktree', 'add', '--quiet', '--detach', path, rev], check=True)
+        try:
+            yield Path(path)
+        finally:
+            subprocess.run(['git', '-C', str(REPO), 'worktree', 'remove', '--force', path], check=True)
+
+
+def measure_baseline(rev, csv_path):
+    """rev 版本的 app.py 每次重跑发送的表格字节数（components.html 的 IFrame 或自定义组件）。"""
+    import pandas as pd
+    from streamlit.testing.v1 import AppTest
+
+    read_csv = pd.read_csv
+
+    def local_read_csv(src, *args, **kwargs):
+        return read_csv(csv_path if str(src).startswith(('http://', 'https://')) else src, *args, **kwargs)
+
+    with _worktree(rev) as tree:
+        pd.read_csv = local_read_csv
+        try:
+            at = AppTest.from_file(str(tree / 'app.py'), default_timeout=60).run()
+        finally:
+            pd.read_csv = read_csv
+    if at.exception:
+        raise SystemExit(at.exception[0].value)
+    return sum(p.ByteSize() for p in component_payloads(at, ('IFrame', 'ComponentInstance')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', default=DEFAULT_CSV)
+    parser.add_argument('--baseline', metavar='REV', help='同时实测该 git 版本的 app.py（例如 ca429eb）')
+    args = parser.parse_args()
+
+    server = serve(args.csv)
+    os.environ['SHEET_URL'] = server.url
+
+    from streamlit.testing.v1 import AppTest
+
+    from pipeline import build_bundle
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    if at.exception:
+        raise SystemExit(at.exception[0].value)
+    protos = list(component_payloads(at))
+    if not protos:
+        raise SystemExit('没有找到表格组件')
+
+    per_rerun = sum(p.ByteSize() for p in protos)
+    bundle = build_bundle()
+    print(f'sheet:               {args.csv}')
+    print(f'bundle version:      {bundle.version}')
+    print(f'bundle (one-time):   {bundle.size():>9,} B  {sorted(bundle.files.values())}')
+    print(f'per rerun:           {per_rerun:>9,} B')
+    print(f'all inlined (old):   {per_rerun + bundle.size():>9,} B')
+    server.shutdown()
+    if args.baseline:
+        print(f'baseline {args.baseline}: {measure_baseline(args.baseline, args.csv):>9,} B per rerun')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""模拟同一台机器上的多个副本，比较有无共享缓存时的上游抓取次数和每个进程的内存。
+
+    python -m tools.replicas --replicas 4 --rows 50000 --interval 2 --duration 10
+    python -m tools.replicas --replicas 4 --rows 50000 --no-shared
+
+每个副本是一个子进程，跑一个与 app.py 相同的后台刷新器（刷新周期 --interval 秒），
+替身服务每隔 --change-every 秒换一次表格内容。结束时打印上游请求数（完整下载 / 304）、
+每个进程解析 CSV 与映射共享数据的次数，以及每个进程的匿名内存（RssAnon，不含共享的页缓存）。
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from tools.sheet_stub import serve
+from tools.synthetic import make_csv
+
+
+def _rss_anon_mib() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def worker(url, shared_dir, interval, duration):
+    """子进程：跑刷新器 duration 秒，输出 JSON 统计。"""
+    from pipeline import SheetRefresher, metrics, open_shared_cache
+
+    shared = open_shared_cache(shared_dir, ttl=interval) if shared_dir else None
+    refresher = SheetRefresher(url, interval=interval, shared=shared)
+    refresher.load()
+    time.sleep(duration)
+    refresher.stop()
+    counts = {s["stage"]: s["count"] for s in metrics.stages()}
+    print(json.dumps({
+        "read_csv": counts.get("read_csv", 0),
+        "shared_load": counts.get("shared_load", 0),
+        "rows": len(refresher.snapshot().df),
+        "rss_anon_mib": round(_rss_anon_mib(), 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--interval", type=float, default=2.0, help="刷新周期（共享缓存的 ttl）")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--change-every", type=float, default=4.0, help="替身表格内容变化的间隔（秒）")
+    parser.add_argument("--no-shared", action="store_true", help="不使用共享缓存（对照组）")
+    parser.add_argument("--worker", nargs=4, metavar=("URL", "DIR", "INTERVAL", "DURATION"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        url, shared_dir, interval, duration = args.worker
+        worker(url, None if shared_dir == "-" else shared_dir, float(interval), float(duration))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "sheet.csv")
+        with open(csv_path, "wb") as f:
+            f.write(make_csv(args.rows))
+        server = serve(csv_path)
+        shared_dir = "-" if args.no_shared else os.path.join(tmp, "shared")
+        procs = [
+            subprocess.Popen(
+                [sys.executable, "-m", "tools.replicas", "--worker", server.url, shared_dir,
+                 str(args.interval), str(args.duration)],
+                stdout=subprocess.PIPE, text=True,
+            )
+            for _ in range(args.replicas)
+        ]
+        # 定期换一份表格内容，模拟运营更新
+        started = time.time()
+        seed = 1
+        while any(p.poll() is None for p in procs):
+            time.sleep(0.2)
+            if time.time() - started > args.change_every * seed:
+                seed += 1
+                body = make_csv(args.rows, seed=seed)
+                with open(csv_path + ".tmp", "wb") as f:
+                    f.write(body)
+                os.replace(csv_path + ".tmp", csv_path)
+        results = [json.loads(p.stdout.read().strip().splitlines()[-1]) for p in procs]
+        server.shutdown()
+
+    print(f"replicas={args.replicas} rows={args.rows} interval={args.interval}s duration={args.duration}s "
+          f"shared={'off' if args.no_shared else 'on'}")
+    print(f"upstream requests: {server.stats}")
+    for i, r in enumerate(results):
+        print(f"  replica {i}: read_csv {r['read_csv']}  shared_load {r['shared_load']}  "
+              f"rows {r['rows']}  RssAnon {r['rss_anon_mib']} MiB")
+
+
+if __name__ == "__main__":
+    main()
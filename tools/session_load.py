@@ -0,0 +1,276 @@
+"""并发会话压测：N 个模拟浏览器会话同时打开 app.py，报告重跑延迟、每会话内存和缓存命中。
+
+    python -m tools.session_load --sessions 10,100,1000 --rows 2000
+    python -m tools.session_load --sessions 100 --out load-new.json --compare load-old.json
+
+每个会话数单独启动一次 `streamlit run app.py`（子进程，无头模式），数据源是合成表格的本地替身服务，
+快照、历史等写到临时目录。客户端用 websockets 按浏览器的协议连到 /_stcore/stream：
+每个会话发送 rerun_script（BackMsg），收到 script_finished（ForwardMsg）算一次脚本运行。
+
+- 会话在 --ramp 秒内陆续连上（模拟群里发链接后的突发流量），每个会话先跑一次页面，
+  再间隔随机的 0~--think 秒重跑 --reruns 次；延迟取发送到收到 script_finished 的时间，
+  打印全部运行的 p50 / p95 / p99，以及报错（页面异常或连接失败）的次数；
+- 所有会话跑完、仍保持连接时读服务进程的 RSS，减去只有一个预热会话时的 RSS 再除以 N，
+  另外记录整轮的峰值 RSS（VmHWM，运行中的脚本同时持有的临时对象都算在内）；
+- 缓存命中读服务进程导出的指标文件（共享视图 board_view、渲染缓存、抓取次数），取压测前后的差值。
+  指标文件每 15 秒写一次，所以每轮会多等最多 30 秒。
+
+--out 保存 JSON 结果，--compare 打印与旧结果的比值（>1 表示变慢 / 变大），便于发现回退。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from tools.sheet_stub import serve as serve_sheet
+from tools.synthetic import make_csv
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app.py"
+
+# 报告里关心的缓存类计数器（去掉前缀后的指标名）
+CACHE_COUNTERS = ("board_view_total", "cache_hits_total", "cache_misses_total", "fetch_total")
+_PROM_LINE = re.compile(r"^stablecoin_dashboard_(\w+?)(\{[^}]*\})? (\S+)$")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_kib(pid, field="VmRSS"):
+    """进程当前（VmRSS）或历史峰值（VmHWM）常驻内存，KiB。"""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _read_metrics(path, newer_than, timeout=20.0):
+    """等指标文件在 newer_than 之后写过一次，返回 {(指标名, 标签): 值}。"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if os.stat(path).st_mtime > newer_than:
+                break
+        except FileNotFoundError:
+            pass
+        time.sleep(0.5)
+    values = {}
+    with open(path) as f:
+        for line in f:
+            m = _PROM_LINE.match(line.strip())
+            if m:
+                values[(m.group(1), m.group(2) or "")] = float(m.group(3))
+    return values
+
+
+class _Server:
+    """替身服务 + `streamlit run app.py` 子进程。"""
+
+    def __init__(self, rows):
+        self.tmp = tempfile.TemporaryDirectory()
+        csv_path = os.path.join(self.tmp.name, "sheet.csv")
+        with open(csv_path, "wb") as f:
+            f.write(make_csv(rows))
+        self.sheet = serve_sheet(csv_path)
+        self.port = _free_port()
+        self.metrics_file = os.path.join(self.tmp.name, "metrics.prom")
+        env = dict(
+            os.environ,
+            SHEET_URL=self.sheet.url,
+            SNAPSHOT_DB=os.path.join(self.tmp.name, "sheets.sqlite3"),
+            HISTORY_DB=os.path.join(self.tmp.name, "history.sqlite3"),
+            CHANGE_LOG=os.path.join(self.tmp.name, "changes.jsonl"),
+            METRICS_FILE=self.metrics_file,
+        )
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", str(APP_PATH), "--server.headless", "true",
+             "--server.port", str(self.port), "--server.enableXsrfProtection", "false",
+             "--browser.gatherUsageStats", "false"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        self.close()
+        raise RuntimeError("streamlit 启动超时")
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def close(self):
+        self.proc.terminate()
+        self.proc.wait()
+        self.sheet.shutdown()
+        self.tmp.cleanup()
+
+
+async def _run_script(ws):
+    """请求一次整页重跑，等到 script_finished；返回本次运行是否出错。"""
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    msg = BackMsg()
+    msg.rerun_script.query_string = ""
+    msg.rerun_script.page_script_hash = ""
+    await ws.send(msg.SerializeToString())
+    failed = False
+    while True:
+        fwd = ForwardMsg()
+        fwd.ParseFromString(await ws.recv())
+        kind = fwd.WhichOneof("type")
+        if kind == "delta" and fwd.delta.new_element.WhichOneof("type") == "exception":
+            failed = True
+        elif kind == "script_finished":
+            return failed or fwd.script_finished != ForwardMsg.FINISHED_SUCCESSFULLY
+
+
+async def _session(url, delay, reruns, think, latencies, errors, finished, release):
+    import websockets
+
+    await asyncio.sleep(delay)
+    try:
+        async with websockets.connect(url, subprotocols=["streamlit"], max_size=None,
+                                      open_timeout=120, ping_interval=None) as ws:
+            for i in range(reruns + 1):
+                if i and think:
+                    await asyncio.sleep(random.uniform(0, think))
+                started = time.perf_counter()
+                if await _run_script(ws):
+                    errors.append("script")
+                latencies.append(time.perf_counter() - started)
+            finished()
+            await release.wait()                    # 所有会话跑完之前保持连接（会话状态留在服务端）
+    except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as exc:
+        errors.append(type(exc).__name__)
+        finished()
+
+
+async def run_sessions(server, sessions, *, reruns=2, ramp=2.0, think=1.0):
+    """跑 sessions 个并发会话；返回 (每次运行的延迟秒, 错误列表, 全部会话在线时的 RSS KiB)。"""
+    latencies, errors = [], []
+    remaining = sessions
+    all_done, release = asyncio.Event(), asyncio.Event()
+
+    def finished():
+        nonlocal remaining
+        remaining -= 1
+        if not remaining:
+            all_done.set()
+
+    tasks = [asyncio.create_task(_session(server.url, random.uniform(0, ramp), reruns, think,
+                                          latencies, errors, finished, release))
+             for _ in range(sessions)]
+    await all_done.wait()
+    rss = _rss_kib(server.proc.pid)
+    release.set()
+    await asyncio.gather(*tasks)
+    return latencies, errors, rss
+
+
+def measure(sessions, *, rows=2000, reruns=2, ramp=2.0, think=1.0):
+    server = _Server(rows)
+    try:
+        # 预热：一个会话跑一遍（首次抓取、导入、共享视图、表格组件打包），作为内存和计数器的基线
+        _, errors, base_rss = asyncio.run(run_sessions(server, 1, reruns=0, ramp=0, think=0))
+        if errors:
+            raise RuntimeError(f"预热会话失败：{errors}")
+        before = _read_metrics(server.metrics_file, time.time())
+        started = time.perf_counter()
+        latencies, errors, rss = asyncio.run(run_sessions(server, sessions, reruns=reruns, ramp=ramp, think=think))
+        elapsed = time.perf_counter() - started
+        after = _read_metrics(server.metrics_file, time.time())
+        peak_rss = _rss_kib(server.proc.pid, "VmHWM")
+    finally:
+        server.close()
+
+    ms = np.array(latencies) * 1000
+    caches = {f"{name}{labels}": after[name, labels] - before.get((name, labels), 0.0)
+              for name, labels in sorted(after) if name in CACHE_COUNTERS}
+    return {
+        "sessions": sessions,
+        "runs": len(latencies),
+        "errors": dict(Counter(errors)),
+        "elapsed_s": elapsed,
+        "p50_ms": float(np.percentile(ms, 50)) if len(ms) else None,
+        "p95_ms": float(np.percentile(ms, 95)) if len(ms) else None,
+        "p99_ms": float(np.percentile(ms, 99)) if len(ms) else None,
+        "base_rss_mib": base_rss / 1024,
+        "rss_mib": rss / 1024,
+        "peak_rss_mib": peak_rss / 1024,
+        "per_session_kib": (rss - base_rss) / sessions,
+        "caches": {k: v for k, v in caches.items() if v},
+    }
+
+
+def compare(current, previous):
+    """打印与旧结果的比值（>1 表示变慢 / 变大）。"""
+    old = {r["sessions"]: r for r in previous["results"]}
+    print(f"\ncompare with {previous.get('commit', '?')} (new / old):")
+    for result in current["results"]:
+        base = old.get(result["sessions"])
+        if base is None:
+            continue
+        ratios = [f"{key}={result[key] / base[key]:.2f}x"
+                  for key in ("p50_ms", "p95_ms", "p99_ms", "per_session_kib") if result[key] and base.get(key)]
+        print(f"  {result['sessions']:>5} sessions: " + "  ".join(ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="10,100,1000", help="逗号分隔的并发会话数")
+    parser.add_argument("--rows", type=int, default=2000, help="合成表格的行数")
+    parser.add_argument("--reruns", type=int, default=2, help="每个会话首次运行之后再重跑的次数")
+    parser.add_argument("--ramp", type=float, default=2.0, help="所有会话在这么多秒内陆续连上")
+    parser.add_argument("--think", type=float, default=1.0, help="两次重跑之间的最长随机间隔（秒）")
+    parser.add_argument("--out", help="保存 JSON 结果")
+    parser.add_argument("--compare", help="与之对比的旧结果文件")
+    args = parser.parse_args()
+
+    from tools.bench import _git_sha
+
+    print(f"rows={args.rows} reruns={args.reruns} ramp={args.ramp}s think={args.think}s")
+    print(f"{'sessions':>8} {'runs':>6} {'errors':>6} {'p50':>9} {'p95':>9} {'p99':>9} "
+          f"{'RSS':>9} {'peak':>9} {'per session':>12}  caches")
+    results = []
+    for sessions in (int(s) for s in args.sessions.split(",")):
+        r = measure(sessions, rows=args.rows, reruns=args.reruns, ramp=args.ramp, think=args.think)
+        results.append(r)
+        caches = " ".join(f"{k}={v:g}" for k, v in r["caches"].items())
+        print(f"{sessions:>8} {r['runs']:>6} {sum(r['errors'].values()):>6} {r['p50_ms'] or 0:>7.0f}ms "
+              f"{r['p95_ms'] or 0:>7.0f}ms {r['p99_ms'] or 0:>7.0f}ms {r['rss_mib']:>5.0f} MiB "
+              f"{r['peak_rss_mib']:>5.0f} MiB {r['per_session_kib']:>8.0f} KiB  {caches}")
+        if r["errors"]:
+            print(f"{'':>8} errors: " + " ".join(f"{k}={v}" for k, v in r["errors"].items()))
+
+    report = {"commit": _git_sha(), "rows": args.rows, "reruns": args.reruns, "ramp": args.ramp,
+              "think": args.think, "results": results}
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"\nsaved {args.out}")
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""模拟 N 个会话同时重跑，对比每个会话额外占用的内存：各自计算 vs 共享看板视图。
+
+    python -m tools.session_memory --rows 2000 --sessions 100,500
+
+- per-session：每个会话自己 normalize → enrich → render_table（改动前 app.py 的做法）；
+- shared：每个会话从同一个 ViewCache 取视图（现在的做法）。
+
+每种做法在单独的子进程里跑：先用合成表格建好快照、历史和变化对比（所有会话共用，两种做法相同），
+然后依次执行 N 次重跑并保留每次重跑持有的对象（相当于 N 个重跑同时进行），
+用匿名内存（RssAnon）的增量除以 N 得到每个会话的开销，同时记录每次重跑的中位耗时。
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _rss_anon_kib() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1])
+    return 0
+
+
+def run_mode(mode, rows, sessions):
+    """子进程：准备共享数据，跑 sessions 次重跑，输出 JSON。"""
+    import gc
+
+    from pipeline import DiffEngine, ViewCache, enrich, normalize, open_history, read_sheet, render_table
+    from tools.synthetic import make_csv
+
+    df = read_sheet(make_csv(rows))
+    tmp = tempfile.mkdtemp()
+    history = open_history(os.path.join(tmp, "history.sqlite3"))
+    changes = DiffEngine()
+    board = normalize(df)
+    history.record(board, time.time())
+    changes.observe(board)
+    views = ViewCache(history=history, changes=changes)
+
+    def rerun():
+        if mode == "shared":
+            return views.get(df)
+        board = normalize(df)
+        enriched = enrich(board, history=history, changes=changes)
+        return board, enriched, render_table(enriched)
+
+    rerun()                                     # 预热：导入、渲染缓存、走势缓存
+    gc.collect()
+    base = _rss_anon_kib()
+    held, times = [], []
+    for _ in range(sessions):
+        started = time.perf_counter()
+        held.append(rerun())
+        times.append(time.perf_counter() - started)
+    gc.collect()
+    grown = _rss_anon_kib() - base
+    print(json.dumps({
+        "per_session_kib": grown / sessions,
+        "total_mib": grown / 1024,
+        "rerun_ms": statistics.median(times) * 1000,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--sessions", default="100,500", help="逗号分隔的会话数")
+    parser.add_argument("--mode", choices=("per-session", "shared"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.rows, int(args.sessions))
+        return
+
+    print(f"rows={args.rows}")
+    print(f"{'sessions':>8} {'mode':>12} {'per session':>12} {'total':>10} {'rerun':>9}")
+    for sessions in (int(s) for s in args.sessions.split(",")):
+        for mode in ("per-session", "shared"):
+            out = subprocess.run(
+                [sys.executable, "-m", "tools.session_memory", "--mode", mode,
+                 "--rows", str(args.rows), "--sessions", str(sessions)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{sessions:>8} {mode:>12} {r['per_session_kib']:>9.1f} KiB {r['total_mib']:>6.1f} MiB "
+                  f"{r['rerun_ms']:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""本地的 Google 表格 CSV 导出替身，用于离线开发和验证。
+
+    python -m tools.sheet_stub --csv tools/sample_sheet.csv --port 8765
+    SHEET_URL=http://127.0.0.1:8765/export?format=csv streamlit run app.py
+
+每次请求都重新读取 CSV 文件，直接编辑文件即可模拟表格改动。
+默认返回 ETag / Last-Modified 并支持条件请求（304）；加 --no-validators
+可模拟不返回校验头的情况（此时刷新器依靠字节摘要跳过解析）。
+
+多标签页：--tab GID=文件 让 ...&gid=GID 返回另一个 CSV；--delay 秒数模拟慢速导出。
+
+故障注入（验证抓取的超时、重试和熔断）：--fault 取
+- stall：接受连接后一直不响应（--stall 秒）；
+- drip：正常响应头，内容每 0.5 秒只发 1 KB；
+- error：返回 503；
+- truncate：Content-Length 是完整长度，只发一半内容就断开。
+--fault-count N 只让接下来 N 个请求出故障。运行中可以请求 /_fault?mode=stall&count=2
+切换（mode 为空恢复正常）。
+"""
+
+import argparse
+import hashlib
+import os
+import socket
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_CSV = os.path.join(os.path.dirname(__file__), "sample_sheet.csv")
+FAULTS = ("stall", "drip", "error", "truncate")
+
+
+class SheetStubHandler(BaseHTTPRequestHandler):
+    server: "SheetStubServer"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path == "/_fault":
+            query = parse_qs(parts.query)
+            count = query.get("count", [None])[0]
+            self.server.set_fault(query.get("mode", [None])[0] or None, int(count) if count else None)
+            self.send_response(204)
+            self.end_headers()
+            return
+
+        stats = self.server.stats
+        stats["requests"] += 1
+        gid = parse_qs(parts.query).get("gid", [None])[0]
+        csv_path = self.server.tabs.get(gid, self.server.csv_path)
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        with open(csv_path, "rb") as f:
+            body = f.read()
+
+        fault = self.server.take_fault()
+        if fault is not None:
+            stats["faults"] += 1
+            self._inject(fault, body)
+            return
+        mtime = int(os.path.getmtime(csv_path))
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        last_modified = formatdate(mtime, usegmt=True)
+
+        if self.server.validators:
+            inm = self.headers.get("If-None-Match")
+            ims = self.headers.get("If-Modified-Since")
+            not_modified = False
+            if inm is not None:
+                not_modified = inm == etag
+            elif ims is not None:
+                try:
+                    not_modified = parsedate_to_datetime(ims).timestamp() >= mtime
+                except (TypeError, ValueError):
+                    not_modified = False
+            if not_modified:
+                stats["not_modified"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+        stats["full"] += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.validators:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _inject(self, fault, body):
+        self.close_connection = True
+        if fault == "stall":
+            time.sleep(self.server.stall)
+            return
+        if fault == "error":
+            self.send_error(503, "stub fault")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if fault == "truncate":
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        try:                                    # drip
+            for i in range(0, len(body), 1024):
+                self.wfile.write(body[i:i + 1024])
+                self.wfile.flush()
+                time.sleep(0.5)
+        except OSError:                         # 客户端超时断开
+            pass
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class SheetStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, csv_path=DEFAULT_CSV, *, validators=True, verbose=False,
+                 tabs=None, delay=0.0, fault=None, fault_count=None, stall=3600.0):
+        super().__init__(address, SheetStubHandler)
+        self.csv_path = csv_path
+        self.tabs = dict(tabs or {})     # gid -> CSV 文件
+        self.delay = delay               # 每个请求响应前等待的秒数
+        self.validators = validators
+        self.verbose = verbose
+        self.stall = stall               # stall 故障不响应的秒数
+        self.stats = {"requests": 0, "not_modified": 0, "full": 0, "faults": 0}
+        self._fault_lock = threading.Lock()
+        self.set_fault(fault, fault_count)
+
+    def set_fault(self, fault=None, count=None):
+        """之后的请求按 fault 出故障（None 恢复正常）；count 为 None 时一直持续。"""
+        if fault is not None and fault not in FAULTS:
+            raise ValueError(f"unknown fault: {fault!r}")
+        with self._fault_lock:
+            self.fault = fault
+            self.fault_count = count
+
+    def take_fault(self):
+        with self._fault_lock:
+            if self.fault is None:
+                return None
+            if self.fault_count is not None:
+                if self.fault_count <= 0:
+                    return None
+                self.fault_count -= 1
+            return self.fault
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/export?format=csv"
+
+    def tab_url(self, gid: str) -> str:
+        return f"{self.url}&gid={gid}"
+
+
+def serve(csv_path=DEFAULT_CSV, *, port=0, validators=True, verbose=False, tabs=None, delay=0.0,
+          fault=None, fault_count=None, stall=3600.0) -> SheetStubServer:
+    """在后台线程启动替身服务器（port=0 表示随机端口），返回 server，用完调用 shutdown()。"""
+    server = SheetStubServer(("127.0.0.1", port), csv_path, validators=validators, verbose=verbose,
+                             tabs=tabs, delay=delay, fault=fault, fault_count=fault_count, stall=stall)
+    threading.Thread(target=server.serve_forever, name="sheet-stub", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-validators", action="store_true", help="不返回 ETag/Last-Modified")
+    parser.add_argument("--tab", action="append", default=[], metavar="GID=CSV", help="标签页 gid 对应的 CSV")
+    parser.add_argument("--delay", type=float, default=0.0, help="每个请求延迟的秒数")
+    parser.add_argument("--fault", choices=FAULTS, help="注入的故障")
+    parser.add_argument("--fault-count", type=int, help="只让接下来 N 个请求出故障")
+    parser.add_argument("--stall", type=float, default=3600.0, help="stall 故障不响应的秒数")
+    args = parser.parse_args()
+
+    server = SheetStubServer(
+        ("127.0.0.1", args.port), args.csv, validators=not args.no_validators, verbose=True,
+        tabs=dict(t.split("=", 1) for t in args.tab), delay=args.delay,
+        fault=args.fault, fault_count=args.fault_count, stall=args.stall,
+    )
+    print(f"serving {args.csv} at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
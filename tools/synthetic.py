@@ -0,0 +1,95 @@
+"""生成与真实表格同结构的合成数据（离线、可复现）。
+
+列与线上表格一致：平台、币种、年化（APY）、开始时间（列名可换成其它写法）、结束时间、
+单个账户限额、是否锁仓、派息时间、投入1wu一个月收益、理财链接。
+时间列混合 ISO 和中文写法，也包含「7天定期存款」「暂无」等非日期内容。
+"""
+
+import io
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from pipeline import START_TIME_COL_CANDIDATES
+
+PLATFORMS = ['Binance', 'OKX', 'Bybit', 'Bitget', 'Gate', 'HTX', 'KuCoin', 'MEXC', 'BingX', 'Bitmart']
+COINS = ['USDT', 'USDC', 'FDUSD', 'USDE', 'USD1', 'USDG', 'PYUSD', 'USDD', 'BGUSD', 'DAI']
+LOCKS = ['是', '否', '否', '否']
+PAYOUTS = ['每日派息', '每日派息', '每周派息', '到期派息', '-']
+NO_END = ['暂无', '无截止', '-']
+
+# 基准时间固定，保证每次生成的数据完全相同
+BASE_TIME = pd.Timestamp('2026-01-20 12:00')
+
+
+def _fmt_time(ts: pd.Timestamp, style: int) -> str:
+    if style == 0:
+        return ts.strftime('%Y-%m-%d %H:%M')
+    if style == 1:
+        return f'{ts.year}/{ts.month}/{ts.day} {ts.hour}:{ts.minute:02d}'
+    if style == 2:
+        return ts.strftime('%Y-%m-%d')
+    if style == 3:
+        return f'{ts.month}月{ts.day}日{ts.hour}点{ts.minute}'
+    if style == 4:
+        return f'{ts.month}月{ts.day}日{ts.hour}:{ts.minute:02d}'
+    if style == 5:
+        return f'{ts.month}月{ts.day}日{ts.hour}点'
+    if style == 6:
+        return f'{ts.month}月{ts.day}日'
+    return ts.strftime('%Y.%m.%d')
+
+
+def make_sheet(rows: int, *, seed: int = 0, start_column: Optional[str] = None,
+               base_time: pd.Timestamp = BASE_TIME) -> pd.DataFrame:
+    """生成 rows 行的合成表格；start_column 默认在候选开始时间列名里轮换。"""
+    rng = np.random.default_rng(seed)
+    start_column = start_column or START_TIME_COL_CANDIDATES[seed % len(START_TIME_COL_CANDIDATES)]
+
+    platforms = rng.choice(PLATFORMS, rows)
+    coins = rng.choice(COINS, rows).astype(object)
+    coins[rng.random(rows) < 0.002] = '亮亮币'
+    apy = np.round(rng.gamma(2.0, 5.0, rows), 2)
+    apy_text = [f'{v:g}%' for v in apy]
+
+    start_offsets = rng.integers(-40 * 24 * 60, 2 * 24 * 60, rows)     # 分钟
+    durations = rng.integers(1 * 24 * 60, 90 * 24 * 60, rows)
+    styles = rng.integers(0, 8, rows)
+    start_text, end_text = [], []
+    kind = rng.random(rows)
+    for i in range(rows):
+        start = base_time + pd.Timedelta(minutes=int(start_offsets[i]))
+        end = start + pd.Timedelta(minutes=int(durations[i]))
+        style = int(styles[i])
+        start_text.append('' if kind[i] < 0.15 else _fmt_time(start, style))
+        if kind[i] > 0.95:
+            end_text.append(rng.choice(NO_END))
+        elif kind[i] > 0.88 and start_text[-1]:
+            end_text.append(f'{int(durations[i]) // 1440}天定期存款' if i % 2 else f'{int(durations[i]) // 1440}天')
+        else:
+            end_text.append(_fmt_time(end, style))
+
+    limits = rng.integers(1, 200, rows) * 100
+    limit_text = np.where(rng.random(rows) < 0.2, '无', [f'{v} {c}' for v, c in zip(limits, coins)])
+    monthly = np.round(apy * 10000 / 100 / 12, 1)
+
+    return pd.DataFrame({
+        '平台': platforms,
+        '币种': coins,
+        '年化（APY）': apy_text,
+        start_column: start_text,
+        '结束时间': end_text,
+        '单个账户限额': limit_text,
+        '是否锁仓': rng.choice(LOCKS, rows),
+        '派息时间': rng.choice(PAYOUTS, rows),
+        '投入1wu一个月收益': monthly,
+        '理财链接': [f'https://www.{p.lower()}.com/earn/{i}' for i, p in enumerate(platforms)],
+    })
+
+
+def make_csv(rows: int, **kwargs) -> bytes:
+    """与 Google 表格导出相同的 UTF-8 CSV 字节。"""
+    buf = io.StringIO()
+    make_sheet(rows, **kwargs).to_csv(buf, index=False)
+    return buf.getvalue().encode('utf-8')
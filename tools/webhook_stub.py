@@ -0,0 +1,72 @@
+"""本地的 webhook 接收端替身，用于验证变化事件的推送。
+
+    python -m tools.webhook_stub --port 8766
+    CHANGE_WEBHOOK=http://127.0.0.1:8766/hook streamlit run app.py
+
+收到的每个 POST 请求体（JSON）都保存在 server.received 里，并打印到终端。
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class WebhookStubHandler(BaseHTTPRequestHandler):
+    server: "WebhookStubServer"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"null")
+        with self.server.lock:
+            self.server.received.append(payload)
+        if self.server.verbose:
+            print(json.dumps(payload, ensure_ascii=False, indent=2))
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class WebhookStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, *, status=204, verbose=False):
+        super().__init__(address, WebhookStubHandler)
+        self.status = status        # 返回的状态码（可设为 500 模拟接收端故障）
+        self.verbose = verbose
+        self.received = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/hook"
+
+
+def serve(*, port=0, status=204, verbose=False) -> WebhookStubServer:
+    """在后台线程启动接收端（port=0 表示随机端口），返回 server，用完调用 shutdown()。"""
+    server = WebhookStubServer(("127.0.0.1", port), status=status, verbose=verbose)
+    threading.Thread(target=server.serve_forever, name="webhook-stub", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--status", type=int, default=204, help="返回的 HTTP 状态码")
+    args = parser.parse_args()
+
+    server = WebhookStubServer(("127.0.0.1", args.port), status=args.status, verbose=True)
+    print(f"listening at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()